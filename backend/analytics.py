@@ -0,0 +1,216 @@
+"""Per-user aggregates behind analyze_current, suggest_next_step and get_growth_insights.
+
+Triggers on emotional_context and goals keep three summary tables up to date in the
+same transaction as the row change. That holds whichever code path writes,
+including batch, the shard rebalancer and manual SQL:
+
+* emotion_topic_counts: how often a user felt each emotion about each topic
+* strategy_effectiveness: count and sum of effectiveness_score per user, emotion and
+  response strategy, so the running mean is one division
+* goal_rollups: goal count and progress sum per user, goal type and status
+
+The insight actions then read a handful of rows by primary key instead of a
+user's whole history. NULL emotions, topics, strategies and goal types are
+stored as ''. ``check`` rebuilds the aggregates from the raw rows in memory and
+lists every difference, and ``rebuild`` rewrites them.
+
+Usage: python analytics.py [database_path] [--repair]
+"""
+import argparse
+import sqlite3
+import sys
+
+ANALYTICS_TABLES = {
+    "emotion_topic_counts": (
+        ("user_id", "emotion", "topic"),
+        ("occurrences",),
+        '''
+        SELECT coalesce(user_id, ''), coalesce(emotion, ''), coalesce(topic, ''), count(*)
+        FROM emotional_context GROUP BY 1, 2, 3
+        ''',
+    ),
+    "strategy_effectiveness": (
+        ("user_id", "emotion", "response_strategy"),
+        ("rated", "score_sum"),
+        '''
+        SELECT coalesce(user_id, ''), coalesce(emotion, ''), coalesce(response_strategy, ''),
+               count(*), sum(effectiveness_score)
+        FROM emotional_context WHERE effectiveness_score IS NOT NULL GROUP BY 1, 2, 3
+        ''',
+    ),
+    "goal_rollups": (
+        ("user_id", "goal_type", "status"),
+        ("goals", "progress_sum"),
+        '''
+        SELECT coalesce(user_id, ''), coalesce(goal_type, ''), coalesce(status, ''),
+               count(*), sum(coalesce(progress, 0))
+        FROM goals GROUP BY 1, 2, 3
+        ''',
+    ),
+}
+
+
+def _table_sql(name):
+    keys, values = ANALYTICS_TABLES[name][:2]
+    columns = [f"{key} TEXT NOT NULL" for key in keys] + [f"{value} INTEGER NOT NULL" for value in values]
+    return f'''
+    CREATE TABLE IF NOT EXISTS {name} (
+        {', '.join(columns)},
+        PRIMARY KEY ({', '.join(keys)})
+    ) WITHOUT ROWID
+    '''
+
+
+def _emotion_sql(row):
+    # ``row`` is new or old; a delete/update passes -1 to take the row back out
+    return f'''
+        INSERT INTO emotion_topic_counts (user_id, emotion, topic, occurrences)
+        VALUES (coalesce({row}.user_id, ''), coalesce({row}.emotion, ''), coalesce({row}.topic, ''), {{sign}})
+        ON CONFLICT (user_id, emotion, topic) DO UPDATE SET
+            occurrences = occurrences + excluded.occurrences;
+        INSERT INTO strategy_effectiveness (user_id, emotion, response_strategy, rated, score_sum)
+        SELECT coalesce({row}.user_id, ''), coalesce({row}.emotion, ''), coalesce({row}.response_strategy, ''),
+               {{sign}}, {{sign}} * {row}.effectiveness_score
+        WHERE {row}.effectiveness_score IS NOT NULL
+        ON CONFLICT (user_id, emotion, response_strategy) DO UPDATE SET
+            rated = rated + excluded.rated,
+            score_sum = score_sum + excluded.score_sum;
+    '''
+
+
+def _goal_sql(row):
+    return f'''
+        INSERT INTO goal_rollups (user_id, goal_type, status, goals, progress_sum)
+        VALUES (coalesce({row}.user_id, ''), coalesce({row}.goal_type, ''), coalesce({row}.status, ''),
+                {{sign}}, {{sign}} * coalesce({row}.progress, 0))
+        ON CONFLICT (user_id, goal_type, status) DO UPDATE SET
+            goals = goals + excluded.goals,
+            progress_sum = progress_sum + excluded.progress_sum;
+    '''
+
+
+_CLEANUP = {
+    "emotional_context": '''
+        DELETE FROM emotion_topic_counts WHERE occurrences = 0;
+        DELETE FROM strategy_effectiveness WHERE rated = 0;
+    ''',
+    "goals": '''
+        DELETE FROM goal_rollups WHERE goals = 0;
+    ''',
+}
+
+
+def _triggers(table, row_sql, columns):
+    add, remove = row_sql('new').format(sign=1), row_sql('old').format(sign=-1)
+    return (
+        f'''
+        CREATE TRIGGER IF NOT EXISTS {table}_analytics_insert AFTER INSERT ON {table} BEGIN
+            {add}
+        END
+        ''',
+        f'''
+        CREATE TRIGGER IF NOT EXISTS {table}_analytics_delete AFTER DELETE ON {table} BEGIN
+            {remove}
+            {_CLEANUP[table]}
+        END
+        ''',
+        f'''
+        CREATE TRIGGER IF NOT EXISTS {table}_analytics_update AFTER UPDATE OF {columns} ON {table} BEGIN
+            {remove}
+            {add}
+            {_CLEANUP[table]}
+        END
+        ''',
+    )
+
+
+ANALYTICS_SCHEMA = tuple(_table_sql(name) for name in ANALYTICS_TABLES) + _triggers(
+    "emotional_context", _emotion_sql, "user_id, emotion, topic, response_strategy, effectiveness_score",
+) + _triggers(
+    "goals", _goal_sql, "user_id, goal_type, status, progress",
+)
+
+
+def rebuild(conn):
+    """Recompute every aggregate from the raw rows (inside the caller's transaction)"""
+    for name, (keys, values, source) in ANALYTICS_TABLES.items():
+        conn.execute(f"DELETE FROM {name}")
+        conn.execute(f"INSERT INTO {name} ({', '.join(keys + values)}) {source}")
+
+
+def ensure_analytics(conn):
+    """Create the aggregate tables and triggers and fill them from existing rows"""
+    for statement in ANALYTICS_SCHEMA:
+        conn.execute(statement)
+    rebuild(conn)
+
+
+def check(conn):
+    """Differences between the stored aggregates and a rebuild from raw rows"""
+    problems = []
+    for name, (keys, values, source) in ANALYTICS_TABLES.items():
+        width = len(keys)
+        expected = {row[:width]: row[width:] for row in conn.execute(source)}
+        stored = {row[:width]: row[width:] for row in conn.execute(
+            f"SELECT {', '.join(keys + values)} FROM {name}")}
+        for key in expected.keys() | stored.keys():
+            if expected.get(key) != stored.get(key):
+                problems.append(f"{name} {key}: stored {stored.get(key)}, expected {expected.get(key)}")
+    return problems
+
+
+def strategy_means(conn, user_id, emotion):
+    """Rated response strategies for one user and emotion, best running mean first"""
+    rows = conn.execute('''
+        SELECT response_strategy, rated, score_sum FROM strategy_effectiveness
+        WHERE user_id = ? AND emotion = ?
+    ''', (user_id or '', emotion or '')).fetchall()
+    means = [{"strategy": strategy, "mean_effectiveness": round(total / rated, 2), "rated": rated}
+             for strategy, rated, total in rows if rated]
+    return sorted(means, key=lambda item: (item["mean_effectiveness"], item["rated"]), reverse=True)
+
+
+def emotion_profile(conn, user_id, topic=None):
+    """Occurrences per emotion for a user, optionally for one topic, most frequent first"""
+    sql = "SELECT emotion, sum(occurrences) FROM emotion_topic_counts WHERE user_id = ?"
+    params = [user_id or '']
+    if topic is not None:
+        sql += " AND topic = ?"
+        params.append(topic)
+    rows = conn.execute(sql + " GROUP BY emotion ORDER BY 2 DESC", params).fetchall()
+    return [{"emotion": emotion, "occurrences": count} for emotion, count in rows]
+
+
+def goal_summary(conn, user_id):
+    """Goal counts and mean progress per status, and per goal type for active goals"""
+    by_status, active_by_type = {}, {}
+    for goal_type, status, goals, progress_sum in conn.execute(
+            "SELECT goal_type, status, goals, progress_sum FROM goal_rollups WHERE user_id = ?", (user_id or '',)):
+        totals = by_status.setdefault(status, [0, 0])
+        totals[0] += goals
+        totals[1] += progress_sum
+        if status == 'active':
+            active_by_type[goal_type] = {"goals": goals, "mean_progress": round(progress_sum / goals, 1)}
+    return {
+        "by_status": {status: {"goals": goals, "mean_progress": round(total / goals, 1)}
+                      for status, (goals, total) in by_status.items() if goals},
+        "active_by_type": active_by_type,
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Check the analytics aggregates against the raw rows")
+    parser.add_argument('database', nargs='?', default="prism_data.db")
+    parser.add_argument('--repair', action='store_true', help="rebuild the aggregates if they differ")
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.database)
+    found = check(conn)
+    for problem in found[:50]:
+        print(problem)
+    print(f"{len(found)} difference(s)")
+    if found and args.repair:
+        with conn:
+            rebuild(conn)
+        print(f"rebuilt; {len(check(conn))} difference(s) remain")
+    sys.exit(1 if found and not args.repair else 0)
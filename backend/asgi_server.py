@@ -0,0 +1,181 @@
+"""ASGI variant of the PRISM tool server.
+
+Serves the same ``/api/<tool>``, ``/api/export/<kind>``, ``/health``, ``/stats`` and ``/metrics`` endpoints
+as prism_server.py with identical request/response shapes, but never blocks the
+event loop: every handler runs on a bounded thread pool. Run it under a production
+ASGI server, e.g.
+
+    uvicorn asgi_server:app --host 0.0.0.0 --port 8000 --workers 4
+
+(install ``uvicorn[standard]`` for the httptools/uvloop fast paths). Metrics are
+kept per worker process, so with several workers each scrape sees one of them.
+"""
+import asyncio
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from urllib.parse import parse_qs
+
+import memory_content
+import metrics
+import prism_tools
+from dispatch import verify_webhook_secret
+from prism_tools import init_database
+
+# Handler threads per worker process; in-flight requests beyond this wait on the
+# semaphore instead of piling up in the executor's unbounded queue
+EXECUTOR_THREADS = int(os.environ.get('PRISM_EXECUTOR_THREADS', prism_tools.DB_POOL_SIZE))
+MAX_IN_FLIGHT = int(os.environ.get('PRISM_MAX_IN_FLIGHT', EXECUTOR_THREADS * 4))
+
+executor = ThreadPoolExecutor(max_workers=EXECUTOR_THREADS, thread_name_prefix="prism-handler")
+_in_flight = None
+
+
+def _json_default(value):
+    # Match Flask's jsonify, which renders datetimes as HTTP dates
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+async def _send(send, body, status=200, content_type=b'application/json'):
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [
+            (b'content-type', content_type),
+            (b'content-length', str(len(body)).encode()),
+        ],
+    })
+    await send({'type': 'http.response.body', 'body': body})
+    return len(body)
+
+
+async def _send_json(send, payload, status=200):
+    # memory_content.dumps writes retrieved memory content through unparsed
+    return await _send(send, memory_content.dumps(payload, default=_json_default).encode(), status)
+
+
+async def _send_stream(send, chunks, content_type=b'application/x-ndjson'):
+    """Send each str chunk as it is produced; chunks are pulled on the executor"""
+    await send({
+        'type': 'http.response.start',
+        'status': 200,
+        'headers': [(b'content-type', content_type)],
+    })
+    sent = 0
+    try:
+        while True:
+            chunk = await _run_tool(_next_chunk, chunks)
+            if chunk is None:
+                break
+            body = chunk.encode()
+            await send({'type': 'http.response.body', 'body': body, 'more_body': True})
+            sent += len(body)
+    finally:
+        chunks.close()
+    await send({'type': 'http.response.body', 'body': b''})
+    return sent
+
+
+def _next_chunk(chunks):
+    return next(chunks, None)
+
+
+async def _read_body(receive):
+    chunks = []
+    while True:
+        message = await receive()
+        chunks.append(message.get('body', b''))
+        if not message.get('more_body'):
+            return b''.join(chunks)
+
+
+def _decode(body):
+    try:
+        return json.loads(body)
+    except ValueError:
+        return None
+
+
+async def _run_tool(handler, data):
+    global _in_flight
+    if _in_flight is None:
+        _in_flight = asyncio.Semaphore(MAX_IN_FLIGHT)
+    async with _in_flight:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, handler, data)
+
+
+async def _lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await asyncio.get_running_loop().run_in_executor(executor, init_database)
+            prism_tools.start_retention()
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            prism_tools.stop_retention()
+            executor.shutdown(wait=True)
+            for db in prism_tools.all_databases():
+                db.close()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def _route(path, method, query, headers, receive, send):
+    """Serve one request; returns (endpoint label, status, request bytes, response bytes)"""
+    if path == '/health':
+        if method != 'GET':
+            return path, 405, 0, await _send_json(send, {"error": "Method not allowed"}, 405)
+        return path, 200, 0, await _send_json(send, {"status": "healthy", "timestamp": datetime.now()})
+
+    if path == '/stats':
+        return path, 200, 0, await _send_json(send, prism_tools.stats())
+
+    if path == '/metrics':
+        body = metrics.registry.render().encode()
+        return path, 200, 0, await _send(send, body, content_type=metrics.CONTENT_TYPE.encode())
+
+    if path.startswith('/api/export/'):
+        endpoint = '/api/export/<kind>'
+        if method != 'GET':
+            return endpoint, 405, 0, await _send_json(send, {"error": "Method not allowed"}, 405)
+        if not verify_webhook_secret(None, headers):
+            return endpoint, 401, 0, await _send_json(send, {"error": "Unauthorized"}, 401)
+        user_id = parse_qs(query.decode()).get('user_id', [None])[0]
+        try:
+            chunks = await _run_tool(lambda kind: prism_tools.export(kind, user_id), path[len('/api/export/'):])
+        except ValueError as e:
+            return endpoint, 400, 0, await _send_json(send, {"error": str(e)}, 400)
+        return endpoint, 200, 0, await _send_stream(send, chunks)
+
+    if path.startswith('/api/'):
+        handler = prism_tools.ENDPOINTS.get(path[len('/api/'):])
+        if handler is not None:
+            if method != 'POST':
+                return path, 405, 0, await _send_json(send, {"error": "Method not allowed"}, 405)
+            body = await _read_body(receive)
+            payload, status = await _run_tool(handler, _decode(body))
+            return path, status, len(body), await _send_json(send, payload, status)
+
+    return 'not_found', 404, 0, await _send_json(send, {"error": "Not found"}, 404)
+
+
+async def app(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        await _lifespan(receive, send)
+        return
+
+    started = time.perf_counter()
+    # Title-cased like Flask's request.headers, e.g. X-Vapi-Secret
+    headers = {name.decode('latin-1').title(): value.decode('latin-1') for name, value in scope.get('headers', ())}
+    endpoint, status, request_bytes, response_bytes = await _route(scope['path'], scope['method'],
+                                                                   scope.get('query_string', b''), headers,
+                                                                   receive, send)
+    metrics.observe_request(endpoint, status, started, request_bytes, response_bytes)
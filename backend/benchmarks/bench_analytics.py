@@ -0,0 +1,128 @@
+"""Insight lookups from the analytics aggregates vs scanning a user's history.
+
+Loads N emotional_context rows (default 200k) and N/100 goals for one user, then
+times what analyze_current, suggest_next_step and get_growth_insights need:
+
+* naive: GROUP BY over the user's raw rows, as the actions would without aggregates
+* aggregates: analytics.emotion_profile / strategy_means / goal_summary
+
+It also times bulk inserts with and without the maintenance triggers, to show what
+keeping the aggregates current costs each write. Finally analytics.check must
+report no differences.
+
+Usage: python benchmarks/bench_analytics.py [rows]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+import analytics  # noqa: E402
+from benchmarks.datagen import EMOTIONS, GOAL_TYPES, STRATEGIES, TOPICS, sentence  # noqa: E402
+from benchmarks.load_test import percentile  # noqa: E402
+from db import connect  # noqa: E402
+from migrations import migrate  # noqa: E402
+
+USER = "+15550000001"
+START = datetime(2024, 1, 1)
+
+
+def emotional_rows(rng, total):
+    return [(USER, rng.choice(EMOTIONS), rng.choice(TOPICS), rng.choice(STRATEGIES),
+             START + timedelta(seconds=i), rng.randint(1, 10) if rng.random() < 0.7 else None)
+            for i in range(total)]
+
+
+def goal_rows(rng, total):
+    return [(USER, rng.choice(GOAL_TYPES), sentence(rng, 4), rng.randint(0, 100),
+             rng.choice(("active", "active", "completed", "paused")), START + timedelta(hours=i))
+            for i in range(total)]
+
+
+def load(conn, emotions, goals):
+    started = time.perf_counter()
+    with conn:
+        conn.executemany('''
+            INSERT INTO emotional_context (user_id, emotion, topic, response_strategy, timestamp, effectiveness_score)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', emotions)
+        conn.executemany('''
+            INSERT INTO goals (user_id, goal_type, title, progress, status, created_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', goals)
+    return time.perf_counter() - started
+
+
+def naive(conn, emotion, topic):
+    profile = conn.execute('''
+        SELECT emotion, count(*) FROM emotional_context WHERE user_id = ? GROUP BY emotion ORDER BY 2 DESC
+    ''', (USER,)).fetchall()
+    on_topic = conn.execute('''
+        SELECT emotion, count(*) FROM emotional_context WHERE user_id = ? AND topic = ? GROUP BY emotion
+    ''', (USER, topic)).fetchall()
+    strategies = conn.execute('''
+        SELECT response_strategy, avg(effectiveness_score), count(effectiveness_score) FROM emotional_context
+        WHERE user_id = ? AND emotion = ? AND effectiveness_score IS NOT NULL GROUP BY response_strategy
+    ''', (USER, emotion)).fetchall()
+    goals = conn.execute('''
+        SELECT goal_type, status, count(*), avg(progress) FROM goals WHERE user_id = ? GROUP BY 1, 2
+    ''', (USER,)).fetchall()
+    return profile, on_topic, strategies, goals
+
+
+def aggregated(conn, emotion, topic):
+    return (analytics.emotion_profile(conn, USER), analytics.emotion_profile(conn, USER, topic),
+            analytics.strategy_means(conn, USER, emotion), analytics.goal_summary(conn, USER))
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return f"p50 {percentile(samples, 50) * 1000:8.3f} ms  p99 {percentile(samples, 99) * 1000:8.3f} ms"
+
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    rng = random.Random(5)
+    emotions, goals = emotional_rows(rng, total), goal_rows(rng, max(total // 100, 1))
+    directory = tempfile.mkdtemp(prefix="prism_analytics_")
+
+    plain = connect(os.path.join(directory, "plain.db"))
+    migrate(plain)
+    for (name,) in plain.execute("SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE '%_analytics_%'"
+                                 ).fetchall():
+        plain.execute(f"DROP TRIGGER {name}")
+    without = load(plain, emotions, goals)
+    plain.close()
+
+    conn = connect(os.path.join(directory, "prism_data.db"))
+    migrate(conn)
+    with_triggers = load(conn, emotions, goals)
+    conn.execute("ANALYZE")
+    rows = len(emotions) + len(goals)
+    print(f"{len(emotions)} emotional rows and {len(goals)} goals for one user")
+    print(f"bulk insert without triggers: {without / rows * 1e6:6.2f} us/row")
+    print(f"bulk insert with triggers:    {with_triggers / rows * 1e6:6.2f} us/row "
+          f"({with_triggers / without:.2f}x)")
+
+    print(f"naive scans:  {timed(lambda: naive(conn, 'anxious', 'work'), repeat=5)}")
+    print(f"aggregates:   {timed(lambda: aggregated(conn, 'anxious', 'work'), repeat=500)}")
+
+    best = {row[0]: round(row[1], 2) for row in naive(conn, 'anxious', 'work')[2]}
+    agree = all(best[item["strategy"]] == item["mean_effectiveness"]
+                for item in analytics.strategy_means(conn, USER, 'anxious'))
+    print(f"strategy means match the naive averages: {agree}")
+    problems = analytics.check(conn)
+    print(f"consistency check: {len(problems)} difference(s)")
+
+
+if __name__ == '__main__':
+    main()
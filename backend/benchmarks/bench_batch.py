@@ -0,0 +1,53 @@
+"""One assistant turn as separate webhook calls vs a single /api/batch call.
+
+Usage: python benchmarks/bench_batch.py [turns]
+"""
+import os
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+_scratch = tempfile.mkdtemp(prefix="prism_bench_")
+os.environ.setdefault('PRISM_DATABASE_PATH', os.path.join(_scratch, "prism_data.db"))
+
+import prism_server  # noqa: E402
+from benchmarks.payloads import TURN, tool_payload  # noqa: E402
+
+
+def batch_payload(user):
+    return {
+        "call": {"customer": {"phoneNumber": user}},
+        "message": {"functionCalls": [{"name": tool, "parameters": params} for tool, params in TURN]},
+    }
+
+
+def main():
+    turns = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    prism_server.init_database()
+    client = prism_server.app.test_client()
+
+    started = time.perf_counter()
+    for turn in range(turns):
+        user = f"+1555{turn % 50:07d}"
+        for tool, params in TURN:
+            response = client.post(f"/api/{tool}", json=tool_payload(tool, params, user))
+            assert response.status_code == 200
+    separate_ms = (time.perf_counter() - started) / turns * 1000
+
+    started = time.perf_counter()
+    for turn in range(turns):
+        response = client.post("/api/batch", json=batch_payload(f"+1555{turn % 50:07d}"))
+        assert response.status_code == 200
+        assert all(item["status"] == 200 for item in response.get_json()["results"])
+    batch_ms = (time.perf_counter() - started) / turns * 1000
+
+    print(f"{len(TURN)} tool calls per turn, {turns} turns")
+    print(f"separate webhooks: {separate_ms:7.2f} ms/turn ({len(TURN)} requests)")
+    print(f"/api/batch:        {batch_ms:7.2f} ms/turn (1 request, 1 transaction)  ({separate_ms / batch_ms:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+"""VapiMCPIntegration startup time with a cold vs warm on-disk tool catalog cache.
+
+The stand-in server answers /tools after ``catalog_delay_ms`` to model a slow or
+distant MCP server; a warm start should not wait for it.
+
+Usage: python benchmarks/bench_catalog_startup.py [catalog_delay_ms] [runs]
+"""
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(os.path.dirname(BENCH_DIR))
+sys.path.insert(0, REPO_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+import mcp_stub_server  # noqa: E402
+from main import VapiMCPIntegration  # noqa: E402
+
+
+async def startup_ms(base_url, cache_path):
+    started = time.perf_counter()
+    integration = VapiMCPIntegration({"server": {"url": base_url}, "client": {"catalog_cache_path": cache_path}})
+    await integration.initialize()
+    elapsed = (time.perf_counter() - started) * 1000
+    assert integration.get_tools_config()
+    await integration.close()
+    return elapsed
+
+
+async def main():
+    delay = float(sys.argv[1]) / 1000 if len(sys.argv) > 1 else 0.25
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    server, base_url = mcp_stub_server.start(catalog_delay=delay)
+    scratch = tempfile.mkdtemp(prefix="prism_catalog_")
+
+    cold, warm = [], []
+    for run in range(runs):
+        cache_path = os.path.join(scratch, f"tools-{run}.json")
+        cold.append(await startup_ms(base_url, cache_path))
+        warm.append(await startup_ms(base_url, cache_path))
+    server.shutdown()
+
+    print(f"/tools latency {delay * 1000:.0f} ms, {runs} runs")
+    print(f"cold cache: median {statistics.median(cold):8.2f} ms")
+    print(f"warm cache: median {statistics.median(warm):8.2f} ms  (revalidated in the background)")
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,82 @@
+"""Requests/sec through the Flask test client, connect-per-request vs pooled connections.
+
+Usage: python benchmarks/bench_connection_pool.py [requests]
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+_scratch = tempfile.mkdtemp(prefix="prism_bench_")
+os.environ.setdefault('PRISM_DATABASE_PATH', os.path.join(_scratch, "prism_data.db"))
+
+import prism_server  # noqa: E402
+import prism_tools  # noqa: E402
+from benchmarks.payloads import TURN, tool_payload  # noqa: E402
+
+
+class ConnectionPerRequest:
+    """The old behaviour: open and close a fresh connection for every request"""
+
+    def __init__(self, database_path):
+        self.database_path = database_path
+
+    @contextmanager
+    def read(self):
+        conn = sqlite3.connect(self.database_path)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def write(self, fn):
+        with self.read() as conn:
+            result = fn(conn)
+            conn.commit()
+        return result
+
+    def execute_write(self, sql, params=()):
+        with self.read() as conn:
+            row_id = conn.execute(sql, params).lastrowid
+            conn.commit()
+        return row_id
+
+    def enqueue_write(self, sql, params=()):
+        self.execute_write(sql, params)
+
+    def flush_writes(self):
+        pass
+
+
+def run(client, total):
+    started = time.perf_counter()
+    for i in range(total):
+        tool, parameters = TURN[i % len(TURN)]
+        response = client.post(f"/api/{tool}", json=tool_payload(tool, parameters))
+        assert response.status_code == 200, response.get_data(as_text=True)
+    return total / (time.perf_counter() - started)
+
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 3000
+    prism_server.init_database()
+    client = prism_server.app.test_client()
+    pooled = prism_tools.database
+
+    prism_tools.database = ConnectionPerRequest(prism_tools.DATABASE_PATH)
+    before = run(client, total)
+
+    prism_tools.database = pooled
+    after = run(client, total)
+
+    print(f"connect-per-request: {before:8.1f} req/s")
+    print(f"pooled connections:  {after:8.1f} req/s  ({after / before:.2f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,146 @@
+"""Memory content stored as JSON text vs dictionary-compressed (memory_content.py).
+
+One datagen database is copied and the copy converted to the zlib format. Both are
+VACUUMed, then compared on:
+
+* file size and the bytes held in memories.content
+* retrieve cost: fetching the ranked top 10 for a random user and type, and
+  turning the rows into the response body, either parsed and re-encoded
+  (json.loads + json.dumps, as retrieve did before) or passed through as RawJSON
+* FTS keyword search, whose index reads the text through the view on zlib files
+* inserts, which compress content and (zlib) decompress it again for the index
+
+Usage: python benchmarks/bench_content_format.py [--rows 200000] [--users 2000] [--reads 20000]
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+import memory_content  # noqa: E402
+from benchmarks import datagen  # noqa: E402
+from db import connect  # noqa: E402
+from ranking import rank_key, ranked_memories  # noqa: E402
+from search import search_memories  # noqa: E402
+
+
+def response(rows, content):
+    return {"result": {"memories": [
+        {"type": row[1], "content": content(row[2]), "timestamp": row[3], "emotion": row[4], "topic": row[5]}
+        for row in rows
+    ]}}
+
+
+READ_PATHS = {
+    "parse + re-encode": lambda rows: json.dumps(response(rows, memory_content.decode), default=str),
+    "passthrough": lambda rows: memory_content.dumps(response(rows, memory_content.raw_json), default=str),
+}
+
+
+def retrieve_costs(conn, users, reads, rounds=5, seed=3):
+    """µs per read to fetch the ranked rows, and to serialize them by each READ_PATHS entry
+
+    Each cost is the best of ``rounds`` passes over the same calls, with the paths
+    taking turns, so one-off stalls and drift do not favour whichever ran first.
+    """
+    rng = random.Random(seed)
+    calls = [(datagen.user_id(rng.randrange(users)), rng.choice(datagen.MEMORY_TYPES)) for _ in range(reads)]
+    best = dict.fromkeys(["fetch", *READ_PATHS], float("inf"))
+    for _ in range(rounds):
+        started = time.perf_counter()
+        fetched = [ranked_memories(conn, user, memory_type, limit=10) for user, memory_type in calls]
+        best["fetch"] = min(best["fetch"], time.perf_counter() - started)
+        for label, serialize in READ_PATHS.items():
+            started = time.perf_counter()
+            for rows in fetched:
+                serialize(rows)
+            best[label] = min(best[label], time.perf_counter() - started)
+    rows = sum(len(rows) for rows in fetched) / reads
+    return {label: seconds / reads * 1e6 for label, seconds in best.items()}, rows
+
+
+def inserts_per_second(conn, content_format, count=5000, seed=11):
+    rng = random.Random(seed)
+    started = time.perf_counter()
+    for _ in range(count):
+        now, topic = datetime.now(), rng.choice(datagen.TOPICS)
+        conn.execute('''
+            INSERT INTO memories (user_id, memory_type, content, timestamp, emotion, topic, importance, rank_key)
+            VALUES (?, ?, ?, ?, ?, ?, 1, ?)
+        ''', (datagen.user_id(rng.randrange(100)), "learning",
+              memory_content.encode({"note": datagen.sentence(rng), "topic": topic}, content_format),
+              now, "calm", topic, rank_key(1, now)))
+    elapsed = time.perf_counter() - started
+    conn.rollback()
+    return count / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=200000, help="rows across all tables (datagen)")
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--reads', type=int, default=20000)
+    args = parser.parse_args()
+
+    scratch = tempfile.mkdtemp(prefix="prism_content_")
+    paths = {"json": os.path.join(scratch, "json.db"), "zlib": os.path.join(scratch, "zlib.db")}
+    summary = datagen.generate(paths["json"], rows=args.rows, users=args.users)
+    print(f"generated {summary['rows']['memories']} memories for {args.users} users in {summary['seconds']}s")
+    shutil.copyfile(paths["json"], paths["zlib"])
+
+    conns = {}
+    for content_format, path in paths.items():
+        conn = conns[content_format] = connect(path)
+        started = time.perf_counter()
+        with conn:
+            converted = memory_content.convert(conn, content_format)
+        if converted:
+            print(f"converted {converted} memories to {content_format} in {time.perf_counter() - started:.1f}s")
+        conn.execute("VACUUM")
+
+    print(f"\n{'format':8s} {'file MB':>9s} {'content MB':>11s} {'bytes/memory':>13s}")
+    sizes = {}
+    for content_format, conn in conns.items():
+        content_bytes, memories = conn.execute("SELECT sum(length(content)), count(*) FROM memories").fetchone()
+        sizes[content_format] = os.path.getsize(paths[content_format])
+        print(f"{content_format:8s} {sizes[content_format] / 1e6:9.1f} {content_bytes / 1e6:11.1f} "
+              f"{content_bytes / memories:13.1f}")
+    print(f"zlib file is {sizes['zlib'] / sizes['json']:.0%} of json")
+
+    print(f"\nranked retrieve, {args.reads} reads, µs per read (best of 5)")
+    for content_format, conn in conns.items():
+        costs, rows = retrieve_costs(conn, args.users, args.reads)
+        serialized = "  ".join(f"{label} {costs[label]:6.1f}" for label in READ_PATHS)
+        print(f"  {content_format:5s} fetch {costs['fetch']:6.1f}  {serialized}  "
+              f"({rows:.1f} rows/read)")
+
+    rng = random.Random(5)
+    queries = [rng.choice(datagen.WORDS[:200]) for _ in range(args.reads // 10)]
+    print(f"\nFTS keyword search, {len(queries)} queries each")
+    for content_format, conn in conns.items():
+        started = time.perf_counter()
+        for n, query in enumerate(queries):
+            rows = search_memories(conn, datagen.user_id(n % 50), query, limit=10)
+            memory_content.dumps(response(rows, memory_content.raw_json), default=str)
+        rate = len(queries) / (time.perf_counter() - started)
+        print(f"  {content_format:5s} {rate:9.0f} searches/s  {1e6 / rate:7.1f} µs/search")
+
+    print("\ninserts with FTS triggers, in one transaction that is rolled back")
+    for content_format, conn in conns.items():
+        print(f"  {content_format:5s} {inserts_per_second(conn, content_format):9.0f} inserts/s")
+
+    for conn in conns.values():
+        conn.close()
+    shutil.rmtree(scratch)
+
+
+if __name__ == '__main__':
+    main()
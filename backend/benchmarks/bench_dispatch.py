@@ -0,0 +1,112 @@
+"""Per-request overhead of the dispatch pipeline (dispatch.py).
+
+Times, per payload:
+
+* schema validation alone: the checks compiled from the tool schema
+* full handler calls for cache-hit reads and buffered writes, where the pipeline
+  is a large share of the work
+* rejected calls (unknown action, bad value), which now return 400 before any
+  database work
+
+With ``--baseline`` pointing at an earlier prism_tools.py, its handlers are loaded
+alongside and timed on the same payloads for a side-by-side comparison, e.g.::
+
+    git show <rev>:backend/prism_tools.py > /tmp/prism_tools_baseline.py
+    python benchmarks/bench_dispatch.py --baseline /tmp/prism_tools_baseline.py
+
+Usage: python benchmarks/bench_dispatch.py [--calls 20000] [--baseline path]
+"""
+import argparse
+import importlib.util
+import logging
+import os
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+_scratch = tempfile.mkdtemp(prefix="prism_bench_")
+os.environ.setdefault('PRISM_DATABASE_PATH', os.path.join(_scratch, "prism_data.db"))
+os.environ.setdefault('PRISM_RETENTION_INTERVAL', '0')
+
+import prism_tools  # noqa: E402
+from benchmarks.load_test import percentile  # noqa: E402
+from benchmarks.payloads import tool_payload  # noqa: E402
+
+USER = "+15550000001"
+
+CASES = [
+    ("get_identity", "identity_tracker", {"action": "get_identity"}),
+    ("retrieve (cached)", "memory_manager", {"action": "retrieve", "memory_type": "learning"}),
+    ("emotional_history (cached)", "emotion_analyzer", {"action": "get_emotional_history"}),
+    ("get_goals", "goal_tracker", {"action": "get_goals"}),
+    ("log thought", "thought_logger", {"thought_type": "reasoning", "thought_content": "plan reply",
+                                       "context": {"topic": "work"}}),
+    ("unknown action", "goal_tracker", {"action": "archive_everything"}),
+    ("out of range", "memory_manager", {"action": "store", "memory_type": "learning",
+                                        "content": {"note": "x"}, "importance": 42}),
+]
+
+
+def load_baseline(path):
+    spec = importlib.util.spec_from_file_location("prism_tools_baseline", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def timed(fns, calls, block=500):
+    """p50 and p99 of each function, run in alternating blocks so drift hits all alike"""
+    samples = [[] for _ in fns]
+    for _ in range(0, calls, block):
+        for fn, taken in zip(fns, samples):
+            for _ in range(block):
+                started = time.perf_counter()
+                fn()
+                taken.append(time.perf_counter() - started)
+    return [(percentile(taken, 50) * 1e6, percentile(taken, 99) * 1e6) for taken in samples]
+
+
+def seed(module):
+    handlers = module.TOOLS
+    handlers["memory_manager"](tool_payload("memory_manager", {
+        "action": "store", "memory_type": "learning", "content": {"note": "likes hiking", "topic": "hobbies"}}, USER))
+    handlers["goal_tracker"](tool_payload("goal_tracker", {
+        "action": "set_goal", "goal_type": "learning", "goal_data": {"title": "Spanish"}}, USER))
+    for i in range(20):
+        handlers["identity_tracker"](tool_payload("identity_tracker", {
+            "action": "update_trait", "trait": f"trait_{i}", "adjustment": {"confidence": 0.6}}, USER))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--calls', type=int, default=20000)
+    parser.add_argument('--baseline', help="an earlier prism_tools.py to compare against")
+    args = parser.parse_args()
+
+    prism_tools.init_database()
+    seed(prism_tools)
+    baseline = load_baseline(args.baseline) if args.baseline else None
+
+    # The baseline logs a traceback for every call it fails
+    logging.getLogger("prism").setLevel(logging.CRITICAL)
+    print(f"{args.calls} calls per case, p50 / p99 in microseconds")
+    for label, tool, parameters in CASES:
+        data = tool_payload(tool, parameters, USER)
+        validate = prism_tools.TOOLS[tool].__wrapped__._check
+        handlers = [prism_tools.TOOLS[tool]] + ([baseline.TOOLS[tool]] if baseline is not None else [])
+        checked, = timed([lambda: validate(parameters, [])], args.calls)
+        results = timed([lambda handler=handler: handler(data) for handler in handlers], args.calls)
+        line = f"{label:28s} validate {checked[0]:6.1f} / {checked[1]:6.1f}"
+        for name, handler, (p50, p99) in zip(("handler", "baseline"), handlers, results):
+            line += f"   {name} {p50:7.1f} / {p99:7.1f} ({handler(data)[1]})"
+        print(line)
+
+    for database in prism_tools.all_databases():
+        database.close()
+
+
+if __name__ == '__main__':
+    main()
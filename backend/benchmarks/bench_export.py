@@ -0,0 +1,156 @@
+"""Peak memory of the NDJSON export as one user's row count grows (pagination.py).
+
+For each size, datagen fills a database whose rows all belong to one user. A fresh
+process then either
+
+* streams GET /api/export/memories through the Flask app, reading chunks as they
+  come (``stream``), or
+* builds the same rows as one list and serializes it in one go, the way the
+  unbounded list actions did (``list``)
+
+and reports its peak RSS above what it had after start-up (VmHWM, with SQLite's
+mmap off and its page cache capped at 1 MB). The streaming export should stay
+flat: the script exits with status 1 if its growth at the largest size is more
+than ``--max-growth-mb`` above that at the smallest. tests/test_pagination.py
+runs the same check on smaller sizes.
+
+Also times one page of keyset pagination at increasing depth against OFFSET.
+
+Usage: python benchmarks/bench_export.py [--rows 200000 2000000] [--max-growth-mb 8]
+"""
+import argparse
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from benchmarks import datagen  # noqa: E402
+
+USER = datagen.user_id(0)
+SECRET = "bench-export-secret"
+# Allowed peak RSS growth of the streaming export, largest size vs smallest
+MAX_GROWTH_MB = 8.0
+
+
+def peak_rss_mb():
+    # VmHWM rather than ru_maxrss, which after fork + exec still counts the
+    # parent's peak (here, datagen's)
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def child(mode):
+    import db
+    # Pages SQLite maps from the file count toward RSS, but they are page cache
+    # the kernel can drop, not memory the process holds
+    db.CONNECTION_PRAGMAS += ("PRAGMA mmap_size = 0",)
+    # A page cache that fills up as the file grows would read as export growth
+    db.CONNECTION_PRAGMAS += ("PRAGMA cache_size = -1000",)
+
+    import memory_content
+    import prism_server
+    import prism_tools
+    from pagination import MEMORIES_PAGE_SQL, memory_record
+
+    prism_tools.init_database()
+    client = prism_server.app.test_client()
+    client.get("/health")
+    baseline = peak_rss_mb()
+    started = time.perf_counter()
+    if mode == "stream":
+        response = client.get("/api/export/memories", query_string={"user_id": USER},
+                              headers={"X-Vapi-Secret": SECRET}, buffered=False)
+        size = lines = 0
+        for chunk in response.response:
+            size += len(chunk)
+            lines += chunk.count(b"\n") if isinstance(chunk, bytes) else chunk.count("\n")
+        response.close()
+    else:
+        records = []
+        with prism_tools.database.read() as conn:
+            for memory_type in datagen.MEMORY_TYPES:
+                rows = conn.execute(MEMORIES_PAGE_SQL, (USER, memory_type, -1)).fetchall()
+                records.extend(memory_record(row) for row in rows)
+        body = memory_content.dumps({"memories": records}, default=str)
+        size, lines = len(body), len(records)
+    print(json.dumps({"rows": lines, "mb": size / 1e6, "seconds": time.perf_counter() - started,
+                      "growth_mb": peak_rss_mb() - baseline}))
+    for database in prism_tools.all_databases():
+        database.close()
+
+
+def run_child(path, mode):
+    env = dict(os.environ, PRISM_DATABASE_PATH=path, PRISM_RETENTION_INTERVAL='0',
+               PRISM_WEBHOOK_SECRET=SECRET)
+    out = subprocess.run([sys.executable, os.path.abspath(__file__), '--child', mode],
+                         env=env, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def page_depths(path):
+    from db import connect
+    from pagination import MEMORIES_AFTER_SQL, MEMORIES_PAGE_SQL, memory_key
+
+    conn = connect(path)
+    total = conn.execute("SELECT count(*) FROM memories WHERE user_id = ? AND memory_type = ?",
+                         (USER, datagen.MEMORY_TYPES[0])).fetchone()[0]
+    offset_sql = MEMORIES_PAGE_SQL.replace("LIMIT ?", "LIMIT ? OFFSET ?")
+    print(f"\none page of 20 at depth, {total} memories of one type (ms)")
+    for depth in (0, total // 10, total // 2, total - 20):
+        rows = conn.execute(offset_sql, (USER, datagen.MEMORY_TYPES[0], 1, max(depth - 1, 0))).fetchall()
+        after = memory_key(rows[0])
+        timings = {}
+        for label, sql, params in (("keyset", MEMORIES_AFTER_SQL, (USER, datagen.MEMORY_TYPES[0], *after, 20)),
+                                   ("offset", offset_sql, (USER, datagen.MEMORY_TYPES[0], 20, depth))):
+            started = time.perf_counter()
+            for _ in range(5):
+                conn.execute(sql, params).fetchall()
+            timings[label] = (time.perf_counter() - started) / 5 * 1000
+        print(f"  depth {depth:8d}   keyset {timings['keyset']:7.3f}   offset {timings['offset']:8.3f}")
+    conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[200000, 2000000],
+                        help="datagen rows (all tables) per size; 60%% are memories")
+    parser.add_argument('--max-growth-mb', type=float, default=MAX_GROWTH_MB)
+    parser.add_argument('--child', choices=("stream", "list"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        return child(args.child)
+
+    scratch = tempfile.mkdtemp(prefix="prism_export_")
+    growth = []
+    path = None
+    print(f"{'memories':>9s} {'mode':7s} {'MB out':>8s} {'seconds':>8s} {'peak RSS growth MB':>19s}")
+    for rows in args.rows:
+        path = os.path.join(scratch, f"export_{rows}.db")
+        datagen.generate(path, rows=rows, users=1)
+        for mode in ("stream", "list"):
+            result = run_child(path, mode)
+            print(f"{result['rows']:9d} {mode:7s} {result['mb']:8.1f} {result['seconds']:8.2f} "
+                  f"{result['growth_mb']:19.1f}")
+            if mode == "stream":
+                growth.append(result["growth_mb"])
+
+    page_depths(path)
+    shutil.rmtree(scratch)
+
+    spread = growth[-1] - growth[0]
+    print(f"\nstreaming export RSS growth, largest vs smallest: {spread:+.1f} MB (limit {args.max_growth_mb} MB)")
+    sys.exit(1 if spread > args.max_growth_mb else 0)
+
+
+if __name__ == '__main__':
+    main()
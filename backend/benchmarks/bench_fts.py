@@ -0,0 +1,90 @@
+"""LIKE scan vs FTS5 bm25 search for memory_manager 'retrieve' queries.
+
+Loads N synthetic memories (default 1M) spread over many users into a scratch
+database, then times the old LIKE query against search.search_memories.
+
+Usage: python benchmarks/bench_fts.py [memories] [users]
+"""
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from benchmarks.datagen import CUM_WEIGHTS, TOPICS, WORDS  # noqa: E402
+from db import connect  # noqa: E402
+from migrations import migrate  # noqa: E402
+from search import search_memories  # noqa: E402
+
+
+LIKE_SQL = '''
+    SELECT memory_type, content, timestamp, emotion, topic
+    FROM memories
+    WHERE user_id = ? AND (content LIKE ? OR topic LIKE ?)
+    ORDER BY timestamp DESC LIMIT 10
+'''
+
+
+def load(conn, total, users):
+    rng = random.Random(7)
+    start = datetime(2024, 1, 1)
+    batch = []
+    for i in range(total):
+        topic = rng.choice(TOPICS)
+        content = {"note": " ".join(rng.choices(WORDS, cum_weights=CUM_WEIGHTS, k=12)), "topic": topic}
+        batch.append((
+            f"+1555{rng.randrange(users):07d}", "learning", json.dumps(content),
+            start + timedelta(seconds=i), "", topic,
+        ))
+        if len(batch) == 10000:
+            conn.executemany('''
+                INSERT INTO memories (user_id, memory_type, content, timestamp, emotion, topic)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', batch)
+            batch.clear()
+    if batch:
+        conn.executemany('''
+            INSERT INTO memories (user_id, memory_type, content, timestamp, emotion, topic)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', batch)
+    conn.commit()
+
+
+def timed(fn, queries):
+    started = time.perf_counter()
+    for user_id, word in queries:
+        fn(user_id, word)
+    return (time.perf_counter() - started) / len(queries) * 1000
+
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    users = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    path = os.path.join(tempfile.mkdtemp(prefix="prism_fts_"), "prism_data.db")
+    conn = connect(path)
+    migrate(conn)
+
+    started = time.perf_counter()
+    load(conn, total, users)
+    print(f"loaded {total} memories for {users} users in {time.perf_counter() - started:.1f}s")
+
+    rng = random.Random(11)
+    queries = [(f"+1555{rng.randrange(users):07d}", rng.choice(WORDS)) for _ in range(200)]
+
+    like_ms = timed(
+        lambda user_id, word: conn.execute(LIKE_SQL, (user_id, f'%{word}%', f'%{word}%')).fetchall(),
+        queries,
+    )
+    fts_ms = timed(lambda user_id, word: search_memories(conn, user_id, word), queries)
+
+    print(f"LIKE scan:  {like_ms:8.3f} ms/query")
+    print(f"FTS5 bm25:  {fts_ms:8.3f} ms/query  ({like_ms / fts_ms:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+"""identity_tracker get_identity with and without the versioned identity cache.
+
+Usage: python benchmarks/bench_identity_cache.py [calls] [traits]
+"""
+import os
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+_scratch = tempfile.mkdtemp(prefix="prism_bench_")
+os.environ.setdefault('PRISM_DATABASE_PATH', os.path.join(_scratch, "prism_data.db"))
+
+import prism_tools  # noqa: E402
+from benchmarks.payloads import tool_payload  # noqa: E402
+
+
+def main():
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    traits = int(sys.argv[2]) if len(sys.argv) > 2 else 40
+    prism_tools.init_database()
+    for i in range(traits):
+        prism_tools.identity_tracker(tool_payload("identity_tracker", {
+            "action": "update_trait", "trait": f"trait_{i}",
+            "adjustment": {"direction": "up", "confidence": 0.6, "note": "x" * 80},
+        }))
+
+    get_identity = tool_payload("identity_tracker", {"action": "get_identity"})
+
+    started = time.perf_counter()
+    for _ in range(calls):
+        with prism_tools.database.read() as conn:
+            {"identity": prism_tools._load_identity(conn)}
+    uncached = calls / (time.perf_counter() - started)
+
+    started = time.perf_counter()
+    for _ in range(calls):
+        prism_tools.identity_tracker(get_identity)
+    cached = calls / (time.perf_counter() - started)
+
+    print(f"uncached table read: {uncached:10.1f} calls/s")
+    print(f"versioned cache:     {cached:10.1f} calls/s  ({cached / uncached:.1f}x)")
+    print(f"cache stats: {prism_tools.identity_cache.stats()}")
+    prism_tools.database.close()
+
+
+if __name__ == '__main__':
+    main()
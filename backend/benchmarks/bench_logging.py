@@ -0,0 +1,89 @@
+"""memory_manager handler cost: old print debugging vs structured logging off / on.
+
+Uses a Vapi-sized webhook body (the call artifact carries the running transcript) so
+the cost of serializing it is visible. "debug on" enables dumps for the benchmark
+user only; records are written to a scratch file by the queue listener thread.
+
+Usage: python benchmarks/bench_logging.py [calls] [transcript_messages]
+"""
+import contextlib
+import json
+import os
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+_scratch = tempfile.mkdtemp(prefix="prism_bench_")
+os.environ.setdefault('PRISM_DATABASE_PATH', os.path.join(_scratch, "prism_data.db"))
+
+import prism_logging  # noqa: E402
+
+prism_logging.configure(stream=open(os.path.join(_scratch, "prism.log"), "w"))
+
+import prism_tools  # noqa: E402
+from benchmarks.payloads import tool_payload  # noqa: E402
+
+USER = "+15550100"
+
+
+def print_debugging(data):
+    # What memory_manager used to do on every call
+    print("=== MEMORY MANAGER DEBUG ===")
+    print(f"Request data: {json.dumps(data, indent=2)}")
+    function_call = data.get('message', {}).get('functionCall', {})
+    print(f"User ID: {prism_tools.get_user_id_from_call(data)}")
+    print(f"Function call: {function_call}")
+    print(f"Parameters: {function_call.get('parameters', {})}")
+    payload, status = prism_tools.memory_manager(data)
+    print(f"Result: {payload.get('result')}")
+    return payload, status
+
+
+def timed(handler, data, calls):
+    started = time.perf_counter()
+    for _ in range(calls):
+        handler(data)
+    return (time.perf_counter() - started) / calls * 1e6
+
+
+def main():
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    messages = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    prism_tools.init_database()
+    for i in range(20):
+        prism_tools.memory_manager(tool_payload("memory_manager", {
+            "action": "store", "memory_type": "learning",
+            "content": {"note": f"likes hiking trail {i}", "topic": "hobbies"},
+        }, USER))
+
+    data = tool_payload("memory_manager", {"action": "retrieve", "memory_type": "learning"}, USER)
+    data["call"]["id"] = "call-bench"
+    data["message"]["artifact"] = {"messages": [
+        {"role": "user" if i % 2 else "assistant", "message": f"turn {i} " + "words " * 30, "time": i}
+        for i in range(messages)
+    ]}
+    print(f"webhook body {len(json.dumps(data)) / 1024:.0f} KB, {calls} calls")
+
+    with open(os.path.join(_scratch, "stdout.log"), "w") as sink, contextlib.redirect_stdout(sink):
+        printed = timed(print_debugging, data, calls)
+    off = timed(prism_tools.memory_manager, data, calls)
+
+    prism_logging.set_debug(users=[USER])
+    started = time.perf_counter()
+    on = timed(prism_tools.memory_manager, data, calls)
+    prism_logging.shutdown()
+    drained = (time.perf_counter() - started) / calls * 1e6
+    prism_logging.set_debug(users=[])
+
+    print(f"print debugging:  {printed:8.1f} us/call")
+    print(f"logging off:      {off:8.1f} us/call  ({printed / off:.1f}x faster)")
+    print(f"debug on (user):  {on:8.1f} us/call in the handler, {drained:.1f} us/call including "
+          f"the listener draining the queue")
+    prism_tools.database.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""MCPClient calls/sec against a local stand-in MCP server at several concurrency levels.
+
+Compares the old transport (a blocking request with a fresh connection per call,
+which stalls the event loop) with the pooled aiohttp session.
+
+Usage: python benchmarks/bench_mcp_client.py [calls] [delay_ms]
+"""
+import asyncio
+import json
+import os
+import sys
+import time
+import urllib.request
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(os.path.dirname(BENCH_DIR))
+sys.path.insert(0, REPO_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+import mcp_stub_server  # noqa: E402
+from main import MCPClient  # noqa: E402
+
+PARAMS = {"action": "retrieve", "memory_type": "learning"}
+
+
+async def blocking_call(base_url):
+    # What the old client did: requests.post with no session inside a coroutine
+    request = urllib.request.Request(
+        f"{base_url}/execute/memory_manager",
+        data=json.dumps(PARAMS).encode(),
+        headers={"Content-Type": "application/json"},
+    )
+    with urllib.request.urlopen(request) as response:
+        return json.loads(response.read())
+
+
+async def drive(call, calls, concurrency):
+    queue = iter(range(calls))
+
+    async def worker():
+        for _ in queue:
+            await call()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return calls / (time.perf_counter() - started)
+
+
+async def main():
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    delay = float(sys.argv[2]) / 1000 if len(sys.argv) > 2 else 2.0 / 1000
+    server, base_url = mcp_stub_server.start(delay=delay)
+
+    print(f"stub delay {delay * 1000:.1f} ms, {calls} calls per run")
+    print(f"{'concurrency':>11} {'blocking':>12} {'pooled':>12}")
+    for concurrency in (1, 4, 16, 64):
+        async with MCPClient(base_url, max_concurrency=concurrency, max_connections=concurrency) as client:
+            await client.connect()
+            blocking = await drive(lambda: blocking_call(base_url), calls, concurrency)
+            pooled = await drive(lambda: client.execute_tool("memory_manager", PARAMS), calls, concurrency)
+        print(f"{concurrency:>11} {blocking:>10.0f}/s {pooled:>10.0f}/s")
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,113 @@
+"""Vapi tool provisioning against a local stand-in (vapi_stub_server.py).
+
+Scenarios, each reporting wall time, requests by method and the tools that end
+up on the stub:
+
+* the old script (POST every tool, PATCH the assistant), run twice
+* a first deploy, sequential and concurrent
+* a re-deploy with nothing changed, which should send nothing
+* one changed definition, then one removed tool
+* a deploy with the manifest lost, which adopts the existing tools
+* a first deploy with injected 503s and 429s, re-run until it converges
+
+tests/test_provisioning.py asserts the outcomes; this script only times them.
+
+Usage: python benchmarks/bench_provisioning.py [--delay-ms 50] [--concurrency 5]
+"""
+import argparse
+import copy
+import os
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+import requests  # noqa: E402
+
+import vapi_tool_creation as provisioning  # noqa: E402
+from benchmarks import vapi_stub_server  # noqa: E402
+from tool_schemas import TOOL_DEFINITIONS  # noqa: E402
+
+ASSISTANT = "assistant-under-test"
+
+
+def old_script(base_url):
+    # What vapi_tool_creation.py did on every import before it became diff-based
+    tool_ids = [requests.post(f"{base_url}/tool", json=tool).json()["id"] for tool in TOOL_DEFINITIONS]
+    requests.patch(f"{base_url}/assistants/{ASSISTANT}", json={"toolIds": tool_ids})
+
+
+def report(label, server, started):
+    counts = ", ".join(f"{method} {count}" for method, count in sorted(server.requests.items())) or "none"
+    print(f"{label:34s} {(time.perf_counter() - started) * 1000:8.1f} ms  requests: {counts:38s} "
+          f"tools on stub: {len(server.tools)}")
+    server.reset_counts()
+
+
+def deploy(server, base_url, manifest, concurrency, definitions=TOOL_DEFINITIONS, **client):
+    vapi = provisioning.VapiClient(base_url=base_url, api_key="test", backoff=0.01, **client)
+    return provisioning.deploy(vapi, definitions, manifest_path=manifest, assistant_id=ASSISTANT,
+                               concurrency=concurrency, log=lambda message: None)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--delay-ms', type=float, default=50.0, help="stub latency per request")
+    parser.add_argument('--concurrency', type=int, default=5)
+    args = parser.parse_args()
+    delay = args.delay_ms / 1000
+    scratch = tempfile.mkdtemp(prefix="prism_provisioning_")
+    manifest = os.path.join(scratch, "vapi_manifest.json")
+
+    server, base_url = vapi_stub_server.start(delay=delay)
+    started = time.perf_counter()
+    old_script(base_url)
+    old_script(base_url)
+    report("old script, run twice", server, started)
+
+    for concurrency in (1, args.concurrency):
+        server, base_url = vapi_stub_server.start(delay=delay)
+        path = os.path.join(scratch, f"first_{concurrency}.json")
+        started = time.perf_counter()
+        deploy(server, base_url, path, concurrency)
+        report(f"first deploy, concurrency {concurrency}", server, started)
+
+    os.replace(path, manifest)
+    started = time.perf_counter()
+    deploy(server, base_url, manifest, args.concurrency)
+    report("re-deploy, nothing changed", server, started)
+
+    changed = copy.deepcopy(TOOL_DEFINITIONS)
+    changed[2]["function"]["description"] += " (revised)"
+    started = time.perf_counter()
+    deploy(server, base_url, manifest, args.concurrency, changed)
+    report("one definition changed", server, started)
+
+    started = time.perf_counter()
+    deploy(server, base_url, manifest, args.concurrency, changed[:-1])
+    report("one tool removed", server, started)
+
+    os.remove(manifest)
+    started = time.perf_counter()
+    deploy(server, base_url, manifest, args.concurrency, changed[:-1])
+    report("manifest lost, tools adopted", server, started)
+
+    server, base_url = vapi_stub_server.start(delay=delay, error_rate=0.3, rate_limit_rate=0.1)
+    path = os.path.join(scratch, "faulty.json")
+    started = time.perf_counter()
+    for runs in range(1, 6):
+        try:
+            deploy(server, base_url, path, args.concurrency)
+            break
+        except provisioning.ProvisioningError:
+            continue
+    report(f"30% 503 + 10% 429, {runs} run(s)", server, started)
+    assistant = server.assistants.get(ASSISTANT, {})
+    print(f"assistant has {len(assistant.get('toolIds', []))} tool ids, "
+          f"all on the stub: {set(assistant.get('toolIds', [])) <= set(server.tools)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+"""Ranked recall latency and quality for a user with a very long history.
+
+Loads N memories (default 500k) of one type for a single user, with skewed
+importance and some read counts, then compares:
+
+* newest-first recall (MEMORIES_PAGE_SQL, the old retrieve)
+* ranking.ranked_memories, one range scan of idx_memories_user_type_rank
+* exact ranking: the score formula evaluated for every one of the user's rows
+
+Ranked and exact should pick the same top 10, and ranked recall should cost about
+as much as newest-first. Finally an old, unimportant memory is read repeatedly
+through ranking.record_access to show access frequency lifting it.
+
+Usage: python benchmarks/bench_ranking.py [memories]
+"""
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from benchmarks.datagen import sentence  # noqa: E402
+from benchmarks.load_test import percentile  # noqa: E402
+from db import BoundDatabase, connect  # noqa: E402
+from migrations import migrate  # noqa: E402
+from pagination import MEMORIES_PAGE_SQL  # noqa: E402
+from ranking import ACCESS_BOOST, RECENCY_HALF_LIFE_DAYS, rank_key, ranked_memories, record_access  # noqa: E402
+
+USER = "+15550000001"
+MEMORY_TYPE = "learning"
+NOW = datetime(2025, 1, 1)
+
+
+def load(conn, total):
+    rng = random.Random(3)
+    rows = []
+    for i in range(total):
+        # Mostly trivial memories, a few essential ones scattered through history
+        importance = min(10, int(rng.paretovariate(1.5)))
+        reads = int(rng.expovariate(0.5)) if rng.random() < 0.1 else 0
+        timestamp = NOW - timedelta(minutes=total - i)
+        rows.append((USER, MEMORY_TYPE, json.dumps({"note": sentence(rng, 8)}), timestamp, importance,
+                     reads, rank_key(importance, timestamp, reads)))
+    with conn:
+        conn.executemany('''
+            INSERT INTO memories (user_id, memory_type, content, timestamp, importance, access_count, rank_key)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', rows)
+    conn.execute("ANALYZE")
+
+
+def timed(fn, repeat=500):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return f"p50 {percentile(samples, 50) * 1000:8.3f} ms  p99 {percentile(samples, 99) * 1000:8.3f} ms"
+
+
+def score(importance, timestamp, reads):
+    age = (NOW - datetime.fromisoformat(timestamp)).total_seconds() / 86400
+    return importance * 0.5 ** (age / RECENCY_HALF_LIFE_DAYS) * 2 ** (ACCESS_BOOST * sum(1 / n for n in range(1, reads + 1)))
+
+
+def exact(conn):
+    rows = conn.execute('''
+        SELECT id, importance, timestamp, access_count FROM memories WHERE user_id = ? AND memory_type = ?
+    ''', (USER, MEMORY_TYPE)).fetchall()
+    rows.sort(key=lambda row: score(*row[1:]), reverse=True)
+    return [row[0] for row in rows[:10]]
+
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+    conn = connect(os.path.join(tempfile.mkdtemp(prefix="prism_ranking_"), "prism_data.db"))
+    migrate(conn)
+    load(conn, total)
+    print(f"{total} memories for one user")
+
+    print(f"newest first:  {timed(lambda: conn.execute(MEMORIES_PAGE_SQL, (USER, MEMORY_TYPE, 5)).fetchall())}")
+    print(f"ranked:        {timed(lambda: ranked_memories(conn, USER, MEMORY_TYPE))}")
+    print(f"exact scoring: {timed(lambda: exact(conn), repeat=3)}")
+
+    ranked = [row[0] for row in ranked_memories(conn, USER, MEMORY_TYPE)]
+    print(f"top-10 agreement with exact scoring: {len(set(ranked) & set(exact(conn)))}/10")
+
+    # A week-old importance-5 memory, read on every turn, climbs into the top 10
+    memory_id = conn.execute('''
+        SELECT id FROM memories WHERE importance = 5 AND access_count = 0 AND timestamp < ?
+        ORDER BY timestamp DESC LIMIT 1
+    ''', (NOW - timedelta(days=7),)).fetchone()[0]
+    db = BoundDatabase(conn)
+    for reads in range(1, 201):
+        with conn:
+            record_access(db, [memory_id])
+        if memory_id in [row[0] for row in ranked_memories(conn, USER, MEMORY_TYPE)]:
+            print(f"week-old importance-5 memory reaches the top 10 after {reads} reads")
+            break
+    else:
+        print("week-old importance-5 memory still outside the top 10 after 200 reads")
+
+
+if __name__ == '__main__':
+    main()
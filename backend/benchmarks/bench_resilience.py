@@ -0,0 +1,117 @@
+"""MCPClient retries, hedging and circuit breaking against a fault-injecting stub.
+
+Three scenarios, each compared with the resilience feature switched off:
+
+* slow tail   - 5% of calls take 500 ms; hedged reads should cut p99
+* flaky       - 20% of calls return 503; retried reads should almost all succeed
+* dead server - nothing listening; once the breaker opens calls fail in microseconds
+
+tests/test_mcp_client.py asserts the behaviour; this script only measures it.
+
+Usage: python benchmarks/bench_resilience.py [calls]
+"""
+import asyncio
+import os
+import socket
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(os.path.dirname(BENCH_DIR))
+sys.path.insert(0, REPO_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+import mcp_stub_server  # noqa: E402
+from main import CircuitBreaker, CircuitOpenError, MCPClient, ToolPolicy  # noqa: E402
+
+READ = ("memory_manager", {"action": "retrieve", "query": "hiking"})
+NO_RESILIENCE = ToolPolicy(timeout=2.0)
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def drive(base_url, calls, policy, concurrency=8):
+    """Issue ``calls`` read calls; returns (latencies_ms, failures, client stats)"""
+    client = MCPClient(base_url, tool_policies={"memory_manager.retrieve": policy},
+                       breaker=CircuitBreaker(failure_threshold=10 ** 6))
+    client.available_tools = dict(mcp_stub_server.TOOLS)
+    latencies, failures = [], 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        nonlocal failures
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                await client.execute_tool(*READ)
+                latencies.append((time.perf_counter() - started) * 1000)
+            except Exception:
+                failures += 1
+
+    async with client:
+        await asyncio.gather(*(one() for _ in range(calls)))
+        return latencies, failures, client.stats()
+
+
+async def slow_tail(calls):
+    server, base_url = mcp_stub_server.start(
+        delay=0.005, handler=mcp_stub_server.FaultyStubHandler, slow_rate=0.05, slow_delay=0.5)
+    plain, _, _ = await drive(base_url, calls, NO_RESILIENCE)
+    hedged, _, stats = await drive(base_url, calls, ToolPolicy(timeout=2.0, hedge_after=0.03))
+    server.shutdown()
+    print("slow tail (5% of calls +500 ms)")
+    print(f"  no hedging: p50 {percentile(plain, 50):6.1f} ms  p99 {percentile(plain, 99):6.1f} ms")
+    print(f"  hedged:     p50 {percentile(hedged, 50):6.1f} ms  p99 {percentile(hedged, 99):6.1f} ms"
+          f"  ({stats['hedges']} hedges, {stats['hedge_wins']} won)")
+
+
+async def flaky(calls):
+    server, base_url = mcp_stub_server.start(
+        delay=0.002, handler=mcp_stub_server.FaultyStubHandler, error_rate=0.2)
+    _, plain_failures, _ = await drive(base_url, calls, NO_RESILIENCE)
+    _, retried_failures, stats = await drive(
+        base_url, calls, ToolPolicy(timeout=2.0, retries=3, backoff=0.01))
+    server.shutdown()
+    print("flaky (20% of calls 503)")
+    print(f"  no retries: {plain_failures:4d}/{calls} failed")
+    print(f"  3 retries:  {retried_failures:4d}/{calls} failed  ({stats['retries']} retries)")
+
+
+async def dead_server(calls):
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        base_url = f"http://127.0.0.1:{probe.getsockname()[1]}"
+    client = MCPClient(base_url, tool_policies={}, breaker=CircuitBreaker(failure_threshold=5, reset_timeout=30))
+    client.available_tools = dict(mcp_stub_server.TOOLS)
+    samples = {"closed": [], "open": []}
+    async with client:
+        for _ in range(calls):
+            state = "open" if client.breaker.state == "open" else "closed"
+            started = time.perf_counter()
+            try:
+                await client.execute_tool(*READ)
+            except CircuitOpenError:
+                pass
+            except Exception:
+                pass
+            samples[state].append((time.perf_counter() - started) * 1000)
+        stats = client.stats()
+    print("dead server (connection refused)")
+    print(f"  before breaker opened: {len(samples['closed']):4d} calls, mean "
+          f"{sum(samples['closed']) / len(samples['closed']):7.3f} ms")
+    print(f"  breaker open:          {len(samples['open']):4d} calls, mean "
+          f"{sum(samples['open']) / len(samples['open']):7.3f} ms  ({stats['short_circuits']} short circuits)")
+
+
+async def main():
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 400
+    await slow_tail(calls)
+    await flaky(calls)
+    await dead_server(calls)
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,91 @@
+"""Webhook latency while a retention sweep archives and compacts in the background.
+
+Generates a scratch database, then replays the payloads.TRAFFIC_MIX calls from
+several threads twice: once alone and once while a sweep with tight limits archives
+most memories and every thought. Also reports the sweep's work, the database size
+before and after, and how well the archive compresses.
+
+Usage: python benchmarks/bench_retention.py [rows] [users] [calls]
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from benchmarks import datagen  # noqa: E402
+from benchmarks.load_test import percentile  # noqa: E402
+from benchmarks.payloads import tool_payload, traffic  # noqa: E402
+
+THREADS = 8
+POLICIES = {"memories": {"*": {"max_rows": 200}}, "thoughts": {"max_age_days": 7}}
+
+
+def replay(prism_tools, plan):
+    latencies, lock = [], threading.Lock()
+
+    def worker(calls):
+        samples = []
+        for tool, parameters, user in calls:
+            started = time.perf_counter()
+            prism_tools.ENDPOINTS[tool](tool_payload(tool, parameters, user))
+            samples.append(time.perf_counter() - started)
+        with lock:
+            latencies.extend(samples)
+
+    threads = [threading.Thread(target=worker, args=(plan[n::THREADS],)) for n in range(THREADS)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return f"p50 {percentile(latencies, 50) * 1000:6.2f} ms  p99 {percentile(latencies, 99) * 1000:6.2f} ms"
+
+
+def file_size(path):
+    return sum(os.path.getsize(path + suffix) for suffix in ("", "-wal") if os.path.exists(path + suffix))
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    users = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    calls = int(sys.argv[3]) if len(sys.argv) > 3 else 8000
+    path = os.path.join(tempfile.mkdtemp(prefix="prism_retention_"), "prism_data.db")
+    datagen.generate(path, rows=rows, users=users)
+    before = file_size(path)
+
+    os.environ['PRISM_DATABASE_PATH'] = path
+    import prism_tools
+    from retention import Retention
+
+    prism_tools.init_database()
+    plan = traffic(calls, users)
+    print(f"{rows} rows, {users} users, {calls} calls over {THREADS} threads")
+    print(f"webhooks alone:        {replay(prism_tools, plan)}")
+
+    retention = Retention(prism_tools.database, prism_tools.ARCHIVE_PATH, policies=POLICIES,
+                          on_archive=prism_tools.user_cache.invalidate_user)
+    outcome = {}
+    sweeper = threading.Thread(target=lambda: outcome.update(retention.sweep()))
+    started = time.perf_counter()
+    sweeper.start()
+    print(f"webhooks during sweep: {replay(prism_tools, plan)}")
+    sweeper.join()
+    print(f"sweep: {outcome} in {time.perf_counter() - started:.1f}s")
+
+    retention.stop()
+    conn = sqlite3.connect(prism_tools.ARCHIVE_PATH)
+    chunks, archived_rows, payload = conn.execute(
+        "SELECT count(*), sum(row_count), sum(length(payload)) FROM memory_chunks").fetchone()
+    conn.close()
+    prism_tools.database.close()
+    print(f"database: {before / 1e6:.1f} MB -> {file_size(path) / 1e6:.1f} MB; archive "
+          f"{file_size(prism_tools.ARCHIVE_PATH) / 1e6:.1f} MB ({archived_rows} memories in {chunks} chunks, "
+          f"{payload / max(archived_rows, 1):.0f} bytes/memory compressed)")
+
+
+if __name__ == '__main__':
+    main()
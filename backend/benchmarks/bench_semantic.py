@@ -0,0 +1,85 @@
+"""Semantic recall: embedding throughput and top-k search at 100k and 1M vectors.
+
+Vectors for one user (the worst case, since search is per user) are written to a
+scratch database, loaded through the incremental VectorIndex, then queried.
+
+Usage: python benchmarks/bench_semantic.py [sizes...]    (default: 100000 1000000)
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+import numpy as np  # noqa: E402
+
+from embeddings import HashingEmbedder, VectorIndex  # noqa: E402
+from migrations import migrate  # noqa: E402
+
+
+def bench_embedding(embedder, n=5000):
+    texts = [f"memory {i} about hiking trips and coffee with my sister number {i % 97}" for i in range(n)]
+    started = time.perf_counter()
+    for text in texts:
+        embedder.embed(text)
+    return n / (time.perf_counter() - started)
+
+
+def bench_size(size, dim):
+    path = os.path.join(tempfile.mkdtemp(prefix="prism_vectors_"), "prism_data.db")
+    conn = sqlite3.connect(path)
+    migrate(conn)
+    rng = np.random.default_rng(3)
+    chunk = 50000
+    for start in range(0, size, chunk):
+        vectors = rng.standard_normal((min(chunk, size - start), dim), dtype=np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        conn.executemany(
+            "INSERT INTO memory_vectors (memory_id, user_id, vector) VALUES (?, ?, ?)",
+            ((start + i + 1, "bench_user", v.tobytes()) for i, v in enumerate(vectors)),
+        )
+    conn.commit()
+
+    index = VectorIndex()
+    query = rng.standard_normal(dim, dtype=np.float32)
+    query /= np.linalg.norm(query)
+
+    started = time.perf_counter()
+    index.search(conn, "bench_user", query)
+    load_s = time.perf_counter() - started
+
+    runs = 50
+    started = time.perf_counter()
+    for _ in range(runs):
+        index.search(conn, "bench_user", query)
+    search_ms = (time.perf_counter() - started) / runs * 1000
+
+    # Incremental catch-up after one new memory: no rebuild
+    conn.execute(
+        "INSERT INTO memory_vectors (memory_id, user_id, vector) VALUES (?, ?, ?)",
+        (size + 1, "bench_user", query.tobytes()),
+    )
+    conn.commit()
+    started = time.perf_counter()
+    top = index.search(conn, "bench_user", query, k=1)
+    catch_up_ms = (time.perf_counter() - started) * 1000
+    assert top == [size + 1]
+
+    db_mb = os.path.getsize(path) / 1e6
+    print(f"{size:>9} vectors: initial load {load_s:6.2f}s, top-10 search {search_ms:7.2f} ms, "
+          f"append+search {catch_up_ms:7.2f} ms, db {db_mb:7.1f} MB")
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [100_000, 1_000_000]
+    embedder = HashingEmbedder()
+    print(f"hashing embedder: {bench_embedding(embedder):.0f} texts/s (dim {embedder.dim})")
+    for size in sizes:
+        bench_size(size, embedder.dim)
+
+
+if __name__ == '__main__':
+    main()
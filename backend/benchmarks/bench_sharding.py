@@ -0,0 +1,89 @@
+"""Write throughput as the per-user tables are split across more shard files.
+
+For each shard count, a fresh process (prism_tools reads PRISM_SHARDS at import)
+runs ``--threads`` threads. Each thread stores memories and sets goals for random
+users through the tool handlers, for ``--seconds``. Each shard has its own writer
+thread and SQLite write lock. With one shard, every write queues behind a single
+lock. Sharding only scales write throughput when cores or I/O are free to run
+writers in parallel, so compare the numbers against ``os.cpu_count()``.
+
+Usage: python benchmarks/bench_sharding.py [--shards 1 2 4 8] [--threads 16] [--seconds 5]
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from benchmarks import datagen  # noqa: E402
+from benchmarks.payloads import tool_payload  # noqa: E402
+
+USERS = 10000
+
+
+def child(threads, seconds):
+    import prism_tools
+
+    prism_tools.init_database()
+    counts = [0] * threads
+    deadline = time.perf_counter() + seconds
+
+    def writer(n):
+        rng = random.Random(n)
+        while time.perf_counter() < deadline:
+            user = datagen.user_id(rng.randrange(USERS))
+            if rng.random() < 0.8:
+                tool, parameters = "memory_manager", {
+                    "action": "store", "memory_type": rng.choice(datagen.MEMORY_TYPES),
+                    "content": {"note": datagen.sentence(rng), "topic": rng.choice(datagen.TOPICS)}}
+            else:
+                tool, parameters = "goal_tracker", {
+                    "action": "set_goal", "goal_type": rng.choice(datagen.GOAL_TYPES),
+                    "goal_data": {"title": datagen.sentence(rng, 4)}}
+            payload, status = prism_tools.ENDPOINTS[tool](tool_payload(tool, parameters, user))
+            if status == 200:
+                counts[n] += 1
+
+    started = time.perf_counter()
+    workers = [threading.Thread(target=writer, args=(n,)) for n in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - started
+    print(json.dumps({"writes": sum(counts), "writes_per_second": round(sum(counts) / elapsed, 1)}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--shards', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--seconds', type=float, default=5.0)
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        return child(args.threads, args.seconds)
+
+    print(f"{os.cpu_count()} CPUs, {args.threads} writer threads, {args.seconds}s per run")
+    baseline = None
+    for shards in args.shards:
+        env = dict(os.environ, PRISM_SHARDS=str(shards), PRISM_RETENTION_INTERVAL='0',
+                   PRISM_DATABASE_PATH=os.path.join(tempfile.mkdtemp(prefix="prism_shards_"), "prism_data.db"))
+        out = subprocess.run([sys.executable, os.path.abspath(__file__), '--child',
+                              '--threads', str(args.threads), '--seconds', str(args.seconds)],
+                             env=env, capture_output=True, text=True, check=True).stdout
+        result = json.loads(out.strip().splitlines()[-1])
+        baseline = baseline or result["writes_per_second"]
+        print(f"{shards:3d} shard(s): {result['writes_per_second']:9.1f} writes/s "
+              f"({result['writes_per_second'] / baseline:.2f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""End-to-end latency of one thought-loop turn: sequential vs execute_many vs /execute_batch.
+
+Usage: python benchmarks/bench_turn_latency.py [turns] [delay_ms]
+"""
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(os.path.dirname(BENCH_DIR))
+sys.path.insert(0, REPO_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+import mcp_stub_server  # noqa: E402
+from main import VapiMCPIntegration  # noqa: E402
+
+TURN = [
+    {"tool": "memory_manager", "params": {"action": "retrieve", "query": "hiking"}},
+    {"tool": "emotion_analyzer", "params": {"action": "get_emotional_history"}},
+    {"tool": "goal_tracker", "params": {"action": "get_goals"}},
+    {"tool": "identity_tracker", "params": {"action": "get_identity"}},
+    {"tool": "thought_logger", "params": {"thought_type": "reasoning", "thought_content": "plan"}},
+]
+
+
+async def sequential(integration):
+    return [await integration.execute_tool(c["tool"], c["params"]) for c in TURN]
+
+
+async def measure(run, turns):
+    samples = []
+    for _ in range(turns):
+        started = time.perf_counter()
+        await run()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples), max(samples)
+
+
+async def main():
+    turns = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    delay = float(sys.argv[2]) / 1000 if len(sys.argv) > 2 else 20.0 / 1000
+    server, base_url = mcp_stub_server.start(delay=delay)
+
+    async with VapiMCPIntegration({"server": {"url": base_url}}) as integration:
+        results = {
+            "sequential": await measure(lambda: sequential(integration), turns),
+            "execute_many": await measure(lambda: integration.execute_many(TURN, timeout=5), turns),
+            "execute_batch": await measure(lambda: integration.execute_many(TURN, timeout=5, batch=True), turns),
+        }
+    server.shutdown()
+
+    print(f"{len(TURN)} tools per turn, stub delay {delay * 1000:.0f} ms, {turns} turns")
+    for name, (median, worst) in results.items():
+        print(f"{name:>14}: median {median:7.1f} ms   max {worst:7.1f} ms")
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,190 @@
+"""Deterministic synthetic PRISM data: users, memories, emotions, goals and thoughts.
+
+Rows are split across the tables in the proportions of ``TABLE_SHARES`` and are
+spread over ``users`` phone numbers with a Zipf-like skew, so a few users are heavy
+and most are light, as in real traffic. The same seed always produces the same
+database.
+
+Usage: python benchmarks/datagen.py path/to/prism_data.db [rows] [users]
+"""
+import itertools
+import json
+import os
+import random
+import sqlite3
+import sys
+import time
+from datetime import datetime, timedelta
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from db import connect, enable_wal  # noqa: E402
+from migrations import migrate  # noqa: E402
+from ranking import rank_key  # noqa: E402
+from search import FTS_SCHEMA  # noqa: E402
+from tool_schemas import PARAMETER_SCHEMAS  # noqa: E402
+
+SYLLABLES = ("ka", "lo", "mi", "ten", "ra", "shu", "vel", "do", "pin", "gar", "zu", "ne")
+# ~5k distinct words drawn with a Zipf-like skew, closer to real conversation text
+WORDS = sorted({a + b + c for a in SYLLABLES for b in SYLLABLES for c in SYLLABLES})
+WEIGHTS = [1.0 / (rank + 1) for rank in range(len(WORDS))]
+# rng.choices re-sums plain weights on every call; cumulative ones are reused as-is
+CUM_WEIGHTS = list(itertools.accumulate(WEIGHTS))
+TOPICS = ("work", "family", "health", "hobbies", "learning", "travel")
+EMOTIONS = ("joy", "sadness", "anger", "fear", "surprise", "calm", "anxious", "excited")
+STRATEGIES = ("empathize", "encourage", "redirect", "celebrate", "listen")
+# Enumerated values come from the tool schemas so generated calls pass validation
+MEMORY_TYPES = tuple(PARAMETER_SCHEMAS["memory_manager"]["properties"]["memory_type"]["enum"])
+GOAL_TYPES = tuple(PARAMETER_SCHEMAS["goal_tracker"]["properties"]["goal_type"]["enum"])
+THOUGHT_TYPES = tuple(PARAMETER_SCHEMAS["thought_logger"]["properties"]["thought_type"]["enum"])
+
+TABLE_SHARES = {"memories": 0.6, "emotional_context": 0.2, "thoughts": 0.15, "goals": 0.05}
+IDENTITY_TRAITS = 40
+BATCH = 10000
+START = datetime(2024, 1, 1)
+
+
+def user_id(n):
+    return f"+1555{n:07d}"
+
+
+def sentence(rng, words=12):
+    return " ".join(rng.choices(WORDS, cum_weights=CUM_WEIGHTS, k=words))
+
+
+class UserPicker:
+    """Draws user numbers with a 1/rank skew"""
+
+    def __init__(self, rng, users):
+        self.rng = rng
+        self.users = list(range(users))
+        self.cum_weights = list(itertools.accumulate(1.0 / (rank + 1) for rank in range(users)))
+
+    def __call__(self, k):
+        return self.rng.choices(self.users, cum_weights=self.cum_weights, k=k)
+
+
+def _memories(rng, pick, count):
+    for offset in range(0, count, BATCH):
+        size = min(BATCH, count - offset)
+        rows = []
+        for i, user in enumerate(pick(size)):
+            topic = rng.choice(TOPICS)
+            timestamp, importance = START + timedelta(seconds=offset + i), rng.randint(1, 10)
+            rows.append((
+                user_id(user), rng.choice(MEMORY_TYPES),
+                json.dumps({"note": sentence(rng), "topic": topic}),
+                timestamp, rng.choice(EMOTIONS), topic, importance, rank_key(importance, timestamp),
+            ))
+        yield '''
+            INSERT INTO memories (user_id, memory_type, content, timestamp, emotion, topic, importance, rank_key)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', rows
+
+
+def _emotional_context(rng, pick, count):
+    for offset in range(0, count, BATCH):
+        size = min(BATCH, count - offset)
+        yield '''
+            INSERT INTO emotional_context (user_id, emotion, topic, response_strategy, timestamp, effectiveness_score)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', [
+            (user_id(user), rng.choice(EMOTIONS), rng.choice(TOPICS), rng.choice(STRATEGIES),
+             START + timedelta(seconds=offset + i), rng.randint(1, 10))
+            for i, user in enumerate(pick(size))
+        ]
+
+
+def _goals(rng, pick, count):
+    for offset in range(0, count, BATCH):
+        size = min(BATCH, count - offset)
+        rows = []
+        for i, user in enumerate(pick(size)):
+            created = START + timedelta(minutes=offset + i)
+            rows.append((
+                user_id(user), rng.choice(GOAL_TYPES), sentence(rng, 4), sentence(rng, 16),
+                rng.randint(0, 100), rng.choice(("active", "active", "active", "completed", "paused")),
+                created, created,
+            ))
+        yield '''
+            INSERT INTO goals (user_id, goal_type, title, description, progress, status, created_at, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', rows
+
+
+def _thoughts(rng, pick, count):
+    for offset in range(0, count, BATCH):
+        size = min(BATCH, count - offset)
+        yield '''
+            INSERT INTO thoughts (thought_type, content, context, outcome, timestamp)
+            VALUES (?, ?, ?, ?, ?)
+        ''', [
+            (rng.choice(THOUGHT_TYPES), sentence(rng), json.dumps({"topic": rng.choice(TOPICS)}),
+             "", START + timedelta(seconds=offset + i))
+            for i in range(size)
+        ]
+
+
+GENERATORS = {
+    "memories": _memories,
+    "emotional_context": _emotional_context,
+    "goals": _goals,
+    "thoughts": _thoughts,
+}
+
+
+def generate(path, rows=10000, users=1000, seed=7):
+    """Create and fill a scratch database; returns a summary of what was written"""
+    rng = random.Random(seed)
+    pick = UserPicker(rng, users)
+    conn = connect(path)
+    enable_wal(conn)
+    migrate(conn)
+    # Indexing row by row through the trigger is ~2x slower than one rebuild at the end
+    conn.execute("DROP TRIGGER memories_fts_insert")
+
+    started = time.perf_counter()
+    counts = {}
+    for table, share in TABLE_SHARES.items():
+        counts[table] = int(rows * share)
+        for sql, batch in GENERATORS[table](rng, pick, counts[table]):
+            with conn:
+                conn.executemany(sql, batch)
+    with conn:
+        conn.executemany('''
+            INSERT OR REPLACE INTO identity_traits (trait_name, trait_value, confidence_level, last_updated)
+            VALUES (?, ?, ?, ?)
+        ''', [
+            (f"trait_{i}", json.dumps({"note": sentence(rng, 6)}), rng.random(), START)
+            for i in range(IDENTITY_TRAITS)
+        ])
+    with conn:
+        for statement in FTS_SCHEMA:
+            conn.execute(statement)
+        conn.execute("INSERT INTO memories_fts (memories_fts) VALUES ('rebuild')")
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    conn.execute("ANALYZE")
+    conn.close()
+
+    return {
+        "rows": counts,
+        "users": users,
+        "seed": seed,
+        "seconds": round(time.perf_counter() - started, 2),
+        "db_bytes": os.path.getsize(path),
+    }
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        sys.exit(__doc__.strip().splitlines()[-1])
+    target = sys.argv[1]
+    if os.path.exists(target) and sqlite3.connect(target).execute(
+            "SELECT count(*) FROM sqlite_master").fetchone()[0]:
+        sys.exit(f"{target} already has tables; generate into a fresh file")
+    print(json.dumps(generate(
+        target,
+        rows=int(sys.argv[2]) if len(sys.argv) > 2 else 10000,
+        users=int(sys.argv[3]) if len(sys.argv) > 3 else 1000,
+    ), indent=2))
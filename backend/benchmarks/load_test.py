@@ -0,0 +1,115 @@
+"""Replay Vapi-style functionCall traffic against running PRISM servers.
+
+Start the servers to compare, e.g.
+
+    python prism_server.py                                   # Flask on :8000
+    uvicorn asgi_server:app --port 8001 --workers 4          # ASGI on :8001
+
+then
+
+    python benchmarks/load_test.py --target flask=http://127.0.0.1:8000 \
+        --target asgi=http://127.0.0.1:8001 --concurrency 32 --requests 5000
+"""
+import argparse
+import http.client
+import json
+import os
+import sys
+import threading
+import time
+from urllib.parse import urlsplit
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from benchmarks.payloads import TURN, tool_payload  # noqa: E402
+
+
+def percentile(samples, pct):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def turn_plan(total, users):
+    """``total`` calls cycling through TURN, one user after another"""
+    return [TURN[i % len(TURN)] + (f"+1555{i % users:07d}",) for i in range(total)]
+
+
+def _worker(base_url, plan, latencies, errors, lock):
+    url = urlsplit(base_url)
+    conn = http.client.HTTPConnection(url.hostname, url.port or 80, timeout=30)
+    samples = []
+    failures = 0
+    for tool, parameters, user in plan:
+        body = json.dumps(tool_payload(tool, parameters, user))
+        started = time.perf_counter()
+        try:
+            conn.request("POST", f"{url.path.rstrip('/')}/api/{tool}", body,
+                         {"Content-Type": "application/json"})
+            response = conn.getresponse()
+            response.read()
+            if response.status != 200:
+                failures += 1
+                continue
+        except (OSError, http.client.HTTPException):
+            failures += 1
+            conn.close()
+            conn = http.client.HTTPConnection(url.hostname, url.port or 80, timeout=30)
+            continue
+        samples.append(time.perf_counter() - started)
+    conn.close()
+    with lock:
+        latencies.extend(samples)
+        errors.append(failures)
+
+
+def run_target(base_url, total, concurrency, users, plan=None):
+    """Drive ``total`` requests over ``concurrency`` keep-alive connections
+
+    ``plan`` is a list of (tool, parameters, user) calls; by default TURN is replayed.
+    """
+    plan = plan or turn_plan(total, users)
+    latencies, errors = [], []
+    lock = threading.Lock()
+    per_worker = max(1, len(plan) // concurrency)
+    threads = [
+        threading.Thread(target=_worker, args=(base_url, plan[n * per_worker:(n + 1) * per_worker],
+                                               latencies, errors, lock))
+        for n in range(concurrency)
+    ]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+    return {
+        "requests": len(latencies),
+        "errors": sum(errors),
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--target', action='append', required=True,
+                        help="name=base_url of a running server (repeatable)")
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--users', type=int, default=100)
+    args = parser.parse_args()
+
+    results = {}
+    for target in args.target:
+        name, _, base_url = target.partition('=')
+        results[name] = run_target(base_url, args.requests, args.concurrency, args.users)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,137 @@
+"""Local stand-in for an MCP tool server, used by the main.py client benchmarks.
+
+Serves ``GET /tools`` (with an ETag and 304 on ``If-None-Match``), ``POST
+/execute/<tool>`` and ``POST /execute_batch`` over keep-alive HTTP/1.1 and echoes the
+parameters back after an optional artificial delay. FaultyStubHandler adds injected
+5xx errors, slow responses and dropped connections for resilience tests.
+
+Usage: python benchmarks/mcp_stub_server.py [port] [delay_ms]
+"""
+import hashlib
+import json
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+TOOLS = {
+    name: {
+        "description": f"Stand-in for {name}",
+        "parameters": {"type": "object", "properties": {"action": {"type": "string"}}},
+        "returns": {"type": "object"},
+    }
+    for name in ("memory_manager", "identity_tracker", "emotion_analyzer", "goal_tracker", "thought_logger")
+}
+TOOLS_ETAG = '"' + hashlib.sha256(json.dumps(TOOLS, sort_keys=True).encode()).hexdigest()[:32] + '"'
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Cancelled and hedged client requests hang up mid-response; that's expected
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; don't let Nagle hold the body back
+    disable_nagle_algorithm = True
+    delay = 0.0
+    catalog_delay = 0.0
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, payload, status=200, headers=None):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def do_GET(self):
+        if self.path == "/tools":
+            if self.catalog_delay:
+                time.sleep(self.catalog_delay)
+            if self.headers.get("If-None-Match") == TOOLS_ETAG:
+                self.send_response(304)
+                self.send_header("ETag", TOOLS_ETAG)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            self._send_json(TOOLS, headers={"ETag": TOOLS_ETAG})
+        else:
+            self._send_json({"error": "Not found"}, 404)
+
+    def do_POST(self):
+        if self.path.startswith("/execute/"):
+            params = self._read_json()
+            if self.delay:
+                time.sleep(self.delay)
+            self._send_json({"tool": self.path[len("/execute/"):], "result": params})
+        elif self.path == "/execute_batch":
+            calls = self._read_json().get("calls", [])
+            # Server-side fan-out: the batch costs one delay, not one per call
+            if self.delay:
+                time.sleep(self.delay)
+            self._send_json({"results": [{"tool": c["tool"], "result": c.get("params", {})} for c in calls]})
+        else:
+            self._send_json({"error": "Not found"}, 404)
+
+
+class FaultyStubHandler(StubHandler):
+    """StubHandler whose /execute calls fail at configurable rates"""
+
+    error_rate = 0.0     # answer 503
+    slow_rate = 0.0      # answer after slow_delay instead of delay
+    slow_delay = 1.0
+    drop_rate = 0.0      # close the connection without answering
+    rng = random.Random(3)
+
+    def do_POST(self):
+        if self.path.startswith("/execute/"):
+            roll = self.rng.random()
+            if roll < self.drop_rate:
+                self.close_connection = True
+                self.connection.close()
+                return
+            roll -= self.drop_rate
+            if roll < self.error_rate:
+                self._read_json()
+                self._send_json({"error": "injected failure"}, 503)
+                return
+            roll -= self.error_rate
+            if roll < self.slow_rate:
+                time.sleep(self.slow_delay)
+        super().do_POST()
+
+
+def start(port=0, delay=0.0, handler=StubHandler, catalog_delay=0.0, **settings):
+    """Run a stub server on a background thread; returns (server, base_url)
+
+    Extra keyword arguments override handler class attributes, e.g. the
+    FaultyStubHandler rates.
+    """
+    settings.update(delay=delay, catalog_delay=catalog_delay)
+    handler_class = type("ConfiguredStubHandler", (handler,), settings)
+    server = StubServer(("127.0.0.1", port), handler_class)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+if __name__ == '__main__':
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8765
+    delay = float(sys.argv[2]) / 1000 if len(sys.argv) > 2 else 0.0
+    server = StubServer(("127.0.0.1", port), type("H", (StubHandler,), {"delay": delay}))
+    print(f"MCP stub listening on http://127.0.0.1:{port}")
+    server.serve_forever()
@@ -0,0 +1,64 @@
+"""Vapi-style webhook bodies shared by the benchmarks."""
+import random
+
+from benchmarks import datagen
+
+
+def tool_payload(tool, parameters, user="+15550100"):
+    """Wrap tool parameters the way Vapi delivers a functionCall webhook"""
+    return {
+        "call": {"customer": {"phoneNumber": user}},
+        "message": {"functionCall": {"name": tool, "parameters": parameters}},
+    }
+
+
+# One typical assistant turn: store + recall, context checks, a logged thought
+TURN = [
+    ("memory_manager", {"action": "store", "memory_type": "learning",
+                        "content": {"note": "likes hiking", "topic": "hobbies"}, "importance": 6}),
+    ("memory_manager", {"action": "retrieve", "memory_type": "learning"}),
+    ("emotion_analyzer", {"action": "get_emotional_history"}),
+    ("goal_tracker", {"action": "get_goals"}),
+    ("identity_tracker", {"action": "get_identity"}),
+    ("thought_logger", {"thought_type": "reasoning", "thought_content": "plan reply"}),
+]
+
+
+def _memory_store(rng):
+    topic = rng.choice(datagen.TOPICS)
+    return {"action": "store", "memory_type": rng.choice(datagen.MEMORY_TYPES),
+            "content": {"note": datagen.sentence(rng), "topic": topic}}
+
+
+def _set_goal(rng):
+    return {"action": "set_goal", "goal_type": rng.choice(datagen.GOAL_TYPES),
+            "goal_data": {"title": datagen.sentence(rng, 4), "description": datagen.sentence(rng, 16)}}
+
+
+# (weight, tool, parameter builder): reads dominate, as in live calls
+TRAFFIC_MIX = [
+    (20, "memory_manager", lambda rng: {"action": "retrieve", "memory_type": rng.choice(datagen.MEMORY_TYPES)}),
+    (10, "memory_manager", lambda rng: {"action": "retrieve", "query": datagen.sentence(rng, 1)}),
+    (8, "memory_manager", _memory_store),
+    (15, "identity_tracker", lambda rng: {"action": "get_identity"}),
+    (2, "identity_tracker", lambda rng: {
+        "action": "update_trait", "trait": f"trait_{rng.randrange(datagen.IDENTITY_TRAITS)}",
+        "adjustment": {"direction": "up", "confidence": round(rng.random(), 2)}}),
+    (10, "emotion_analyzer", lambda rng: {"action": "get_emotional_history"}),
+    (8, "emotion_analyzer", lambda rng: {
+        "action": "store_emotional_memory", "user_emotion": rng.choice(datagen.EMOTIONS),
+        "topic": rng.choice(datagen.TOPICS), "response_strategy": rng.choice(datagen.STRATEGIES)}),
+    (10, "goal_tracker", lambda rng: {"action": "get_goals"}),
+    (2, "goal_tracker", _set_goal),
+    (15, "thought_logger", lambda rng: {
+        "thought_type": rng.choice(datagen.THOUGHT_TYPES), "thought_content": datagen.sentence(rng),
+        "context": {"topic": rng.choice(datagen.TOPICS)}}),
+]
+
+
+def traffic(count, users, seed=11):
+    """``count`` deterministic (tool, parameters, user) calls drawn from TRAFFIC_MIX"""
+    rng = random.Random(seed)
+    pick = datagen.UserPicker(rng, users)
+    mix = rng.choices(TRAFFIC_MIX, weights=[entry[0] for entry in TRAFFIC_MIX], k=count)
+    return [(tool, build(rng), datagen.user_id(user)) for (_, tool, build), user in zip(mix, pick(count))]
@@ -0,0 +1,182 @@
+"""Reproducible end-to-end benchmark: synthetic data, replayed Vapi traffic, JSON results.
+
+1. Generates ``--rows`` rows for ``--users`` users into a scratch prism_data.db
+   (benchmarks/datagen.py), or reuses ``--db``.
+2. Replays the same deterministic functionCall mix (payloads.TRAFFIC_MIX) over all
+   five tool endpoints: sequentially through Flask's test client, then concurrently
+   over HTTP against a threaded werkzeug server, plus any ``--target`` servers that
+   are already running.
+3. Reports throughput, p50/p95/p99 latency and database size, and writes them to
+   ``--out`` (default benchmarks/results/<timestamp>.json). ``--compare`` prints the
+   change against an earlier results file.
+
+Usage: python benchmarks/run_suite.py --rows 100000 --requests 5000 [--compare old.json]
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from benchmarks import datagen  # noqa: E402
+from benchmarks.load_test import percentile, run_target  # noqa: E402
+from benchmarks.payloads import tool_payload, traffic  # noqa: E402
+
+RESULTS_DIR = os.path.join(BACKEND_DIR, "benchmarks", "results")
+COMPARED = ("throughput_rps", "p50_ms", "p95_ms", "p99_ms")
+
+
+def summarize(latencies, errors, elapsed):
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+    }
+
+
+def run_test_client(app, plan):
+    client = app.test_client()
+    latencies, errors = [], 0
+    started = time.perf_counter()
+    for tool, parameters, user in plan:
+        call_started = time.perf_counter()
+        response = client.post(f"/api/{tool}", json=tool_payload(tool, parameters, user))
+        if response.status_code != 200:
+            errors += 1
+            continue
+        latencies.append(time.perf_counter() - call_started)
+    return summarize(latencies, errors, time.perf_counter() - started)
+
+
+def run_http(app, plan, concurrency, users):
+    from werkzeug.serving import make_server
+
+    # The per-request access log would dominate the measurement
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        return run_target(f"http://127.0.0.1:{server.server_port}", len(plan), concurrency, users, plan)
+    finally:
+        server.shutdown()
+
+
+def database_summary(path):
+    conn = sqlite3.connect(path)
+    try:
+        rows = {
+            table: conn.execute(f"SELECT count(*) FROM {table}").fetchone()[0]
+            for table in ("memories", "emotional_context", "goals", "thoughts", "identity_traits")
+        }
+    finally:
+        conn.close()
+    size = sum(os.path.getsize(path + suffix) for suffix in ("", "-wal") if os.path.exists(path + suffix))
+    return {"rows": rows, "db_bytes": size}
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(previous, current):
+    """Print the change of every compared metric present in both result sets"""
+    print(f"vs {previous['meta'].get('commit')} ({previous['meta']['started']})")
+    for phase, result in current["results"].items():
+        before = previous.get("results", {}).get(phase)
+        if not before:
+            continue
+        changes = []
+        for key in COMPARED:
+            if before.get(key):
+                delta = (result[key] - before[key]) / before[key] * 100
+                changes.append(f"{key} {before[key]} -> {result[key]} ({delta:+.1f}%)")
+        print(f"  {phase}: " + ", ".join(changes))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=10000, help="synthetic rows across all tables")
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--requests', type=int, default=5000, help="replayed calls per phase")
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--db', help="reuse an existing generated database (it is written to)")
+    parser.add_argument('--target', action='append', default=[],
+                        help="name=base_url of another running server to replay against (repeatable)")
+    parser.add_argument('--skip-http', action='store_true', help="only run the test-client phase")
+    parser.add_argument('--out', help="results file (default benchmarks/results/<timestamp>.json)")
+    parser.add_argument('--compare', help="earlier results file to diff against")
+    args = parser.parse_args()
+
+    started = datetime.now(timezone.utc)
+    path = args.db or os.path.join(tempfile.mkdtemp(prefix="prism_suite_"), "prism_data.db")
+    generated = None
+    if not args.db:
+        generated = datagen.generate(path, rows=args.rows, users=args.users, seed=args.seed)
+        print(f"generated {args.rows} rows for {args.users} users in {generated['seconds']}s")
+
+    # prism_tools opens PRISM_DATABASE_PATH at import time
+    os.environ['PRISM_DATABASE_PATH'] = path
+    import prism_server
+    import prism_tools
+
+    prism_tools.init_database()
+    plan = traffic(args.requests, args.users, seed=args.seed + 4)
+
+    results = {"test_client": run_test_client(prism_server.app, plan)}
+    print(f"test_client: {json.dumps(results['test_client'])}")
+    if not args.skip_http:
+        results["http"] = run_http(prism_server.app, plan, args.concurrency, args.users)
+        print(f"http:        {json.dumps(results['http'])}")
+    for target in args.target:
+        name, _, base_url = target.partition('=')
+        results[name] = run_target(base_url, len(plan), args.concurrency, args.users, plan)
+        print(f"{name}: {json.dumps(results[name])}")
+
+    prism_tools.database.flush_writes()
+    report = {
+        "meta": {
+            "started": started.isoformat(timespec='seconds'),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "args": {key: value for key, value in vars(args).items() if key not in ('out', 'compare')},
+        },
+        "datagen": generated,
+        "database": database_summary(path),
+        "results": results,
+    }
+    prism_tools.database.close()
+
+    out = args.out or os.path.join(RESULTS_DIR, started.strftime("%Y%m%dT%H%M%SZ") + ".json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"database: {report['database']['db_bytes'] / 1e6:.1f} MB; results written to {out}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), report)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,164 @@
+"""Multi-threaded write/read stress test for the PRISM storage layer.
+
+Runs concurrent writer and reader threads twice: once with naive per-thread
+connections in rollback-journal mode (the old setup) and once through
+db.Database (WAL + single writer thread). Reports lock errors and p50/p99
+write latency for each. tests/test_db.py asserts the lock-free behaviour.
+
+Usage: python benchmarks/stress_writes.py [threads] [writes_per_thread]
+"""
+import json
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from db import Database, enable_wal  # noqa: E402
+
+SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS thoughts (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        thought_type TEXT,
+        content TEXT,
+        context TEXT,
+        outcome TEXT,
+        timestamp DATETIME
+    )
+'''
+INSERT = '''
+    INSERT INTO thoughts (thought_type, content, context, outcome, timestamp)
+    VALUES (?, ?, ?, ?, ?)
+'''
+READ = 'SELECT COUNT(*) FROM thoughts WHERE thought_type = ?'
+
+
+def percentile(samples, pct):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def _row(i):
+    return ('reasoning', f'thought {i}', json.dumps({'turn': i}), '', datetime.now())
+
+
+def run_naive(path, threads, writes):
+    """Every thread opens its own connection, default journal mode, 0.1s timeout"""
+    conn = sqlite3.connect(path)
+    conn.execute(SCHEMA)
+    conn.close()
+    return _drive(
+        threads, writes,
+        write=lambda local, i: _naive_write(local, path, i),
+        read=lambda local: _naive_read(local, path),
+    )
+
+
+def _naive_conn(local, path):
+    if not hasattr(local, 'conn'):
+        local.conn = sqlite3.connect(path, timeout=0.1)
+    return local.conn
+
+
+def _naive_write(local, path, i):
+    conn = _naive_conn(local, path)
+    conn.execute(INSERT, _row(i))
+    conn.commit()
+
+
+def _naive_read(local, path):
+    _naive_conn(local, path).execute(READ, ('reasoning',)).fetchone()
+
+
+def run_database(path, threads, writes):
+    database = Database(path, pool_size=threads)
+    database.write(lambda conn: (enable_wal(conn), conn.execute(SCHEMA)))
+    try:
+        return _drive(
+            threads, writes,
+            write=lambda local, i: database.execute_write(INSERT, _row(i)),
+            read=lambda local: _database_read(database),
+        )
+    finally:
+        database.close()
+
+
+def _database_read(database):
+    with database.read() as conn:
+        conn.execute(READ, ('reasoning',)).fetchone()
+
+
+def _drive(threads, writes, write, read):
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+    done = threading.Event()
+
+    def writer():
+        local = threading.local()
+        samples = []
+        for i in range(writes):
+            started = time.perf_counter()
+            try:
+                write(local, i)
+            except sqlite3.OperationalError as e:
+                with lock:
+                    errors.append(str(e))
+                continue
+            samples.append(time.perf_counter() - started)
+        with lock:
+            latencies.extend(samples)
+
+    def reader():
+        local = threading.local()
+        while not done.is_set():
+            try:
+                read(local)
+            except sqlite3.OperationalError as e:
+                with lock:
+                    errors.append(str(e))
+
+    writers = [threading.Thread(target=writer) for _ in range(threads)]
+    readers = [threading.Thread(target=reader) for _ in range(threads)]
+    started = time.perf_counter()
+    for t in writers + readers:
+        t.start()
+    for t in writers:
+        t.join()
+    elapsed = time.perf_counter() - started
+    done.set()
+    for t in readers:
+        t.join()
+
+    return {
+        "writes": len(latencies),
+        "lock_errors": len(errors),
+        "writes_per_sec": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 3) if latencies else 0.0,
+    }
+
+
+def main():
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    writes = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    scratch = tempfile.mkdtemp(prefix="prism_stress_")
+
+    results = {
+        "naive_rollback_journal": run_naive(os.path.join(scratch, "naive.db"), threads, writes),
+        "wal_single_writer": run_database(os.path.join(scratch, "wal.db"), threads, writes),
+    }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,136 @@
+"""Local stand-in for the Vapi tool and assistant API, used by bench_provisioning.py.
+
+Serves ``GET/POST /tool``, ``PATCH/DELETE /tool/<id>`` and ``GET/PATCH
+/assistants/<id>`` from memory. Each request is counted per method. Settings
+(class attributes, overridable through ``start``) add a per-request delay, 503s
+and 429s with ``Retry-After: 0``, so retry and concurrency behaviour can be
+exercised without a Vapi account.
+
+Usage: python benchmarks/vapi_stub_server.py [port] [delay_ms]
+"""
+import itertools
+import json
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class VapiStubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, handler):
+        super().__init__(address, handler)
+        self.tools = {}
+        self.assistants = {}
+        self.requests = Counter()
+        self.lock = threading.Lock()
+        self._ids = itertools.count(1)
+
+    def new_id(self):
+        return f"tool-{next(self._ids):04d}"
+
+    def reset_counts(self):
+        with self.lock:
+            self.requests.clear()
+
+
+class VapiStubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    delay = 0.0
+    error_rate = 0.0       # answer 503 (without applying the request)
+    rate_limit_rate = 0.0  # answer 429 with Retry-After: 0
+    rng = random.Random(5)
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, payload, status=200, headers=None):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def _handle(self, method):
+        server = self.server
+        body = self._read_json() if method in ("POST", "PATCH") else None
+        with server.lock:
+            server.requests[method] += 1
+        if self.delay:
+            time.sleep(self.delay)
+        roll = self.rng.random()
+        if roll < self.rate_limit_rate:
+            return self._send_json({"error": "rate limited"}, 429, {"Retry-After": "0"})
+        if roll < self.rate_limit_rate + self.error_rate:
+            return self._send_json({"error": "injected failure"}, 503)
+
+        parts = self.path.strip("/").split("/")
+        with server.lock:
+            if parts == ["tool"] and method == "GET":
+                return self._send_json(list(server.tools.values()))
+            if parts == ["tool"] and method == "POST":
+                tool = dict(body, id=server.new_id())
+                server.tools[tool["id"]] = tool
+                return self._send_json(tool, 201)
+            if len(parts) == 2 and parts[0] == "tool":
+                tool = server.tools.get(parts[1])
+                if tool is None:
+                    return self._send_json({"error": "Not found"}, 404)
+                if method == "GET":
+                    return self._send_json(tool)
+                if method == "PATCH":
+                    if "type" in body:
+                        return self._send_json({"error": "property type should not exist"}, 400)
+                    tool.update(body)
+                    return self._send_json(tool)
+                if method == "DELETE":
+                    return self._send_json(server.tools.pop(parts[1]))
+            if len(parts) == 2 and parts[0] == "assistants":
+                assistant = server.assistants.setdefault(parts[1], {"id": parts[1]})
+                if method == "PATCH":
+                    assistant.update(body)
+                return self._send_json(assistant)
+        self._send_json({"error": "Not found"}, 404)
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+    def do_PATCH(self):
+        self._handle("PATCH")
+
+    def do_DELETE(self):
+        self._handle("DELETE")
+
+
+def start(port=0, **settings):
+    """Run a stub on a background thread; returns (server, base_url)
+
+    Keyword arguments override VapiStubHandler attributes (delay, error_rate,
+    rate_limit_rate).
+    """
+    handler_class = type("ConfiguredVapiStubHandler", (VapiStubHandler,), settings)
+    server = VapiStubServer(("127.0.0.1", port), handler_class)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+if __name__ == '__main__':
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8766
+    delay = float(sys.argv[2]) / 1000 if len(sys.argv) > 2 else 0.0
+    server = VapiStubServer(("127.0.0.1", port), type("H", (VapiStubHandler,), {"delay": delay}))
+    print(f"Vapi stub listening on http://127.0.0.1:{port}")
+    server.serve_forever()
@@ -0,0 +1,147 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class VersionedCache:
+    """Process-level cache of one derived value, kept coherent across processes
+
+    Every write to the source table bumps a counter row in ``cache_versions`` (via
+    triggers, see migrations.py). A lookup only reads that counter - a primary key
+    hit - and reuses the cached value while the version is unchanged.
+    """
+
+    def __init__(self, name, loader):
+        self.name = name
+        self.loader = loader
+        self._lock = threading.Lock()
+        self._version = None
+        self._value = None
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, conn):
+        row = conn.execute(
+            "SELECT version FROM cache_versions WHERE name = ?", (self.name,)
+        ).fetchone()
+        version = row[0] if row else 0
+
+        with self._lock:
+            if self._version == version:
+                self.hits += 1
+                return self._value
+            self.misses += 1
+
+        # Version was read first, so a concurrent write can only make this value
+        # look older than it is and trigger one extra reload, never serve stale data
+        value = self.loader(conn)
+        with self._lock:
+            self._version = version
+            self._value = value
+        return value
+
+    def invalidate(self):
+        """Drop the cached value in this process (other processes see the version bump)"""
+        with self._lock:
+            self._version = None
+            self._value = None
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "cached_version": self._version}
+
+
+class UserLRUCache:
+    """Bounded LRU/TTL cache of decoded per-user read results
+
+    Entries are keyed by ``(user_id, *query)`` and evicted least-recently-used once
+    the summed size estimates exceed ``max_bytes``. Each user has a generation number
+    that ``invalidate_user`` bumps on every write, so a read that raced with a write
+    can never put its stale result back into the cache.
+    """
+
+    def __init__(self, max_bytes=32 * 1024 * 1024, ttl=30.0, clock=time.monotonic):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._keys_by_user = {}
+        self._generations = {}
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def generation(self, user_id):
+        """Snapshot to pass to ``put`` - take it before reading the database"""
+        with self._lock:
+            return self._generations.get(user_id, 0)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, size, expires = entry
+            if expires <= self.clock():
+                self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value, size, generation):
+        user_id = key[0]
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if self._generations.get(user_id, 0) != generation:
+                return
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, size, self.clock() + self.ttl)
+            self._keys_by_user.setdefault(user_id, set()).add(key)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def invalidate_user(self, user_id):
+        """Write-through invalidation: drop everything cached for this user"""
+        with self._lock:
+            self._generations[user_id] = self._generations.get(user_id, 0) + 1
+            for key in self._keys_by_user.pop(user_id, ()):
+                _, size, _ = self._entries.pop(key)
+                self._bytes -= size
+            self.invalidations += 1
+
+    def _remove(self, key):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+        keys = self._keys_by_user.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_user[key[0]]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+
+def rows_size(rows):
+    """Cheap footprint estimate for a list of fetched rows"""
+    return sum(len(col) if isinstance(col, (str, bytes)) else 8 for row in rows for col in row) + 64 * len(rows)
@@ -0,0 +1,481 @@
+import os
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+
+from memory_content import register_functions
+from metrics import pool_wait_seconds, sql_seconds, statement_name, write_seconds, write_wait_seconds
+from prism_logging import logger
+
+BUSY_TIMEOUT_MS = 5000
+
+# Per-statement timing costs a few microseconds per query; PRISM_SQL_METRICS=0 turns it off
+SQL_METRICS = os.environ.get('PRISM_SQL_METRICS', '1') != '0'
+
+# PRAGMAs applied once to every pooled connection. WAL lets readers run while the
+# writer commits; synchronous=NORMAL only fsyncs the WAL at checkpoints.
+CONNECTION_PRAGMAS = (
+    f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA foreign_keys = ON",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -16000",
+    "PRAGMA mmap_size = 134217728",
+)
+
+
+class ConnectionPool:
+    """Bounded pool of long-lived SQLite connections shared across requests"""
+
+    def __init__(self, database_path, max_size=8, timeout=10.0):
+        self.database_path = database_path
+        self.max_size = max_size
+        self.timeout = timeout
+        self._idle = queue.LifoQueue(maxsize=max_size)
+        self._lock = threading.Lock()
+        self._created = 0
+
+    def _connect(self):
+        return connect(self.database_path, self.timeout)
+
+    def _checkout(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            if self._created < self.max_size:
+                self._created += 1
+                try:
+                    return self._connect()
+                except Exception:
+                    self._created -= 1
+                    raise
+
+        try:
+            return self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise TimeoutError("Timed out waiting for a database connection")
+
+    def _release(self, conn, broken=False):
+        if broken:
+            conn.close()
+            with self._lock:
+                self._created -= 1
+            return
+        self._idle.put_nowait(conn)
+
+    @contextmanager
+    def connection(self):
+        """Check out a connection, rolling back and returning it even if the caller raises"""
+        started = time.perf_counter()
+        conn = self._checkout()
+        pool_wait_seconds.observe(time.perf_counter() - started)
+        broken = False
+        try:
+            yield conn
+        except BaseException:
+            broken = not _rollback(conn)
+            raise
+        else:
+            if conn.in_transaction:
+                broken = not _rollback(conn)
+        finally:
+            self._release(conn, broken)
+
+    def close_all(self):
+        """Close every idle connection (used on shutdown and in benchmarks)"""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._lock:
+                self._created -= 1
+
+
+class WriteQueue:
+    """Single writer thread that owns the only write connection to the database
+
+    Callers submit ``fn(conn)`` jobs; each job runs in its own transaction on the
+    writer thread so concurrent requests never contend for SQLite's write lock.
+    """
+
+    def __init__(self, database_path, max_pending=1024, timeout=10.0):
+        self.database_path = database_path
+        self.timeout = timeout
+        self._jobs = queue.Queue(maxsize=max_pending)
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                thread = threading.Thread(target=self._run, name="prism-db-writer", daemon=True)
+                thread.start()
+                self._thread = thread
+
+    def _run(self):
+        conn = connect(self.database_path, self.timeout)
+        try:
+            while True:
+                job = self._jobs.get()
+                if job is None:
+                    break
+                fn, future, submitted = job
+                if not future.set_running_or_notify_cancel():
+                    continue
+                started = time.perf_counter()
+                write_wait_seconds.observe(started - submitted)
+                try:
+                    with conn:
+                        result = fn(conn)
+                except BaseException as e:
+                    future.set_exception(e)
+                else:
+                    future.set_result(result)
+                finally:
+                    write_seconds.observe(time.perf_counter() - started)
+        finally:
+            conn.close()
+
+    def submit(self, fn):
+        """Queue ``fn(conn)`` for the writer thread and return a Future for its result"""
+        self._ensure_started()
+        future = Future()
+        try:
+            self._jobs.put((fn, future, time.perf_counter()), timeout=self.timeout)
+        except queue.Full:
+            raise TimeoutError("Database write queue is full")
+        return future
+
+    def run(self, fn):
+        """Run ``fn(conn)`` on the writer thread and wait for its result"""
+        return self.submit(fn).result()
+
+    def close(self):
+        """Drain pending jobs and stop the writer thread"""
+        with self._start_lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._jobs.put(None)
+            thread.join()
+
+
+class WriteBufferFull(Exception):
+    """Raised when the write-behind buffer stays full past the enqueue timeout"""
+
+
+class WriteBehindBuffer:
+    """Coalesces fire-and-forget inserts into batched ``executemany`` transactions
+
+    Rows are flushed through the writer thread once ``batch_size`` rows are waiting
+    or ``flush_interval`` seconds after the first one arrived. The queue is bounded:
+    when it is full, ``enqueue`` blocks up to ``enqueue_timeout`` and then raises
+    WriteBufferFull so callers can shed load instead of growing memory.
+    """
+
+    _FLUSH = object()
+
+    def __init__(self, writer, max_pending=10000, batch_size=256, flush_interval=0.05,
+                 enqueue_timeout=1.0):
+        self.writer = writer
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.enqueue_timeout = enqueue_timeout
+        self._rows = queue.Queue(maxsize=max_pending)
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            "enqueued": 0,
+            "flushed_rows": 0,
+            "failed_rows": 0,
+            "rejected": 0,
+            "flushes": 0,
+            "flush_seconds_total": 0.0,
+            "flush_seconds_max": 0.0,
+        }
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                thread = threading.Thread(target=self._run, name="prism-write-behind", daemon=True)
+                thread.start()
+                self._thread = thread
+
+    def enqueue(self, sql, params):
+        """Queue one row for a batched insert; returns as soon as it is buffered"""
+        self._ensure_started()
+        try:
+            self._rows.put((sql, params), timeout=self.enqueue_timeout)
+        except queue.Full:
+            with self._stats_lock:
+                self._stats["rejected"] += 1
+            raise WriteBufferFull("Write buffer is full")
+        with self._stats_lock:
+            self._stats["enqueued"] += 1
+
+    def flush(self):
+        """Block until every row enqueued before this call has been written"""
+        with self._stats_lock:
+            pending = self._stats["enqueued"] - self._stats["flushed_rows"] - self._stats["failed_rows"]
+        if self._thread is None or pending <= 0:
+            return
+        done = threading.Event()
+        self._rows.put((self._FLUSH, done))
+        done.wait()
+
+    def _run(self):
+        while True:
+            item = self._rows.get()
+            if item is None:
+                return
+            batch, waiters, stop = [], [], False
+            deadline = time.monotonic() + self.flush_interval
+            while True:
+                if item is None:
+                    stop = True
+                    break
+                if item[0] is self._FLUSH:
+                    waiters.append(item[1])
+                    break
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    break
+                remaining = deadline - time.monotonic()
+                try:
+                    item = self._rows.get(timeout=remaining) if remaining > 0 else self._rows.get_nowait()
+                except queue.Empty:
+                    break
+            try:
+                if batch:
+                    self._write(batch)
+            except Exception:
+                # Never let the flush thread die: the buffer would fill and flush() hang
+                logger.exception("write-behind flush failed", extra={"fields": {"rows": len(batch)}})
+            finally:
+                for done in waiters:
+                    done.set()
+            if stop:
+                return
+
+    def _write(self, batch):
+        # Group consecutive rows by statement so each group is a single executemany
+        groups = []
+        for sql, params in batch:
+            if groups and groups[-1][0] == sql:
+                groups[-1][1].append(params)
+            else:
+                groups.append((sql, [params]))
+
+        def write_all(conn):
+            for sql, rows in groups:
+                conn.executemany(sql, rows)
+
+        started = time.perf_counter()
+        failed = 0
+        try:
+            self.writer.run(write_all)
+        except sqlite3.Error:
+            # One bad row must not drop the whole batch: retry rows individually
+            for sql, params in batch:
+                try:
+                    self.writer.run(lambda conn, sql=sql, params=params: conn.execute(sql, params))
+                except Exception:
+                    failed += 1
+                    logger.exception("write-behind insert failed", extra={"fields": {
+                        "statement": statement_name(sql)}})
+        except Exception:
+            # The writer itself failed (e.g. its queue stayed full): the batch is lost
+            failed = len(batch)
+            logger.exception("write-behind batch failed", extra={"fields": {"rows": failed}})
+        elapsed = time.perf_counter() - started
+
+        with self._stats_lock:
+            self._stats["flushes"] += 1
+            self._stats["flushed_rows"] += len(batch) - failed
+            self._stats["failed_rows"] += failed
+            self._stats["flush_seconds_total"] += elapsed
+            self._stats["flush_seconds_max"] = max(self._stats["flush_seconds_max"], elapsed)
+
+    def stats(self):
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats["queue_depth"] = self._rows.qsize()
+        stats["flush_seconds_avg"] = (
+            stats["flush_seconds_total"] / stats["flushes"] if stats["flushes"] else 0.0
+        )
+        return stats
+
+    def close(self):
+        """Flush everything still buffered and stop the flush thread"""
+        with self._start_lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._rows.put(None)
+            thread.join()
+
+
+class Database:
+    """Reads go through the connection pool, writes through the single writer thread"""
+
+    def __init__(self, database_path, pool_size=8, timeout=10.0):
+        self.database_path = database_path
+        self.pool = ConnectionPool(database_path, max_size=pool_size, timeout=timeout)
+        self.writer = WriteQueue(database_path, timeout=timeout)
+        self.buffer = WriteBehindBuffer(self.writer)
+
+    def read(self):
+        return self.pool.connection()
+
+    def write(self, fn):
+        return self.writer.run(fn)
+
+    def execute_write(self, sql, params=()):
+        """Run a single write statement and return the new row id"""
+        return self.write(lambda conn: conn.execute(sql, params).lastrowid)
+
+    def enqueue_write(self, sql, params=()):
+        """Buffer a fire-and-forget insert for the next batched flush"""
+        self.buffer.enqueue(sql, params)
+
+    def flush_writes(self):
+        """Wait for buffered inserts so a following read sees them"""
+        self.buffer.flush()
+
+    def close(self):
+        self.buffer.close()
+        self.writer.close()
+        self.pool.close_all()
+
+
+class BoundDatabase:
+    """The Database interface bound to one connection that is already in a transaction
+
+    Used on the writer thread to run several handlers in a single transaction:
+    reads and writes all go to ``conn`` and buffered inserts are written immediately.
+    ``owner`` is the Database whose writer thread runs the transaction.
+    """
+
+    def __init__(self, conn, owner=None):
+        self.conn = conn
+        self.owner = owner
+
+    @contextmanager
+    def read(self):
+        yield self.conn
+
+    def write(self, fn):
+        return fn(self.conn)
+
+    def execute_write(self, sql, params=()):
+        return self.conn.execute(sql, params).lastrowid
+
+    def enqueue_write(self, sql, params=()):
+        self.conn.execute(sql, params)
+
+    def flush_writes(self):
+        # Already on the writer thread; waiting for the buffer here would deadlock
+        pass
+
+
+class TimedCursor(sqlite3.Cursor):
+    """Cursor that records every statement's latency in ``prism_sql_seconds``
+
+    Statements returning rows are timed through their first ``fetchone``/``fetchall``,
+    where SQLite does most of the work; rows iterated lazily after that are not.
+    """
+
+    _pending = None
+
+    def execute(self, sql, parameters=()):
+        started = time.perf_counter()
+        super().execute(sql, parameters)
+        self._executed(sql, started)
+        return self
+
+    def executemany(self, sql, seq_of_parameters):
+        started = time.perf_counter()
+        super().executemany(sql, seq_of_parameters)
+        self._executed(sql, started)
+        return self
+
+    def _executed(self, sql, started):
+        elapsed = time.perf_counter() - started
+        if self.description is None:
+            self._pending = None
+            sql_seconds.observe(elapsed, statement_name(sql))
+        else:
+            self._pending = (sql, elapsed)
+
+    def _fetched(self, started):
+        sql, elapsed = self._pending
+        self._pending = None
+        sql_seconds.observe(elapsed + time.perf_counter() - started, statement_name(sql))
+
+    def fetchone(self):
+        if self._pending is None:
+            return super().fetchone()
+        started = time.perf_counter()
+        row = super().fetchone()
+        self._fetched(started)
+        return row
+
+    def fetchall(self):
+        if self._pending is None:
+            return super().fetchall()
+        started = time.perf_counter()
+        rows = super().fetchall()
+        self._fetched(started)
+        return rows
+
+
+class TimedConnection(sqlite3.Connection):
+    def cursor(self, factory=TimedCursor):
+        return super().cursor(factory)
+
+    # The C shortcuts bypass cursor(), so route them through a TimedCursor explicitly
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+
+def connect(database_path, timeout=10.0):
+    """Open a connection with the PRISM PRAGMAs and SQL functions applied"""
+    conn = sqlite3.connect(database_path, timeout=timeout, check_same_thread=False,
+                           factory=TimedConnection if SQL_METRICS else sqlite3.Connection)
+    for pragma in CONNECTION_PRAGMAS:
+        conn.execute(pragma)
+    # Compressed-content files (memory_content.py) call it from their FTS triggers
+    register_functions(conn)
+    return conn
+
+
+def enable_wal(conn):
+    """Switch the database file to WAL mode (persistent, so only needed once)"""
+    if not conn.execute("SELECT 1 FROM sqlite_master").fetchone():
+        # A brand-new file can still pick auto_vacuum, but only before WAL or any
+        # table exists; INCREMENTAL lets retention.py return freed pages in small steps
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+    mode = conn.execute("PRAGMA journal_mode = WAL").fetchone()[0]
+    return mode.lower() == 'wal'
+
+
+def _rollback(conn):
+    try:
+        conn.rollback()
+        return True
+    except sqlite3.Error:
+        return False
@@ -0,0 +1,253 @@
+"""Shared request pipeline for the tool webhooks.
+
+Every tool call goes through the same steps:
+
+1. dig ``message.functionCall.parameters`` out of the Vapi body
+2. validate them against the tool's JSON schema (tool_schemas.py), compiled once
+   at import into plain Python checks
+3. look the action up in the tool's action table
+4. pick the database for the call and run the action's handler
+
+A malformed payload (including a ``call`` envelope of the wrong shape), a value
+outside the schema or an action with no handler gets a 400 at step 2 or 3, before
+any database is touched. Handlers receive a
+``Call`` and a database and return the ``result`` object. The pipeline wraps it
+as ``{"result": ...}`` and maps InvalidCall (a value the schema cannot check,
+such as a pagination cursor) to 400, WriteBufferFull to 503 and other exceptions
+to 500.
+
+The validator covers the JSON Schema subset the tool schemas use: type, enum,
+required, properties, items, minimum and maximum. Properties the schema does not
+list are let through, and so is a null optional property.
+"""
+import hmac
+import os
+import time
+
+from db import WriteBufferFull
+from prism_logging import debug, debug_enabled, elapsed_ms, logger
+
+# Shared secret Vapi sends in X-Vapi-Secret (the assistant's server secret)
+WEBHOOK_SECRET = os.environ.get('PRISM_WEBHOOK_SECRET', '')
+
+_TYPES = {
+    "string": str,
+    "integer": int,
+    "number": (int, float),
+    "boolean": bool,
+    "object": dict,
+    "array": list,
+}
+
+
+class InvalidCall(ValueError):
+    """Raised by a handler for a parameter the schema accepted but the handler cannot use"""
+
+
+def verify_webhook_secret(request_data, headers=None):
+    """Verify webhook secret from Vapi
+
+    With ``headers`` (the export routes), the request must carry PRISM_WEBHOOK_SECRET
+    in X-Vapi-Secret, and nothing passes while no secret is configured.
+    """
+    if headers is None:
+        # In production, implement proper webhook verification
+        return True
+    supplied = headers.get('X-Vapi-Secret') or ''
+    return bool(WEBHOOK_SECRET) and hmac.compare_digest(supplied.encode(), WEBHOOK_SECRET.encode())
+
+
+def _check_call(call, path):
+    if not isinstance(call, dict):
+        raise ValueError(f"{path} must be an object")
+    if 'id' in call and not isinstance(call['id'], str):
+        raise ValueError(f"{path}.id must be a string")
+    if 'customer' in call:
+        customer = call['customer']
+        if not isinstance(customer, dict):
+            raise ValueError(f"{path}.customer must be an object")
+        if 'phoneNumber' in customer and not isinstance(customer['phoneNumber'], str):
+            raise ValueError(f"{path}.customer.phoneNumber must be a string")
+
+
+def check_envelope(request_data):
+    """Raise ValueError unless the Vapi ``call`` object has usable types
+
+    Checked at the top level, which the pipeline reads, and under ``message``,
+    where Vapi server messages carry it.
+    """
+    if not isinstance(request_data, dict):
+        raise ValueError("request body must be a JSON object")
+    if 'call' in request_data:
+        _check_call(request_data['call'], "call")
+    message = request_data.get('message')
+    if isinstance(message, dict) and 'call' in message:
+        _check_call(message['call'], "message.call")
+
+
+def get_user_id_from_call(request_data):
+    """Extract user ID from Vapi call data"""
+    # This would extract user ID from the call context
+    # For now, using a default user
+    return request_data.get('call', {}).get('customer', {}).get('phoneNumber', 'default_user')
+
+
+def get_request_id(request_data):
+    """Vapi call id, used to switch on debug logging for one call"""
+    return request_data.get('call', {}).get('id')
+
+
+def compile_schema(schema, path="parameters"):
+    """A ``check(value, errors)`` function for ``schema`` that appends one message per problem"""
+    checks = []
+
+    expected = schema.get("type")
+    if expected is not None:
+        types = _TYPES[expected]
+        # bool is an int subclass, but true is not a valid integer
+        reject_bool = expected != "boolean"
+
+        def check_type(value, errors):
+            if not isinstance(value, types) or (reject_bool and isinstance(value, bool)):
+                errors.append(f"{path}: expected {expected}")
+                return False
+            return True
+    else:
+        def check_type(value, errors):
+            return True
+
+    if "enum" in schema:
+        allowed = frozenset(schema["enum"])
+        listed = ", ".join(map(str, schema["enum"]))
+
+        def check_enum(value, errors):
+            if value not in allowed:
+                errors.append(f"{path}: must be one of {listed}")
+        checks.append(check_enum)
+
+    if "minimum" in schema or "maximum" in schema:
+        low, high = schema.get("minimum"), schema.get("maximum")
+
+        bounds = " and ".join(bound for bound in (low is not None and f">= {low}", high is not None and f"<= {high}")
+                              if bound)
+
+        def check_range(value, errors):
+            if (low is not None and value < low) or (high is not None and value > high):
+                errors.append(f"{path}: must be {bounds}")
+        checks.append(check_range)
+
+    if expected == "object":
+        required = tuple(schema.get("required", ()))
+        properties = {name: compile_schema(sub, f"{path}.{name}")
+                      for name, sub in schema.get("properties", {}).items()}
+
+        def check_object(value, errors):
+            for name in required:
+                if value.get(name) is None:
+                    errors.append(f"{path}.{name}: required")
+            for name, item in value.items():
+                check = properties.get(name)
+                if check is not None and item is not None:
+                    check(item, errors)
+        checks.append(check_object)
+
+    if expected == "array" and "items" in schema:
+        check_item = compile_schema(schema["items"], f"{path}[]")
+
+        def check_array(value, errors):
+            for item in value:
+                check_item(item, errors)
+        checks.append(check_array)
+
+    def check(value, errors):
+        if check_type(value, errors):
+            for step in checks:
+                step(value, errors)
+
+    return check
+
+
+class Call:
+    """One tool call, as handed to an action handler"""
+    __slots__ = ("data", "parameters", "action", "user_id", "request_id", "bound")
+
+    def __init__(self, data, parameters, action, bound):
+        self.data = data
+        self.parameters = parameters
+        self.action = action
+        self.user_id = get_user_id_from_call(data)
+        self.request_id = get_request_id(data)
+        # The database a batch bound this call to, or None outside a batch
+        self.bound = bound
+
+
+class Tool:
+    """A webhook endpoint: schema validation plus a table of action handlers
+
+    ``route(call)`` picks the database for a call. An action can override it at
+    registration. Tools without an ``action`` parameter (thought_logger) register
+    one handler under ``None``.
+    """
+
+    def __init__(self, name, schema, route, action_key="action"):
+        self.__name__ = name
+        self.schema = schema
+        self.route = route
+        self.action_key = action_key
+        self.actions = {}
+        self._check = compile_schema(schema)
+
+    def action(self, name=None, route=None):
+        """Register the decorated ``handler(call, db)`` for ``name``"""
+        def register(handler):
+            self.actions[name] = (handler, route or self.route)
+            return handler
+        return register
+
+    def validate(self, data):
+        """``(parameters, action, (handler, route))`` for a request, or raise ValueError naming every problem"""
+        check_envelope(data)
+        try:
+            parameters = data['message']['functionCall']['parameters']
+        except (KeyError, TypeError):
+            raise ValueError("message.functionCall.parameters is required") from None
+        errors = []
+        self._check(parameters, errors)
+        if errors:
+            raise ValueError("; ".join(errors))
+        action = parameters.get(self.action_key) if self.action_key else None
+        if action not in self.actions:
+            raise ValueError(f"Unsupported action: {action}")
+        return parameters, action, self.actions[action]
+
+    def __call__(self, data, db=None, headers=None):
+        # ``headers``: the HTTP request headers, added to the request's debug dump
+        started = time.perf_counter()
+        try:
+            if not verify_webhook_secret(data):
+                return {"error": "Unauthorized"}, 401
+            parameters, action, (handler, route) = self.validate(data)
+        except ValueError as e:
+            return {"error": f"Invalid {self.__name__} call: {e}"}, 400
+
+        call = Call(data, parameters, action, db)
+        dump = debug_enabled(call.user_id, call.request_id)
+        if dump:
+            extra = {"headers": headers} if headers is not None else {}
+            debug(f"{self.__name__} request", user_id=call.user_id, request_id=call.request_id, body=data, **extra)
+        try:
+            result = handler(call, route(call))
+        except InvalidCall as e:
+            return {"error": f"Invalid {self.__name__} call: {e}"}, 400
+        except WriteBufferFull as e:
+            return {"error": str(e)}, 503
+        except Exception as e:
+            # The traceback goes to the log, not back to the caller
+            logger.exception(f"{self.__name__} failed", extra={"fields": {
+                "user_id": call.user_id, "request_id": call.request_id, "action": action,
+                "duration_ms": elapsed_ms(started)}})
+            return {"error": str(e)}, 500
+        if dump:
+            debug(f"{self.__name__} result", user_id=call.user_id, request_id=call.request_id,
+                  action=action, result=result, duration_ms=elapsed_ms(started))
+        return {"result": result}, 200
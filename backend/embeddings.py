@@ -0,0 +1,279 @@
+"""Semantic recall for memories: local embeddings plus a per-user vector index.
+
+Vectors are float32, L2-normalised and stored as BLOBs in ``memory_vectors`` next to
+the memory they describe. Each process keeps an in-memory matrix per recently used
+user that grows by catching up on rows newer than the last one it loaded, so the
+index is never rebuilt from scratch. Ids of memories deleted since are pruned
+when a search turns one up. NumPy is optional: without it semantic recall is
+unavailable and memories are stored without vectors.
+
+Usage: python embeddings.py [database_path]   (backfill vectors for older memories;
+       run it before starting the servers so loaded indexes include them)
+"""
+import hashlib
+import importlib
+import json
+import math
+import os
+import re
+import sys
+import threading
+from collections import OrderedDict
+
+from memory_content import content_text
+
+try:
+    import numpy as np
+except ImportError:  # semantic recall is optional
+    np = None
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+
+class HashingEmbedder:
+    """Offline fallback embedder: signed feature hashing of words and word bigrams"""
+
+    name = "hashing-v1"
+
+    def __init__(self, dim=256):
+        self.dim = dim
+
+    def _features(self, text):
+        words = [w.lower() for w in _TOKEN.findall(text)]
+        return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+    def embed(self, text):
+        vector = np.zeros(self.dim, dtype=np.float32)
+        counts = {}
+        for feature in self._features(text):
+            counts[feature] = counts.get(feature, 0) + 1
+        for feature, count in counts.items():
+            digest = hashlib.blake2b(feature.encode(), digest_size=8).digest()
+            bucket = int.from_bytes(digest[:4], 'little') % self.dim
+            sign = 1.0 if digest[4] & 1 else -1.0
+            vector[bucket] += sign * (1.0 + math.log(count))
+        norm = float(np.linalg.norm(vector))
+        if norm:
+            vector /= norm
+        return vector
+
+
+def _load_embedder():
+    # PRISM_EMBEDDER="package.module:factory" plugs in any object with .dim,
+    # .name and .embed(text) -> float32 vector
+    spec = os.environ.get('PRISM_EMBEDDER')
+    if not spec:
+        return HashingEmbedder()
+    module_name, _, attr = spec.partition(':')
+    return getattr(importlib.import_module(module_name), attr)()
+
+
+_embedder = None
+
+
+def get_embedder():
+    """The process-wide embedder, or None when NumPy is not installed"""
+    global _embedder
+    if np is None:
+        return None
+    if _embedder is None:
+        _embedder = _load_embedder()
+    return _embedder
+
+
+def set_embedder(embedder):
+    global _embedder
+    _embedder = embedder
+    vector_index.clear()
+
+
+def memory_text(content, topic=''):
+    """Flatten a memory's JSON content into the text that gets embedded"""
+    parts = [topic or '']
+
+    def walk(value):
+        if isinstance(value, dict):
+            for item in value.values():
+                walk(item)
+        elif isinstance(value, (list, tuple)):
+            for item in value:
+                walk(item)
+        elif value is not None:
+            parts.append(str(value))
+
+    walk(content)
+    return ' '.join(part for part in parts if part)
+
+
+def store_vector(conn, memory_id, user_id, vector):
+    conn.execute(
+        "INSERT OR REPLACE INTO memory_vectors (memory_id, user_id, vector) VALUES (?, ?, ?)",
+        (memory_id, user_id, vector.astype(np.float32).tobytes()),
+    )
+
+
+class _UserVectors:
+    __slots__ = ('ids', 'matrix', 'size', 'last_id')
+
+    def __init__(self, dim):
+        self.ids = np.zeros(64, dtype=np.int64)
+        self.matrix = np.zeros((64, dim), dtype=np.float32)
+        self.size = 0
+        self.last_id = 0
+
+    def extend(self, ids, vectors):
+        needed = self.size + len(ids)
+        if needed > len(self.ids):
+            # Leave headroom so the next few appends don't copy a large matrix again
+            capacity = max(needed + needed // 8 + 64, len(self.ids) * 2)
+            self.ids = np.resize(self.ids, capacity)
+            grown = np.zeros((capacity, self.matrix.shape[1]), dtype=np.float32)
+            grown[:self.size] = self.matrix[:self.size]
+            self.matrix = grown
+        self.ids[self.size:needed] = ids
+        self.matrix[self.size:needed] = vectors
+        self.size = needed
+        self.last_id = int(ids[-1])
+
+    def keep(self, mask):
+        """Drop the rows where ``mask`` is False"""
+        kept = int(mask.sum())
+        if kept == self.size:
+            return 0
+        # New arrays rather than compacting in place: a search running outside the
+        # lock may still hold views of the old ones
+        ids = np.zeros_like(self.ids)
+        matrix = np.zeros_like(self.matrix)
+        ids[:kept] = self.ids[:self.size][mask]
+        matrix[:kept] = self.matrix[:self.size][mask]
+        dropped, self.size = self.size - kept, kept
+        self.ids, self.matrix = ids, matrix
+        return dropped
+
+
+class VectorIndex:
+    """Per-user in-memory vector matrices with incremental catch-up from SQLite
+
+    Only the ``max_users`` most recently queried users stay loaded; an evicted user
+    is reloaded lazily on their next semantic query. Catch-up only sees new rows, so
+    ids whose memory was deleted, archived or moved to another shard stay loaded
+    until ``prune`` drops them.
+    """
+
+    def __init__(self, max_users=256):
+        self.max_users = max_users
+        self._lock = threading.Lock()
+        self._users = OrderedDict()
+
+    def clear(self):
+        with self._lock:
+            self._users.clear()
+
+    def _catch_up(self, conn, user_id, dim):
+        with self._lock:
+            vectors = self._users.get(user_id)
+            if vectors is None:
+                vectors = self._users[user_id] = _UserVectors(dim)
+            self._users.move_to_end(user_id)
+            while len(self._users) > self.max_users:
+                self._users.popitem(last=False)
+            last_id = vectors.last_id
+
+        rows = conn.execute(
+            "SELECT memory_id, vector FROM memory_vectors WHERE user_id = ? AND memory_id > ? ORDER BY memory_id",
+            (user_id, last_id),
+        ).fetchall()
+        if rows:
+            ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+            matrix = np.frombuffer(b''.join(row[1] for row in rows), dtype=np.float32).reshape(len(rows), dim)
+            with self._lock:
+                # Another thread may have caught up meanwhile; only append what is new
+                fresh = ids > vectors.last_id
+                if fresh.any():
+                    vectors.extend(ids[fresh], matrix[fresh])
+        return vectors
+
+    def prune(self, conn, user_id):
+        """Drop the user's ids that no longer have a vector; returns how many"""
+        with self._lock:
+            vectors = self._users.get(user_id)
+            if vectors is None:
+                return 0
+            last_id = vectors.last_id
+        live = np.fromiter((row[0] for row in conn.execute(
+            "SELECT memory_id FROM memory_vectors WHERE user_id = ? AND memory_id <= ?", (user_id, last_id))),
+            dtype=np.int64)
+        with self._lock:
+            ids = vectors.ids[:vectors.size]
+            # Rows appended since the read above are newer than last_id and stay
+            return vectors.keep(np.isin(ids, live) | (ids > last_id))
+
+    def search(self, conn, user_id, query_vector, k=10):
+        """Memory ids of the user's k most similar memories, best first"""
+        vectors = self._catch_up(conn, user_id, len(query_vector))
+        with self._lock:
+            size = vectors.size
+            if not size:
+                return []
+            scores = vectors.matrix[:size] @ query_vector
+            ids = vectors.ids[:size]
+        k = min(k, size)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [int(ids[i]) for i in top]
+
+
+vector_index = VectorIndex(max_users=int(os.environ.get('PRISM_VECTOR_INDEX_USERS', 256)))
+
+
+def semantic_search(conn, user_id, query, limit=10):
+    """Memories ranked by cosine similarity to the query text"""
+    query_vector = get_embedder().embed(query)
+    while True:
+        memory_ids = vector_index.search(conn, user_id, query_vector, k=limit)
+        if not memory_ids:
+            return []
+        placeholders = ','.join('?' * len(memory_ids))
+        rows = conn.execute(f'''
+            SELECT id, memory_type, content, timestamp, emotion, topic
+            FROM memories WHERE id IN ({placeholders}) AND user_id = ?
+        ''', (*memory_ids, user_id)).fetchall()
+        by_id = {row[0]: row for row in rows}
+        # Some memories are gone since they were indexed: drop every stale id of the
+        # user at once, then search again so the result still has ``limit`` rows
+        if len(by_id) == len(memory_ids) or not vector_index.prune(conn, user_id):
+            return [by_id[memory_id] for memory_id in memory_ids if memory_id in by_id]
+
+
+def backfill_vectors(conn, batch_size=1000):
+    """Embed memories that have no vector yet; returns how many were added"""
+    embedder = get_embedder()
+    added = 0
+    while True:
+        rows = conn.execute('''
+            SELECT m.id, m.user_id, m.content, m.topic
+            FROM memories m
+            LEFT JOIN memory_vectors v ON v.memory_id = m.id
+            WHERE m.user_id IS NOT NULL AND v.memory_id IS NULL
+            LIMIT ?
+        ''', (batch_size,)).fetchall()
+        if not rows:
+            return added
+        with conn:
+            for memory_id, user_id, content, topic in rows:
+                text = content_text(content)
+                try:
+                    decoded = json.loads(text) if text else {}
+                except ValueError:
+                    decoded = text
+                store_vector(conn, memory_id, user_id, embedder.embed(memory_text(decoded, topic)))
+        added += len(rows)
+
+
+if __name__ == '__main__':
+    import sqlite3
+
+    if np is None:
+        sys.exit("numpy is required to build memory vectors")
+    conn = sqlite3.connect(sys.argv[1] if len(sys.argv) > 1 else "prism_data.db")
+    print(f"embedded {backfill_vectors(conn)} memories")
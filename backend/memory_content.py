@@ -0,0 +1,164 @@
+"""Storage formats for memories.content, and passing it through to responses.
+
+Two formats, chosen per database file with ``PRISM_CONTENT_FORMAT``:
+
+* ``json`` (default, recommended): content is the ``json.dumps`` text, as it
+  always was
+* ``zlib``: content is a BLOB holding a format byte, then the same JSON text raw
+  deflated with a preset dictionary of the keys and words memories repeat. Small
+  JSON has little redundancy of its own, so the dictionary roughly doubles the
+  savings of plain deflate (about half the bytes instead of about 70%).
+
+The saving is on content alone. The FTS index dominates the file, which only
+shrinks to about 88%, and zlib reads, searches and inserts are slower than json
+(benchmarks/bench_content_format.py). Use zlib only where that disk space
+matters more than latency.
+
+Readers accept both in any mix; the value's type says which one a row holds.
+``convert`` switches a file between formats. The fields memories are filtered and
+ranked on (user_id, memory_type, emotion, topic, importance, rank_key) are
+ordinary indexed columns written next to content, so no query has to open it.
+
+The FTS index needs the text. In the zlib layout, the triggers and the FTS
+content view decompress it with ``prism_content_text``, a function every
+connection from ``db.connect`` registers. A zlib-format file therefore cannot
+have memories written or deleted by a connection without it (e.g. the sqlite3
+shell); json-format files have no such dependency, which is why zlib is
+opt-in.
+
+Retrieve responses carry content as RawJSON, the stored text (decompressed if
+need be) without a json.loads/json.dumps round trip. ``dumps`` splices it into
+the response verbatim.
+"""
+import json
+import os
+import zlib
+
+from search import COMPRESSED_FTS_SCHEMA, FTS_SCHEMA, drop_memory_fts
+
+FORMATS = ("json", "zlib")
+
+_DEFLATE_V1 = 1
+_WBITS = -12  # 4 KB window: plenty for memory-sized JSON and 6x cheaper to set up than 32 KB
+_DICTIONARY_V1 = (
+    b' the and that this with have been about they their want wants would like likes prefers feel feels'
+    b' felt feeling really today yesterday morning evening week weekend work job team family friend'
+    b' health learning project goal plan started trying talked mentioned said says asked help time'
+    b'"details": "", "context": "", "summary": "", "preference": "", "reason": "", "source": "'
+    b'"user_preference", "conversation_context", "emotional_state", "goal_tracking", "learning"'
+    b'"emotion": "joy", "emotion": "calm", "emotion": "anxious", "emotion": "excited", "emotion": "'
+    b'"topic": "hobbies", "topic": "travel", "topic": "health", "topic": "family", "topic": "learning"'
+    b', "importance": 1, "topic": "work"}{"note": "'
+)
+
+# Stands in for each RawJSON value while json encodes the rest of the payload; random
+# per process so no string a user stored can pass for it
+_MARKER = f"\x00{os.urandom(4).hex()}\x00"
+_ENCODED_MARKER = json.dumps(_MARKER)
+
+
+class RawJSON:
+    """JSON text that ``dumps`` writes verbatim instead of as a string"""
+    __slots__ = ("text",)
+
+    def __init__(self, text):
+        self.text = text
+
+    def __str__(self):
+        return self.text
+
+    def __repr__(self):
+        return f"RawJSON({self.text!r})"
+
+
+def compress(text):
+    packer = zlib.compressobj(9, zlib.DEFLATED, _WBITS, 8, zlib.Z_DEFAULT_STRATEGY, zdict=_DICTIONARY_V1)
+    return bytes((_DEFLATE_V1,)) + packer.compress(text.encode()) + packer.flush()
+
+
+def content_text(stored):
+    """The JSON text of a stored content value, whichever format it is in"""
+    if not isinstance(stored, bytes):
+        return stored
+    if stored[:1] != bytes((_DEFLATE_V1,)):
+        raise ValueError(f"unknown memory content format {stored[:1]!r}")
+    unpacker = zlib.decompressobj(_WBITS, zdict=_DICTIONARY_V1)
+    return (unpacker.decompress(stored[1:]) + unpacker.flush()).decode()
+
+
+def encode(content, content_format):
+    """The value to store for a content object"""
+    text = json.dumps(content)
+    return compress(text) if content_format == "zlib" else text
+
+
+def decode(stored):
+    """Content as a Python object; {} when empty"""
+    text = content_text(stored)
+    return json.loads(text) if text else {}
+
+
+def transcode(stored, content_format):
+    """A stored value re-encoded for ``content_format`` (unchanged if it already is)"""
+    if content_format == "zlib":
+        return compress(stored) if isinstance(stored, str) else stored
+    return content_text(stored)
+
+
+def raw_json(stored):
+    """Content for a response, passed through without parsing"""
+    text = content_text(stored)
+    return RawJSON(text) if text else {}
+
+
+def dumps(payload, default=None, **kwargs):
+    """``json.dumps`` that writes RawJSON values as the JSON they hold"""
+    fragments = []
+
+    def encode_value(value):
+        if isinstance(value, RawJSON):
+            fragments.append(value.text)
+            return _MARKER
+        if default is None:
+            raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+        return default(value)
+
+    text = json.dumps(payload, default=encode_value, **kwargs)
+    if not fragments:
+        return text
+    # The encoder calls default in output order, so the markers split the text
+    # into the pieces between fragments
+    pieces = text.split(_ENCODED_MARKER)
+    return "".join(piece + fragment for piece, fragment in zip(pieces, fragments)) + pieces[-1]
+
+def register_functions(conn):
+    conn.create_function("prism_content_text", 1, content_text, deterministic=True)
+
+
+def content_format(conn):
+    """The format a database file writes memory content in"""
+    # The zlib layout is defined by its FTS source view
+    found = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'view' AND name = 'memories_fts_source'").fetchone()
+    return "zlib" if found else "json"
+
+
+def convert(conn, content_format_):
+    """Re-encode every memory and swap the FTS layout (inside the caller's transaction)
+
+    Returns the number of rows re-encoded; 0 when the file already uses the format.
+    """
+    if content_format_ not in FORMATS:
+        raise ValueError(f"unknown content format {content_format_!r}; expected one of {FORMATS}")
+    if content_format(conn) == content_format_:
+        return 0
+    register_functions(conn)
+    conn.create_function("prism_transcode", 1, lambda stored: transcode(stored, content_format_), deterministic=True)
+    # The old triggers would re-index every updated row; the index is rebuilt once below
+    drop_memory_fts(conn)
+    wrong_type = 'text' if content_format_ == "zlib" else 'blob'
+    converted = conn.execute(f"UPDATE memories SET content = prism_transcode(content) WHERE typeof(content) = '{wrong_type}'"
+                             ).rowcount
+    for statement in COMPRESSED_FTS_SCHEMA if content_format_ == "zlib" else FTS_SCHEMA:
+        conn.execute(statement)
+    conn.execute("INSERT INTO memories_fts (memories_fts) VALUES ('rebuild')")
+    return converted
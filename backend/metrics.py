@@ -0,0 +1,171 @@
+"""In-process counters and latency histograms, rendered for Prometheus on /metrics.
+
+Recording costs one ``bisect`` plus a few increments under the metric's lock.
+Nothing is formatted until the endpoint is scraped, so an unscraped server only
+pays for that bookkeeping. Each metric stores at most ``max_series`` label
+combinations. Further combinations fold into an ``other`` series, so label values
+taken from requests (tool actions, SQL text) can't grow memory without bound.
+"""
+import re
+import threading
+import time
+from bisect import bisect_left
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names, values, extra=''):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, help_text, label_names=(), max_series=500):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(label_names)
+        self.max_series = max_series
+        self._lock = threading.Lock()
+        self._series = {}
+
+    def _key(self, labels):
+        if labels in self._series or len(self._series) < self.max_series:
+            return labels
+        return ('other',) * len(self.label_names)
+
+    def _header(self):
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            key = self._key(labels)
+            self._series[key] = self._series.get(key, 0) + amount
+
+    def render(self):
+        with self._lock:
+            series = sorted(self._series.items())
+        lines = self._header()
+        for labels, value in series:
+            lines.append(f"{self.name}{_labels(self.label_names, labels)} {_number(value)}")
+        return lines
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help_text, label_names=(), buckets=LATENCY_BUCKETS, max_series=500):
+        super().__init__(name, help_text, label_names, max_series)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, *labels):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            key = self._key(labels)
+            series = self._series.get(key)
+            if series is None:
+                # per-bucket counts (last one is +Inf), then sum
+                series = self._series[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def render(self):
+        with self._lock:
+            series = sorted((labels, list(values)) for labels, values in self._series.items())
+        lines = self._header()
+        for labels, values in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), values):
+                cumulative += count
+                le = f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{_labels(self.label_names, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, labels)} {_number(values[-1])}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, labels)} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def counter(self, name, help_text, label_names=(), **kwargs):
+        metric = Counter(name, help_text, label_names, **kwargs)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name, help_text, label_names=(), **kwargs):
+        metric = Histogram(name, help_text, label_names, **kwargs)
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+http_requests = registry.counter(
+    "prism_http_requests_total", "HTTP requests by endpoint and status", ("endpoint", "status"))
+http_seconds = registry.histogram(
+    "prism_http_request_seconds", "HTTP request latency, JSON decode/encode included", ("endpoint",))
+http_request_bytes = registry.histogram(
+    "prism_http_request_bytes", "HTTP request body size", ("endpoint",), buckets=SIZE_BUCKETS)
+http_response_bytes = registry.histogram(
+    "prism_http_response_bytes", "HTTP response body size", ("endpoint",), buckets=SIZE_BUCKETS)
+
+tool_calls = registry.counter(
+    "prism_tool_calls_total", "Tool handler calls by action and status", ("tool", "action", "status"))
+tool_seconds = registry.histogram(
+    "prism_tool_seconds", "Tool handler latency by action", ("tool", "action"))
+
+sql_seconds = registry.histogram(
+    "prism_sql_seconds", "SQL statement latency, execute through first fetch", ("statement",))
+pool_wait_seconds = registry.histogram(
+    "prism_db_pool_wait_seconds", "Time spent waiting to check out a read connection")
+write_wait_seconds = registry.histogram(
+    "prism_db_write_wait_seconds", "Time a write job waited for the writer thread")
+write_seconds = registry.histogram(
+    "prism_db_write_seconds", "Write transaction duration (SQLite write lock hold time)")
+
+
+def observe_request(endpoint, status, started, request_bytes, response_bytes):
+    """Record one HTTP request; ``started`` is a ``time.perf_counter()`` reading"""
+    http_requests.inc(endpoint, status)
+    http_seconds.observe(time.perf_counter() - started, endpoint)
+    http_request_bytes.observe(request_bytes, endpoint)
+    http_response_bytes.observe(response_bytes, endpoint)
+
+
+_PLACEHOLDER_RUN = re.compile(r"\?(?:\s*,\s*\?)+")
+_statement_names = {}
+
+
+def statement_name(sql):
+    """Stable label for a SQL string: whitespace collapsed and ``?, ?, ?`` runs folded"""
+    name = _statement_names.get(sql)
+    if name is None:
+        name = _PLACEHOLDER_RUN.sub('?, ...', ' '.join(sql.split()))[:160]
+        if len(_statement_names) < 2000:
+            _statement_names[sql] = name
+    return name
@@ -0,0 +1,274 @@
+"""Versioned schema migrations for the PRISM database.
+
+The schema version lives in ``PRAGMA user_version``. Each migration runs in its own
+transaction and bumps the version, so ``migrate`` is safe to call on every startup.
+
+Usage: python migrations.py [database_path]   (migrate, then check hot query plans)
+"""
+import sqlite3
+import sys
+
+from analytics import ensure_analytics
+from memory_content import register_functions
+from ranking import rebuild_rank_keys
+from search import ensure_memory_fts
+
+
+def _base_tables(conn):
+    # Memory table
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS memories (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id TEXT,
+            memory_type TEXT,
+            content TEXT,
+            timestamp DATETIME,
+            emotion TEXT,
+            topic TEXT,
+            importance INTEGER DEFAULT 1
+        )
+    ''')
+
+    # Identity table
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS identity_traits (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            trait_name TEXT UNIQUE,
+            trait_value TEXT,
+            confidence_level REAL,
+            last_updated DATETIME
+        )
+    ''')
+
+    # Emotional context table
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS emotional_context (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id TEXT,
+            emotion TEXT,
+            topic TEXT,
+            response_strategy TEXT,
+            timestamp DATETIME,
+            effectiveness_score INTEGER
+        )
+    ''')
+
+    # Goals table
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS goals (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id TEXT,
+            goal_type TEXT,
+            title TEXT,
+            description TEXT,
+            target_date DATE,
+            progress INTEGER DEFAULT 0,
+            status TEXT DEFAULT 'active',
+            created_at DATETIME,
+            updated_at DATETIME
+        )
+    ''')
+
+    # Thoughts table
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS thoughts (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            thought_type TEXT,
+            content TEXT,
+            context TEXT,
+            outcome TEXT,
+            timestamp DATETIME
+        )
+    ''')
+
+
+def _memory_fts(conn):
+    # Full-text index over memory content/topic for 'retrieve' queries
+    ensure_memory_fts(conn)
+
+
+def _hot_query_indexes(conn):
+    # memory_manager retrieve by memory_type, newest first
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_memories_user_type_time
+        ON memories (user_id, memory_type, timestamp DESC)
+    ''')
+    # get_emotional_history: covers every selected column, so no table lookups
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_emotional_context_user_time
+        ON emotional_context (user_id, timestamp DESC, emotion, topic, response_strategy)
+    ''')
+    # get_goals for active goals, newest first
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_goals_user_status_created
+        ON goals (user_id, status, created_at DESC)
+    ''')
+
+
+def _cache_versions(conn):
+    # Version counters read by cache.VersionedCache; bumped by triggers so every
+    # process sees writes made by any other process
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS cache_versions (
+            name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL
+        ) WITHOUT ROWID
+    ''')
+    conn.execute("INSERT OR IGNORE INTO cache_versions (name, version) VALUES ('identity_traits', 0)")
+    for event in ('INSERT', 'UPDATE', 'DELETE'):
+        conn.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS identity_traits_version_{event.lower()}
+            AFTER {event} ON identity_traits BEGIN
+                UPDATE cache_versions SET version = version + 1 WHERE name = 'identity_traits';
+            END
+        ''')
+
+
+def _memory_vectors(conn):
+    # Float32 embeddings for semantic recall (see embeddings.py). A plain rowid table:
+    # ~1KB blobs are a poor fit for WITHOUT ROWID, and the index keeps per-user
+    # catch-up reads a single range scan
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS memory_vectors (
+            memory_id INTEGER PRIMARY KEY,
+            user_id TEXT NOT NULL,
+            vector BLOB NOT NULL
+        )
+    ''')
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_memory_vectors_user
+        ON memory_vectors (user_id, memory_id)
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS memory_vectors_delete AFTER DELETE ON memories BEGIN
+            DELETE FROM memory_vectors WHERE memory_id = old.id;
+        END
+    ''')
+
+
+def _retention(conn):
+    # Daily per-type counts of thoughts that retention.py archived and deleted
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS thought_rollups (
+            day TEXT NOT NULL,
+            thought_type TEXT NOT NULL,
+            thoughts INTEGER NOT NULL,
+            first_at DATETIME,
+            last_at DATETIME,
+            PRIMARY KEY (day, thought_type)
+        ) WITHOUT ROWID
+    ''')
+    # Age-based sweeps of thoughts read oldest-first
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_thoughts_time
+        ON thoughts (timestamp)
+    ''')
+
+
+def _memory_ranking(conn):
+    # Read counts and the time-invariant ranking key used by ranking.py
+    conn.execute("ALTER TABLE memories ADD COLUMN access_count INTEGER NOT NULL DEFAULT 0")
+    conn.execute("ALTER TABLE memories ADD COLUMN last_accessed DATETIME")
+    conn.execute("ALTER TABLE memories ADD COLUMN rank_key REAL")
+    rebuild_rank_keys(conn)
+    # Ranked recall: top k by rank_key is a single range scan
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_memories_user_type_rank
+        ON memories (user_id, memory_type, rank_key DESC)
+    ''')
+    # A new index missing from existing ANALYZE stats can win every memories query
+    if conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'").fetchone():
+        conn.execute("ANALYZE memories")
+
+
+def _analytics(conn):
+    # Trigger-maintained per-user aggregates; see analytics.py
+    ensure_analytics(conn)
+
+
+def _keyset_indexes(conn):
+    # Keyset pages order by (timestamp, id) descending (pagination.py). The implicit
+    # rowid at the end of an index is ascending, so without an explicit id DESC every
+    # page would need a sort step for the rows sharing a timestamp.
+    conn.execute("DROP INDEX IF EXISTS idx_memories_user_type_time")
+    conn.execute('''
+        CREATE INDEX idx_memories_user_type_time
+        ON memories (user_id, memory_type, timestamp DESC, id DESC)
+    ''')
+    conn.execute("DROP INDEX IF EXISTS idx_goals_user_status_created")
+    conn.execute('''
+        CREATE INDEX idx_goals_user_status_created
+        ON goals (user_id, status, created_at DESC, id DESC)
+    ''')
+
+
+def _goal_focus_index(conn):
+    # suggest_next_step's active goal closest to done: one seek, not a scan of every active goal
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_goals_user_status_progress
+        ON goals (user_id, status, progress DESC, created_at DESC, id DESC)
+    ''')
+
+
+# Append only: a migration's position in this list is its schema version
+MIGRATIONS = [
+    _base_tables,
+    _memory_fts,
+    _hot_query_indexes,
+    _cache_versions,
+    _memory_vectors,
+    _retention,
+    _memory_ranking,
+    _analytics,
+    _keyset_indexes,
+    _goal_focus_index,
+]
+
+
+def schema_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn):
+    """Apply every pending migration in order and return the resulting schema version"""
+    # Writes to memories need it on compressed-content files, even from a plain connection
+    register_functions(conn)
+    version = schema_version(conn)
+    for target, migration in enumerate(MIGRATIONS[version:], start=version + 1):
+        conn.execute("BEGIN")
+        try:
+            migration(conn)
+            conn.execute(f"PRAGMA user_version = {target}")
+        except Exception:
+            conn.rollback()
+            raise
+        conn.commit()
+    return schema_version(conn)
+
+
+def check_query_plans(conn, queries):
+    """Return a description of every hot query that no longer uses its expected index
+
+    ``queries`` maps a name to ``(sql, params, index_name)``. A plan that scans the
+    table or needs a temp b-tree for ORDER BY counts as a regression.
+    """
+    problems = []
+    for name, (sql, params, index_name) in queries.items():
+        plan = [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+        uses_index = any(index_name in step for step in plan)
+        full_scan = any(step.startswith("SCAN ") for step in plan)
+        temp_sort = any("TEMP B-TREE" in step for step in plan)
+        if not uses_index or full_scan or temp_sort:
+            problems.append(f"{name}: expected {index_name}, got {plan}")
+    return problems
+
+
+if __name__ == '__main__':
+    from prism_tools import HOT_QUERIES
+
+    conn = sqlite3.connect(sys.argv[1] if len(sys.argv) > 1 else "prism_data.db")
+    print(f"schema version {migrate(conn)}")
+    problems = check_query_plans(conn, HOT_QUERIES)
+    for problem in problems:
+        print(f"query plan regression - {problem}")
+    sys.exit(1 if problems else 0)
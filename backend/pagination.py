@@ -0,0 +1,216 @@
+"""Keyset pagination for the list actions, and the streaming NDJSON export.
+
+Lists come newest first, ordered by ``(timestamp, id)`` descending, where the
+timestamp is memories.timestamp, goals.created_at or thoughts.timestamp. A page
+ends with an opaque ``next_cursor`` holding the key of its last row. The next
+page is the rows strictly below that key, found with one index seek: no OFFSET,
+so page 1000 costs the same as page 1. Rows written while a client pages never
+shift or repeat what it has already seen.
+
+The export walks the same queries in batches of EXPORT_BATCH rows. Each batch is
+one short read on a pooled connection, so memory use stays flat however many rows
+a user has. A slow client never holds a connection or a WAL snapshot between
+batches. Memories and goals are walked once per memory type / goal status (the
+index leads with it) and the walks are merged on the key, so the stream is
+newest first across the whole export, holding one batch per group.
+"""
+import base64
+import binascii
+import heapq
+import itertools
+import json
+
+from dispatch import InvalidCall
+from memory_content import dumps, raw_json
+
+EXPORT_BATCH = 500
+
+# The indexes end in ``id DESC`` (migrations._keyset_indexes), so every query below
+# is one index range scan with no sort step. ``IS ?`` rather than ``= ?`` so a
+# memory stored without a type (NULL) can be walked as a group of its own.
+MEMORIES_PAGE_SQL = '''
+    SELECT id, memory_type, content, timestamp, emotion, topic
+    FROM memories
+    WHERE user_id = ? AND memory_type IS ?
+    ORDER BY timestamp DESC, id DESC LIMIT ?
+'''
+
+MEMORIES_AFTER_SQL = '''
+    SELECT id, memory_type, content, timestamp, emotion, topic
+    FROM memories
+    WHERE user_id = ? AND memory_type IS ? AND (timestamp, id) < (?, ?)
+    ORDER BY timestamp DESC, id DESC LIMIT ?
+'''
+
+GOALS_PAGE_SQL = '''
+    SELECT id, title, description, goal_type, progress, status, created_at
+    FROM goals
+    WHERE user_id = ? AND status IS ?
+    ORDER BY created_at DESC, id DESC LIMIT ?
+'''
+
+GOALS_AFTER_SQL = '''
+    SELECT id, title, description, goal_type, progress, status, created_at
+    FROM goals
+    WHERE user_id = ? AND status IS ? AND (created_at, id) < (?, ?)
+    ORDER BY created_at DESC, id DESC LIMIT ?
+'''
+
+THOUGHTS_PAGE_SQL = '''
+    SELECT id, thought_type, content, context, outcome, timestamp
+    FROM thoughts
+    ORDER BY timestamp DESC, id DESC LIMIT ?
+'''
+
+THOUGHTS_AFTER_SQL = '''
+    SELECT id, thought_type, content, context, outcome, timestamp
+    FROM thoughts
+    WHERE (timestamp, id) < (?, ?)
+    ORDER BY timestamp DESC, id DESC LIMIT ?
+'''
+
+# Export groups: whether a user has a given memory type / goal status, and the next
+# one after the given one, one seek each on the same indexes
+MEMORY_TYPE_EXISTS_SQL = '''
+    SELECT 1 FROM memories WHERE user_id = ? AND memory_type IS ? LIMIT 1
+'''
+
+NEXT_MEMORY_TYPE_SQL = '''
+    SELECT memory_type FROM memories
+    WHERE user_id = ? AND memory_type > ? ORDER BY memory_type LIMIT 1
+'''
+
+GOAL_STATUS_EXISTS_SQL = '''
+    SELECT 1 FROM goals WHERE user_id = ? AND status IS ? LIMIT 1
+'''
+
+NEXT_GOAL_STATUS_SQL = '''
+    SELECT status FROM goals
+    WHERE user_id = ? AND status > ? ORDER BY status LIMIT 1
+'''
+
+
+def memory_key(row):
+    return row[3], row[0]
+
+
+def goal_key(row):
+    return row[6], row[0]
+
+
+def thought_key(row):
+    return row[5], row[0]
+
+
+def encode_cursor(key):
+    return base64.urlsafe_b64encode(json.dumps(key, separators=(",", ":")).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """The ``(timestamp, id)`` key in a cursor; InvalidCall if it is not one this module made"""
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (ValueError, binascii.Error):
+        key = None
+    if not (isinstance(key, list) and len(key) == 2 and isinstance(key[0], (str, int, float))
+            and isinstance(key[1], int)):
+        raise InvalidCall("cursor is not a next_cursor from an earlier page")
+    return tuple(key)
+
+
+def page(conn, first_sql, after_sql, params, key, limit, cursor=None):
+    """``(rows, next_cursor)`` for one page; next_cursor is None on the last page"""
+    # One row past the page says whether there is another, without a COUNT
+    if cursor is None:
+        rows = conn.execute(first_sql, (*params, limit + 1)).fetchall()
+    else:
+        rows = conn.execute(after_sql, (*params, *decode_cursor(cursor), limit + 1)).fetchall()
+    if len(rows) <= limit:
+        return rows, None
+    return rows[:limit], encode_cursor(key(rows[limit - 1]))
+
+
+def walk(db, first_sql, after_sql, params, key, batch_size=EXPORT_BATCH):
+    """Every row of a keyset query, read ``batch_size`` rows per short read"""
+    after = None
+    while True:
+        with db.read() as conn:
+            if after is None:
+                rows = conn.execute(first_sql, (*params, batch_size)).fetchall()
+            else:
+                rows = conn.execute(after_sql, (*params, *after, batch_size)).fetchall()
+        if rows:
+            yield rows
+        if len(rows) < batch_size:
+            return
+        after = key(rows[-1])
+
+
+def _groups(db, exists_sql, next_sql, user_id):
+    # Loose index scan: the distinct values without reading every row. ``>`` never
+    # matches NULL or returns '', so those two are looked up first.
+    for value in (None, ''):
+        with db.read() as conn:
+            if conn.execute(exists_sql, (user_id, value)).fetchone():
+                yield value
+    value = ''
+    while True:
+        with db.read() as conn:
+            found = conn.execute(next_sql, (user_id, value)).fetchone()
+        if found is None:
+            return
+        value = found[0]
+        yield value
+
+
+def _merged(db, groups, first_sql, after_sql, user_id, key, batch_size):
+    # One walk per group, merged on the key: each walk is already in key order
+    walks = [itertools.chain.from_iterable(walk(db, first_sql, after_sql, (user_id, group), key, batch_size))
+             for group in list(_groups(db, *groups, user_id))]
+    rows = heapq.merge(*walks, key=key, reverse=True)
+    while True:
+        batch = list(itertools.islice(rows, batch_size))
+        if batch:
+            yield batch
+        if len(batch) < batch_size:
+            return
+
+
+def memory_record(row):
+    return {"id": row[0], "type": row[1], "content": raw_json(row[2]), "timestamp": row[3],
+            "emotion": row[4], "topic": row[5]}
+
+
+def goal_record(row):
+    return {"id": row[0], "title": row[1], "description": row[2], "type": row[3], "progress": row[4],
+            "status": row[5], "created": row[6]}
+
+
+def thought_record(row):
+    return {"id": row[0], "type": row[1], "content": row[2], "context": raw_json(row[3]),
+            "outcome": row[4], "timestamp": row[5]}
+
+
+def _lines(batches, record):
+    for rows in batches:
+        yield "".join(dumps(record(row), default=str) + "\n" for row in rows)
+
+
+def export_memories(db, user_id, batch_size=EXPORT_BATCH):
+    """NDJSON chunks (one per batch) of a user's memories, newest first"""
+    groups = (MEMORY_TYPE_EXISTS_SQL, NEXT_MEMORY_TYPE_SQL)
+    yield from _lines(_merged(db, groups, MEMORIES_PAGE_SQL, MEMORIES_AFTER_SQL, user_id, memory_key, batch_size),
+                      memory_record)
+
+
+def export_goals(db, user_id, batch_size=EXPORT_BATCH):
+    """NDJSON chunks of a user's goals, newest first"""
+    groups = (GOAL_STATUS_EXISTS_SQL, NEXT_GOAL_STATUS_SQL)
+    yield from _lines(_merged(db, groups, GOALS_PAGE_SQL, GOALS_AFTER_SQL, user_id, goal_key, batch_size),
+                      goal_record)
+
+
+def export_thoughts(db, batch_size=EXPORT_BATCH):
+    """NDJSON chunks of every logged thought, newest first"""
+    yield from _lines(walk(db, THOUGHTS_PAGE_SQL, THOUGHTS_AFTER_SQL, (), thought_key, batch_size),
+                      thought_record)
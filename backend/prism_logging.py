@@ -0,0 +1,149 @@
+"""Structured, queue-based logging for the PRISM servers.
+
+Handlers log through the ``prism`` logger. Records are put on a bounded queue and
+formatted as one JSON object per line by a background listener thread, so a
+request never waits on serialization or stdout. If the queue is full, records are
+dropped and counted rather than blocking.
+
+Debug dumps of whole request bodies are off by default. They can be switched on for
+everything (``PRISM_LOG_LEVEL=DEBUG``), for particular users or Vapi call ids
+(``PRISM_LOG_DEBUG_USERS`` / ``PRISM_LOG_DEBUG_REQUESTS``, comma-separated, or
+``set_debug`` at runtime) or for a sampled fraction of requests
+(``PRISM_LOG_SAMPLE_RATE``). Check ``debug_enabled`` before building a dump.
+Field values are serialized later on the listener thread, so pass objects that the
+caller no longer mutates.
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import time
+
+logger = logging.getLogger("prism")
+
+_debug_users = frozenset()
+_debug_requests = frozenset()
+_sample_rate = 0.0
+_listener = None
+_handler = None
+
+
+def _split(value):
+    return frozenset(item.strip() for item in (value or '').split(',') if item.strip())
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per record: time, level, logger, message plus ``fields``"""
+
+    def format(self, record):
+        entry = {
+            "ts": round(record.created, 6),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        entry.update(getattr(record, 'fields', None) or {})
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class _DroppingQueueHandler(logging.handlers.QueueHandler):
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Leave message and field formatting to the listener thread; only render the
+        # traceback now, while the frames it describes are still current
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def configure(stream=None, level=None, max_queue=10000):
+    """Route the ``prism`` logger through a background queue listener (idempotent)"""
+    global _listener, _handler
+    level = level or os.environ.get('PRISM_LOG_LEVEL', 'INFO')
+    logger.setLevel(level)
+    if _listener is not None:
+        return
+    log_queue = queue.Queue(maxsize=max_queue)
+    output = logging.StreamHandler(stream or sys.stderr)
+    output.setFormatter(JSONFormatter())
+    _handler = _DroppingQueueHandler(log_queue)
+    logger.addHandler(_handler)
+    logger.propagate = False
+    _listener = logging.handlers.QueueListener(log_queue, output)
+    _listener.start()
+    set_debug(
+        users=_split(os.environ.get('PRISM_LOG_DEBUG_USERS')),
+        requests=_split(os.environ.get('PRISM_LOG_DEBUG_REQUESTS')),
+        sample_rate=float(os.environ.get('PRISM_LOG_SAMPLE_RATE', 0)),
+    )
+
+
+def shutdown():
+    """Drain queued records and stop the listener"""
+    global _listener, _handler
+    if _listener is not None:
+        _listener.stop()
+        logger.removeHandler(_handler)
+        _listener = _handler = None
+
+
+def set_debug(users=None, requests=None, sample_rate=None):
+    """Change which requests get debug dumps; ``None`` leaves a setting unchanged"""
+    global _debug_users, _debug_requests, _sample_rate
+    if users is not None:
+        _debug_users = frozenset(users)
+    if requests is not None:
+        _debug_requests = frozenset(requests)
+    if sample_rate is not None:
+        _sample_rate = sample_rate
+
+
+def debug_enabled(user_id=None, request_id=None):
+    """Whether this request's debug dumps should be emitted"""
+    if logger.isEnabledFor(logging.DEBUG):
+        return True
+    if user_id in _debug_users or (request_id is not None and request_id in _debug_requests):
+        return True
+    return _sample_rate > 0 and random.random() < _sample_rate
+
+
+def debug(message, **fields):
+    """Emit a DEBUG record whatever the logger level; gate calls on ``debug_enabled``"""
+    record = logger.makeRecord(logger.name, logging.DEBUG, __file__, 0, message, (), None,
+                               extra={"fields": fields})
+    logger.handle(record)
+
+
+def stats():
+    return {
+        "queued": _listener.queue.qsize() if _listener else 0,
+        "dropped": _handler.dropped if _handler else 0,
+        "debug_users": len(_debug_users),
+        "debug_requests": len(_debug_requests),
+        "sample_rate": _sample_rate,
+    }
+
+
+def elapsed_ms(started):
+    return round((time.perf_counter() - started) * 1000, 3)
+
+
+atexit.register(shutdown)
@@ -0,0 +1,668 @@
+"""PRISM tool handlers, independent of the web framework serving them.
+
+Each handler takes the decoded Vapi webhook body and returns ``(payload, status)``.
+prism_server.py (Flask) and asgi_server.py wrap the same handlers so both servers
+keep identical request/response shapes.
+"""
+import atexit
+import functools
+import json
+from datetime import datetime
+import os
+import time
+
+import analytics
+import memory_content
+import metrics
+import prism_logging
+from prism_logging import logger
+
+from cache import UserLRUCache, VersionedCache, rows_size
+from db import BoundDatabase, Database, enable_wal
+from dispatch import InvalidCall, Tool, check_envelope, get_user_id_from_call
+from embeddings import get_embedder, memory_text, semantic_search, store_vector
+from migrations import check_query_plans, migrate
+from pagination import (GOALS_AFTER_SQL, GOALS_PAGE_SQL, MEMORIES_AFTER_SQL, MEMORIES_PAGE_SQL, THOUGHTS_AFTER_SQL,
+                        THOUGHTS_PAGE_SQL, export_goals, export_memories, export_thoughts, goal_key, memory_key, page,
+                        thought_key)
+from ranking import (DEFAULT_IMPORTANCE, RANKED_MEMORIES_SQL, clamp_importance, fit_budget, rank_key,
+                     ranked_memories, record_access)
+from retention import Retention
+from search import search_memories
+from sharding import ShardSet, shard_paths
+from tool_schemas import PARAMETER_SCHEMAS
+
+DATABASE_PATH = os.environ.get('PRISM_DATABASE_PATH', "prism_data.db")
+DB_POOL_SIZE = int(os.environ.get('PRISM_DB_POOL_SIZE', 8))
+ARCHIVE_PATH = os.environ.get('PRISM_ARCHIVE_PATH', os.path.splitext(DATABASE_PATH)[0] + "_archive.db")
+# Seconds between retention sweeps (retention.py). 0, the default, never sweeps: archiving
+# and deleting rows is opt-in
+RETENTION_INTERVAL = float(os.environ.get('PRISM_RETENTION_INTERVAL', 0))
+# Per-user tables split across this many files by user_id (sharding.py); 1 = unsharded
+SHARDS = int(os.environ.get('PRISM_SHARDS', 1))
+# How memories.content is stored: 'json' text or dictionary-compressed 'zlib' (memory_content.py).
+# init_database converts every file to it.
+CONTENT_FORMAT = os.environ.get('PRISM_CONTENT_FORMAT', 'json')
+
+prism_logging.configure()
+
+# Pooled long-lived read connections plus a single writer thread (WAL mode)
+database = Database(DATABASE_PATH, pool_size=DB_POOL_SIZE)
+
+# Flush buffered write-behind rows before the process exits
+atexit.register(database.close)
+
+# With sharding, ``database`` keeps only the tables without a user_id
+shards = ShardSet(shard_paths(DATABASE_PATH, SHARDS), pool_size=DB_POOL_SIZE) if SHARDS > 1 else None
+if shards is not None:
+    atexit.register(shards.close)
+
+def all_databases():
+    return [database] + (shards.databases if shards is not None else [])
+
+def user_database(user_id, db=None):
+    """Where ``user_id``'s rows live; a batch's bound ``db`` is used when it is that file"""
+    if shards is None:
+        return db or database
+    target = shards.for_user(user_id)
+    return db if db is not None and db.owner is target else target
+
+def shared_database(db=None):
+    """Where the tables without a user_id live (identity, thoughts)"""
+    if shards is None:
+        return db or database
+    return db if db is not None and db.owner is database else database
+
+# Hot per-user read queries, checked against their indexes at startup
+EMOTIONAL_HISTORY_SQL = '''
+    SELECT emotion, topic, response_strategy, timestamp
+    FROM emotional_context
+    WHERE user_id = ?
+    ORDER BY timestamp DESC LIMIT 10
+'''
+
+# The active goal closest to done, newest first among ties
+FOCUS_GOAL_SQL = '''
+    SELECT title, description, goal_type, progress, status, created_at
+    FROM goals
+    WHERE user_id = ? AND status = 'active'
+    ORDER BY progress DESC, created_at DESC, id DESC LIMIT 1
+'''
+
+# Page sizes when a list call gives no limit
+MEMORIES_PAGE = 5
+GOALS_PAGE = 50
+THOUGHTS_PAGE = 20
+
+HOT_QUERIES = {
+    "recent_memories": (MEMORIES_PAGE_SQL, ('', '', MEMORIES_PAGE), 'idx_memories_user_type_time'),
+    "recent_memories_page": (MEMORIES_AFTER_SQL, ('', '', '', 0, MEMORIES_PAGE), 'idx_memories_user_type_time'),
+    "ranked_memories": (RANKED_MEMORIES_SQL, ('', '', MEMORIES_PAGE), 'idx_memories_user_type_rank'),
+    "emotional_history": (EMOTIONAL_HISTORY_SQL, ('',), 'idx_emotional_context_user_time'),
+    "focus_goal": (FOCUS_GOAL_SQL, ('',), 'idx_goals_user_status_progress'),
+    "goals_page": (GOALS_AFTER_SQL, ('', 'active', '', 0, GOALS_PAGE), 'idx_goals_user_status_created'),
+    "thoughts_page": (THOUGHTS_AFTER_SQL, ('', 0, THOUGHTS_PAGE), 'idx_thoughts_time'),
+}
+
+def init_database():
+    """Initialize SQLite database (and every shard) and apply pending schema migrations"""
+    for db in all_databases():
+        db.write(enable_wal)
+        db.write(migrate)
+        converted = db.write(lambda conn: memory_content.convert(conn, CONTENT_FORMAT))
+        if converted:
+            logger.info("memory content converted", extra={"fields": {
+                "format": CONTENT_FORMAT, "memories": converted, "database": db.database_path}})
+        with db.read() as conn:
+            for problem in check_query_plans(conn, HOT_QUERIES):
+                logger.warning("query plan regression", extra={"fields": {
+                    "problem": problem, "database": db.database_path}})
+
+def _load_identity(conn):
+    traits = conn.execute('SELECT trait_name, trait_value, confidence_level FROM identity_traits').fetchall()
+    return {
+        trait[0]: {
+            "value": trait[1],
+            "confidence": trait[2]
+        }
+        for trait in traits
+    }
+
+# get_identity is called on nearly every turn but traits change rarely
+identity_cache = VersionedCache('identity_traits', _load_identity)
+
+# Decoded retrieve/emotional-history results, repeatedly re-read during a call
+user_cache = UserLRUCache(
+    max_bytes=int(os.environ.get('PRISM_USER_CACHE_BYTES', 32 * 1024 * 1024)),
+    ttl=float(os.environ.get('PRISM_USER_CACHE_TTL', 30)),
+)
+
+# Archive and compact old memories/thoughts, one sweeper per database file; the
+# servers start them after init_database
+retention = Retention(database, ARCHIVE_PATH, on_archive=user_cache.invalidate_user)
+retentions = [retention] + [
+    Retention(db, os.path.splitext(db.database_path)[0] + "_archive.db", on_archive=user_cache.invalidate_user)
+    for db in (shards.databases if shards is not None else [])
+]
+
+def start_retention():
+    for sweeper in retentions:
+        sweeper.start(RETENTION_INTERVAL)
+
+def stop_retention():
+    for sweeper in retentions:
+        sweeper.stop()
+
+atexit.register(stop_retention)
+
+def _action(data):
+    try:
+        return str(data['message']['functionCall']['parameters'].get('action') or '')
+    except (KeyError, TypeError, AttributeError):
+        return ''
+
+def instrumented(handler):
+    """Record each call's latency and status per tool and action in metrics"""
+    tool = handler.__name__
+    
+    @functools.wraps(handler)
+    def wrapper(data, *args, **kwargs):
+        started = time.perf_counter()
+        payload, status = handler(data, *args, **kwargs)
+        action = _action(data)
+        metrics.tool_seconds.observe(time.perf_counter() - started, tool, action)
+        metrics.tool_calls.inc(tool, action, status)
+        return payload, status
+    
+    return wrapper
+
+# Write statements; fixed SQL text so each pooled connection prepares them once
+# and reuses them from its statement cache
+STORE_MEMORY_SQL = '''
+    INSERT INTO memories (user_id, memory_type, content, timestamp, emotion, topic, importance, rank_key)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+# Retrieve fallback when nothing in the query is indexable (e.g. only punctuation)
+MEMORIES_LIKE_SQL = '''
+    SELECT id, memory_type, content, timestamp, emotion, topic
+    FROM memories 
+    WHERE user_id = ? AND (prism_content_text(content) LIKE ? OR topic LIKE ?)
+    ORDER BY timestamp DESC LIMIT ?
+'''
+
+UPDATE_TRAIT_SQL = '''
+    INSERT OR REPLACE INTO identity_traits (trait_name, trait_value, confidence_level, last_updated)
+    VALUES (?, ?, ?, ?)
+'''
+
+STORE_REFLECTION_SQL = '''
+    INSERT INTO memories (user_id, memory_type, content, timestamp, rank_key)
+    VALUES (?, ?, ?, ?, ?)
+'''
+
+STORE_EMOTION_SQL = '''
+    INSERT INTO emotional_context (user_id, emotion, topic, response_strategy, timestamp,
+                                   effectiveness_score)
+    VALUES (?, ?, ?, ?, ?, ?)
+'''
+
+SET_GOAL_SQL = '''
+    INSERT INTO goals (user_id, goal_type, title, description, created_at, updated_at)
+    VALUES (?, ?, ?, ?, ?, ?)
+'''
+
+# The most recent of the user's goals with that title
+UPDATE_PROGRESS_SQL = '''
+    UPDATE goals SET progress = ?, status = ?, updated_at = ?
+    WHERE id = (SELECT id FROM goals WHERE user_id = ? AND title = ?
+                ORDER BY created_at DESC LIMIT 1)
+'''
+
+LOG_THOUGHT_SQL = '''
+    INSERT INTO thoughts (thought_type, content, context, outcome, timestamp)
+    VALUES (?, ?, ?, ?, ?)
+'''
+
+def _user_route(call):
+    return user_database(call.user_id, call.bound)
+
+def _shared_route(call):
+    return shared_database(call.bound)
+
+def _system_route(call):
+    return user_database('system', call.bound)
+
+# Each tool validates against its Vapi schema, then dispatches on action (dispatch.py)
+memory_tool = Tool('memory_manager', PARAMETER_SCHEMAS['memory_manager'], _user_route)
+identity_tool = Tool('identity_tracker', PARAMETER_SCHEMAS['identity_tracker'], _shared_route)
+emotion_tool = Tool('emotion_analyzer', PARAMETER_SCHEMAS['emotion_analyzer'], _user_route)
+goal_tool = Tool('goal_tracker', PARAMETER_SCHEMAS['goal_tracker'], _user_route)
+thought_tool = Tool('thought_logger', PARAMETER_SCHEMAS['thought_logger'], _shared_route, action_key=None)
+
+@memory_tool.action('store')
+def store_memory(call, db):
+    parameters, user_id = call.parameters, call.user_id
+    memory_type = parameters.get('memory_type')
+    content = parameters.get('content') or {}
+    
+    # Embed outside the writer thread; the memory and its vector commit together
+    embedder = get_embedder()
+    vector = embedder.embed(memory_text(content, content.get('topic', ''))) if embedder else None
+    
+    importance = clamp_importance(parameters.get('importance', content.get('importance')))
+    
+    def store(conn):
+        now = datetime.now()
+        memory_id = conn.execute(STORE_MEMORY_SQL, (
+            user_id,
+            memory_type,
+            memory_content.encode(content, CONTENT_FORMAT),
+            now,
+            content.get('emotion', ''),
+            content.get('topic', ''),
+            importance,
+            rank_key(importance, now)
+        )).lastrowid
+        if vector is not None:
+            store_vector(conn, memory_id, user_id, vector)
+    
+    db.write(store)
+    user_cache.invalidate_user(user_id)
+    return {"status": "stored", "message": "Memory saved successfully"}
+
+@memory_tool.action('retrieve')
+def retrieve_memories(call, db):
+    parameters, user_id = call.parameters, call.user_id
+    memory_type = parameters.get('memory_type')
+    query = parameters.get('query') or ''
+    mode = parameters.get('mode') or 'keyword'
+    limit = parameters.get('limit')
+    cursor = parameters.get('cursor')
+    
+    if mode == 'semantic' and get_embedder() is None:
+        return {"error": "Semantic recall requires numpy"}
+    # Only the newest-first listing has a stable order to page through
+    paged = mode == 'recent' and not query
+    if cursor is not None and not paged:
+        raise InvalidCall("cursor pages mode 'recent' without a query")
+    
+    cache_key = (user_id, 'memories', memory_type, query, mode, limit, cursor)
+    cached = user_cache.get(cache_key)
+    if cached is None:
+        generation = user_cache.generation(user_id)
+        next_cursor = None
+        with db.read() as conn:
+            if mode == 'semantic' and query:
+                memories = semantic_search(conn, user_id, query, limit=limit or 10)
+            else:
+                memories = search_memories(conn, user_id, query, limit=limit or 10) if query else None
+            if memories is None and query:
+                memories = conn.execute(MEMORIES_LIKE_SQL, (user_id, f'%{query}%', f'%{query}%',
+                                                            limit or 10)).fetchall()
+            elif memories is None and paged:
+                memories, next_cursor = page(conn, MEMORIES_PAGE_SQL, MEMORIES_AFTER_SQL, (user_id, memory_type),
+                                             memory_key, limit or MEMORIES_PAGE, cursor)
+            elif memories is None:
+                memories = ranked_memories(conn, user_id, memory_type, limit=limit or MEMORIES_PAGE)
+        
+        # Ids stay out of the response but are kept for access counting on cache hits.
+        # Content goes out as the stored JSON text, never parsed (memory_content.dumps).
+        cached = (
+            [mem[0] for mem in memories],
+            [
+                {
+                    "type": mem[1],
+                    "content": memory_content.raw_json(mem[2]),
+                    "timestamp": mem[3],
+                    "emotion": mem[4],
+                    "topic": mem[5]
+                }
+                for mem in memories
+            ],
+            next_cursor,
+        )
+        user_cache.put(cache_key, cached, rows_size(memories), generation)
+    
+    memory_ids, memories, next_cursor = cached
+    kept = fit_budget(memories, parameters.get('max_tokens'))
+    record_access(db, [memory_ids[i] for i in kept])
+    result = {"memories": [memories[i] for i in kept]}
+    if len(kept) < len(memories):
+        # Left out to stay within max_tokens (and not repeated on the next page)
+        result["omitted"] = len(memories) - len(kept)
+    if paged:
+        result["next_cursor"] = next_cursor
+    return result
+
+@identity_tool.action('get_identity')
+def get_identity(call, db):
+    with db.read() as conn:
+        return {"identity": identity_cache.get(conn)}
+
+@identity_tool.action('update_trait')
+def update_trait(call, db):
+    trait = call.parameters.get('trait')
+    adjustment = call.parameters.get('adjustment') or {}
+    
+    db.execute_write(UPDATE_TRAIT_SQL, (
+        trait,
+        json.dumps(adjustment),
+        adjustment.get('confidence', 0.5),
+        datetime.now()
+    ))
+    identity_cache.invalidate()
+    return {"status": "updated", "trait": trait}
+
+@identity_tool.action('reflect', route=_system_route)
+def reflect(call, db):
+    reflection = call.parameters.get('reflection')
+    now = datetime.now()
+    # Store reflection as a special memory
+    content = memory_content.encode({'reflection': reflection}, CONTENT_FORMAT)
+    db.execute_write(STORE_REFLECTION_SQL, ('system', 'self_reflection', content, now,
+                                            rank_key(DEFAULT_IMPORTANCE, now)))
+    user_cache.invalidate_user('system')
+    return {"status": "reflected", "message": "Self-reflection recorded"}
+
+@identity_tool.action('get_growth_insights', route=_user_route)
+def get_growth_insights(call, db):
+    user_id = call.user_id
+    # Aggregates are trigger-maintained, so pending emotional rows must land first
+    db.flush_writes()
+    with db.read() as conn:
+        goals = analytics.goal_summary(conn, user_id)
+        emotions = analytics.emotion_profile(conn, user_id)[:5]
+        strategies = {item["emotion"]: analytics.strategy_means(conn, user_id, item["emotion"])[:1]
+                      for item in emotions}
+    with shared_database(call.bound).read() as conn:
+        identity = identity_cache.get(conn)
+    confidences = [trait["confidence"] for trait in identity.values() if trait.get("confidence") is not None]
+    return {
+        "goals": goals,
+        "top_emotions": emotions,
+        "best_strategies": {emotion: best[0] for emotion, best in strategies.items() if best},
+        "identity": {
+            "traits": len(identity),
+            "mean_confidence": round(sum(confidences) / len(confidences), 2) if confidences else None
+        }
+    }
+
+@identity_tool.action('get_thoughts')
+def get_thoughts(call, db):
+    # Thoughts are logged through the write-behind buffer
+    db.flush_writes()
+    with db.read() as conn:
+        thoughts, next_cursor = page(conn, THOUGHTS_PAGE_SQL, THOUGHTS_AFTER_SQL, (), thought_key,
+                                     call.parameters.get('limit') or THOUGHTS_PAGE, call.parameters.get('cursor'))
+    return {
+        "thoughts": [
+            {
+                "type": thought[1],
+                "content": thought[2],
+                "context": memory_content.raw_json(thought[3]),
+                "outcome": thought[4],
+                "timestamp": thought[5]
+            }
+            for thought in thoughts
+        ],
+        "next_cursor": next_cursor
+    }
+
+@emotion_tool.action('store_emotional_memory')
+def store_emotional_memory(call, db):
+    parameters = call.parameters
+    
+    # Fire-and-forget: batched by the write-behind buffer
+    db.enqueue_write(STORE_EMOTION_SQL, (
+        call.user_id,
+        parameters.get('user_emotion'),
+        parameters.get('topic'),
+        parameters.get('response_strategy'),
+        datetime.now(),
+        parameters.get('effectiveness_score')
+    ))
+    user_cache.invalidate_user(call.user_id)
+    return {"status": "stored", "message": "Emotional context saved"}
+
+@emotion_tool.action('get_emotional_history')
+def get_emotional_history(call, db):
+    user_id = call.user_id
+    cache_key = (user_id, 'emotional_history')
+    result = user_cache.get(cache_key)
+    if result is None:
+        generation = user_cache.generation(user_id)
+        # Make this user's just-stored emotional context visible to the read
+        db.flush_writes()
+        with db.read() as conn:
+            history = conn.execute(EMOTIONAL_HISTORY_SQL, (user_id,)).fetchall()
+        
+        result = {
+            "emotional_history": [
+                {
+                    "emotion": row[0],
+                    "topic": row[1],
+                    "strategy": row[2],
+                    "timestamp": row[3]
+                }
+                for row in history
+            ]
+        }
+        user_cache.put(cache_key, result, rows_size(history), generation)
+    return result
+
+@emotion_tool.action('analyze_current')
+def analyze_current(call, db):
+    user_id = call.user_id
+    user_emotion = call.parameters.get('user_emotion')
+    topic = call.parameters.get('topic')
+    db.flush_writes()
+    with db.read() as conn:
+        overall = analytics.emotion_profile(conn, user_id)
+        on_topic = analytics.emotion_profile(conn, user_id, topic) if topic else []
+        strategies = analytics.strategy_means(conn, user_id, user_emotion)
+    seen = next((item["occurrences"] for item in overall if item["emotion"] == user_emotion), 0)
+    return {
+        "emotion": user_emotion,
+        "times_felt": seen,
+        "emotion_profile": overall[:5],
+        "topic_profile": on_topic[:5],
+        "strategies": strategies[:5],
+        "recommended_strategy": strategies[0]["strategy"] if strategies else None
+    }
+
+@goal_tool.action('set_goal')
+def set_goal(call, db):
+    goal_data = call.parameters.get('goal_data') or {}
+    
+    db.execute_write(SET_GOAL_SQL, (
+        call.user_id,
+        call.parameters.get('goal_type'),
+        goal_data.get('title', ''),
+        goal_data.get('description', ''),
+        datetime.now(),
+        datetime.now()
+    ))
+    return {"status": "created", "message": "Goal set successfully"}
+
+@goal_tool.action('get_goals')
+def get_goals(call, db):
+    with db.read() as conn:
+        goals, next_cursor = page(conn, GOALS_PAGE_SQL, GOALS_AFTER_SQL, (call.user_id, 'active'), goal_key,
+                                  call.parameters.get('limit') or GOALS_PAGE, call.parameters.get('cursor'))
+    
+    return {
+        "active_goals": [
+            {
+                "title": goal[1],
+                "description": goal[2],
+                "type": goal[3],
+                "progress": goal[4],
+                "created": goal[6]
+            }
+            for goal in goals
+        ],
+        "next_cursor": next_cursor
+    }
+
+@goal_tool.action('update_progress')
+def update_progress(call, db):
+    progress_update = call.parameters.get('progress_update') or {}
+    title = progress_update.get('title', '')
+    progress = progress_update.get('progress', 0)
+    status = progress_update.get('status') or ('completed' if progress >= 100 else 'active')
+    
+    updated = db.write(lambda conn: conn.execute(UPDATE_PROGRESS_SQL, (
+        progress, status, datetime.now(), call.user_id, title)).rowcount)
+    if not updated:
+        return {"status": "not_found", "title": title}
+    return {"status": "updated", "title": title, "progress": progress, "goal_status": status}
+
+@goal_tool.action('suggest_next_step')
+def suggest_next_step(call, db):
+    with db.read() as conn:
+        summary = analytics.goal_summary(conn, call.user_id)
+        # Closest to done first: finishing something beats starting something
+        focus = conn.execute(FOCUS_GOAL_SQL, (call.user_id,)).fetchone()
+    if focus is None:
+        suggestion = "No active goals yet - set one to get started."
+    elif (focus[3] or 0) == 0:
+        suggestion = f"Take a first small step on '{focus[0]}'."
+    else:
+        suggestion = f"Keep going on '{focus[0]}' ({focus[3]}% done); it is the closest to finished."
+    return {
+        "suggestion": suggestion,
+        "focus_goal": {"title": focus[0], "type": focus[2], "progress": focus[3]} if focus else None,
+        "summary": summary
+    }
+
+@thought_tool.action()
+def log_thought(call, db):
+    parameters = call.parameters
+    
+    # Fire-and-forget: batched by the write-behind buffer
+    db.enqueue_write(LOG_THOUGHT_SQL, (
+        parameters.get('thought_type'),
+        parameters.get('thought_content'),
+        json.dumps(parameters.get('context') or {}),
+        parameters.get('outcome') or '',
+        datetime.now()
+    ))
+    return {"status": "logged", "message": "Thought process recorded"}
+
+memory_manager = instrumented(memory_tool)
+identity_tracker = instrumented(identity_tool)
+emotion_analyzer = instrumented(emotion_tool)
+goal_tracker = instrumented(goal_tool)
+thought_logger = instrumented(thought_tool)
+
+# Tool name -> handler, shared by the Flask and ASGI servers
+TOOLS = {
+    'memory_manager': memory_manager,
+    'identity_tracker': identity_tracker,
+    'emotion_analyzer': emotion_analyzer,
+    'goal_tracker': goal_tracker,
+    'thought_logger': thought_logger,
+}
+
+@instrumented
+def batch(data):
+    """Run several tool functionCalls in one connection and one transaction
+
+    Expects ``message.functionCalls`` as a list of ``{"name", "parameters"}`` for any of
+    the tools above and returns one ``{"name", "status", ...payload}`` per call, in
+    order. Each call runs inside a savepoint, so a failing call is rolled back on its
+    own without undoing the others. The transaction is on the caller's database file;
+    with sharding, calls touching the shared tables (identity, thoughts) or another
+    user's shard commit on their own, outside it.
+    """
+    try:
+        try:
+            check_envelope(data)
+        except ValueError as e:
+            return {"error": f"Invalid batch: {e}"}, 400
+        message = data.get('message', {})
+        calls = message.get('functionCalls', []) if isinstance(message, dict) else None
+        if not isinstance(calls, list):
+            return {"error": "message.functionCalls must be a list"}, 400
+        
+        # Rows buffered by earlier requests must land before this transaction reads
+        db = user_database(get_user_id_from_call(data))
+        db.flush_writes()
+        
+        def run_all(conn):
+            conn.execute("BEGIN")
+            bound = BoundDatabase(conn, owner=db)
+            results = []
+            for function_call in calls:
+                if not isinstance(function_call, dict):
+                    results.append({"name": None, "status": 400,
+                                    "error": "Invalid call: each functionCalls item must be an object"})
+                    continue
+                name = function_call.get('name')
+                handler = TOOLS.get(name) if isinstance(name, str) else None
+                if handler is None:
+                    results.append({"name": name, "status": 404, "error": f"Unknown tool: {name}"})
+                    continue
+                item = {"call": data.get('call', {}), "message": {"functionCall": function_call}}
+                conn.execute("SAVEPOINT batch_item")
+                payload, status = handler(item, db=bound)
+                if status >= 400:
+                    conn.execute("ROLLBACK TO batch_item")
+                conn.execute("RELEASE batch_item")
+                results.append({"name": name, "status": status, **payload})
+            return results
+        
+        results = db.write(run_all)
+        
+        # Handlers invalidated caches before the commit; drop anything a concurrent
+        # read may have cached from the pre-commit state
+        user_cache.invalidate_user(get_user_id_from_call(data))
+        user_cache.invalidate_user('system')
+        identity_cache.invalidate()
+        
+        return {"results": results}, 200
+        
+    except Exception as e:
+        logger.exception("batch failed")
+        return {"error": str(e)}, 500
+
+# Every POST /api/<name> endpoint
+ENDPOINTS = dict(TOOLS, batch=batch)
+
+EXPORTS = ('memories', 'goals', 'thoughts')
+
+def export(kind, user_id=None):
+    """NDJSON chunks for GET /api/export/<kind>; raises ValueError before streaming anything
+
+    Memories and goals are one user's; thoughts have no user and are all exported.
+    """
+    if kind not in EXPORTS:
+        raise ValueError(f"Unknown export: {kind}; expected one of {', '.join(EXPORTS)}")
+    if kind == 'thoughts':
+        db = shared_database()
+        db.flush_writes()
+        return export_thoughts(db)
+    if not user_id:
+        raise ValueError("user_id is required")
+    db = user_database(user_id)
+    return export_memories(db, user_id) if kind == 'memories' else export_goals(db, user_id)
+
+def stats():
+    """Operational counters for the /stats endpoint"""
+    result = {
+        "write_buffer": database.buffer.stats(),
+        "identity_cache": identity_cache.stats(),
+        "user_cache": user_cache.stats(),
+        "logging": prism_logging.stats(),
+        "retention": retention.stats(),
+    }
+    if shards is not None:
+        result["shards"] = {
+            os.path.basename(db.database_path): {
+                "write_buffer": db.buffer.stats(),
+                "retention": sweeper.stats(),
+            }
+            for db, sweeper in zip(shards.databases, retentions[1:])
+        }
+    return result
@@ -0,0 +1,118 @@
+"""Ranked memory recall: importance, recency decay and access frequency.
+
+A memory's score is multiplicative::
+
+    importance * 0.5 ** (age_days / RECENCY_HALF_LIFE_DAYS) * 2 ** (ACCESS_BOOST * H(access_count))
+
+where H(n) = 1 + 1/2 + ... + 1/n grows like log(n), so each further read counts a
+little less. In log2 the score is ``rank_key - now_days / RECENCY_HALF_LIFE_DAYS``:
+
+    rank_key = log2(importance) + created_days / RECENCY_HALF_LIFE_DAYS + ACCESS_BOOST * H(access_count)
+
+The ``now`` term is the same for every row, so ordering by the stored ``rank_key``
+is ordering by score at any moment. Top-k recall is one bounded range scan of
+idx_memories_user_type_rank, however long a user's history is. The key is set
+when a memory is stored. Each read adds ``ACCESS_BOOST / (access_count + 1)``,
+which needs no math functions in SQL. An importance-10 memory ranks with an
+importance-1 memory stored log2(10) * RECENCY_HALF_LIFE_DAYS (about 100) days later.
+
+Changing RECENCY_HALF_LIFE_DAYS or ACCESS_BOOST needs ``rebuild_rank_keys``.
+"""
+import json
+import math
+from datetime import datetime
+
+from db import WriteBufferFull
+from memory_content import dumps
+from prism_logging import logger
+
+RECENCY_HALF_LIFE_DAYS = 30.0
+ACCESS_BOOST = 0.5
+EPOCH = datetime(2000, 1, 1)
+
+MIN_IMPORTANCE, MAX_IMPORTANCE, DEFAULT_IMPORTANCE = 1, 10, 1
+
+# Rough size of a token in the JSON the voice model receives
+BYTES_PER_TOKEN = 4
+
+RANKED_MEMORIES_SQL = '''
+    SELECT id, memory_type, content, timestamp, emotion, topic
+    FROM memories
+    WHERE user_id = ? AND memory_type = ?
+    ORDER BY rank_key DESC LIMIT ?
+'''
+
+# One statement for every memory a retrieve returned; the ids are a JSON array
+RECORD_ACCESS_SQL = '''
+    UPDATE memories
+    SET access_count = access_count + 1,
+        rank_key = rank_key + ? / (access_count + 1),
+        last_accessed = ?
+    WHERE id IN (SELECT value FROM json_each(?))
+'''
+
+
+def clamp_importance(value):
+    """Importance from a tool call as an int in 1-10; missing or malformed means the default"""
+    try:
+        importance = int(value)
+    except (TypeError, ValueError):
+        return DEFAULT_IMPORTANCE
+    return max(MIN_IMPORTANCE, min(MAX_IMPORTANCE, importance))
+
+
+def _days(timestamp):
+    if timestamp is None:
+        return 0.0
+    try:
+        stored = timestamp if isinstance(timestamp, datetime) else datetime.fromisoformat(str(timestamp))
+    except ValueError:
+        return 0.0
+    return (stored - EPOCH).total_seconds() / 86400.0
+
+
+def rank_key(importance, timestamp, access_count=0):
+    """log2 of the score, minus the term every row shares; see the module docstring"""
+    importance = max(importance or DEFAULT_IMPORTANCE, MIN_IMPORTANCE)
+    reads = sum(1.0 / n for n in range(1, (access_count or 0) + 1))
+    return math.log2(importance) + _days(timestamp) / RECENCY_HALF_LIFE_DAYS + ACCESS_BOOST * reads
+
+
+def rebuild_rank_keys(conn):
+    """Recompute every memory's rank_key (after a schema change or new constants)"""
+    conn.create_function("prism_rank_key", 3, rank_key, deterministic=True)
+    conn.execute("UPDATE memories SET rank_key = prism_rank_key(importance, timestamp, access_count)")
+
+
+def ranked_memories(conn, user_id, memory_type, limit=10):
+    """Top ``limit`` memories by score, as ``(id, memory_type, content, timestamp, emotion, topic)``"""
+    return conn.execute(RANKED_MEMORIES_SQL, (user_id, memory_type, limit)).fetchall()
+
+
+def fit_budget(memories, max_tokens):
+    """Indexes of the memories to return, best first, whose JSON fits in ``max_tokens``
+
+    A memory too large for what is left is skipped, so smaller, lower-ranked ones
+    can still use the room.
+    """
+    if max_tokens is None:
+        return list(range(len(memories)))
+    remaining = int(max_tokens) * BYTES_PER_TOKEN
+    kept = []
+    for index, memory in enumerate(memories):
+        size = len(dumps(memory, default=str))
+        if size <= remaining:
+            kept.append(index)
+            remaining -= size
+    return kept
+
+
+def record_access(db, memory_ids):
+    """Count a read of each memory with one buffered UPDATE (best effort)"""
+    if not memory_ids:
+        return
+    try:
+        db.enqueue_write(RECORD_ACCESS_SQL, (ACCESS_BOOST, datetime.now(), json.dumps(memory_ids)))
+    except WriteBufferFull:
+        # Access counts only tune ranking; never fail a recall over them
+        logger.warning("access counts dropped: write buffer full")
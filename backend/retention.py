@@ -0,0 +1,362 @@
+"""Retention for the tables that only grow: memories and thoughts.
+
+A sweep applies the configured policies in small batches:
+
+* memories: per ``memory_type`` (``"*"`` is the default), keep the ``max_rows``
+  best-ranked rows per user (ranking.py) and/or nothing older than ``max_age_days``.
+  Rows past the limit move to the archive database.
+* thoughts: rows older than ``max_age_days`` are archived, then folded into
+  ``thought_rollups`` (one row per day and thought_type).
+
+Cold rows are archived as zlib-compressed JSON chunks in a separate SQLite file.
+Each chunk is written and committed before its rows are deleted through the writer
+thread, so a crash can duplicate a chunk but never lose a row. Chunks are keyed by
+their lowest row id, which makes re-archiving idempotent. Deletes go through the
+writer queue ``batch_size`` rows at a time, interleaved with webhook writes, and
+freed pages are returned with ``PRAGMA incremental_vacuum`` in small steps.
+
+The servers only sweep when PRISM_RETENTION_INTERVAL is set to a positive number
+of seconds; by default nothing is archived or deleted.
+
+Usage: python retention.py [database_path] [--archive path] [--enable-incremental-vacuum]
+"""
+import argparse
+import json
+import os
+import threading
+import time
+import zlib
+from datetime import datetime, timedelta
+
+from db import connect
+from prism_logging import logger
+
+# Per memory_type limits; "*" applies to every type without its own entry.
+# max_rows is per user. Override with PRISM_RETENTION_POLICIES (same JSON shape). They
+# only apply once sweeps are switched on (PRISM_RETENTION_INTERVAL) or run by hand.
+DEFAULT_POLICIES = {
+    "memories": {
+        "self_reflection": {"max_rows": 1000},
+        "*": {"max_rows": 5000},
+    },
+    "thoughts": {"max_age_days": 7},
+}
+
+ARCHIVE_SCHEMA = (
+    '''
+    CREATE TABLE IF NOT EXISTS memory_chunks (
+        first_id INTEGER PRIMARY KEY,
+        last_id INTEGER NOT NULL,
+        user_id TEXT,
+        memory_type TEXT,
+        first_at DATETIME,
+        last_at DATETIME,
+        row_count INTEGER NOT NULL,
+        payload BLOB NOT NULL
+    )
+    ''',
+    '''
+    CREATE INDEX IF NOT EXISTS idx_memory_chunks_user
+    ON memory_chunks (user_id, memory_type, last_at)
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS thought_chunks (
+        first_id INTEGER PRIMARY KEY,
+        last_id INTEGER NOT NULL,
+        first_at DATETIME,
+        last_at DATETIME,
+        row_count INTEGER NOT NULL,
+        payload BLOB NOT NULL
+    )
+    ''',
+)
+
+MEMORY_COLUMNS = ("id", "user_id", "memory_type", "content", "timestamp", "emotion", "topic", "importance",
+                  "access_count", "last_accessed")
+THOUGHT_COLUMNS = ("id", "thought_type", "content", "context", "outcome", "timestamp")
+
+ROLLUP_SQL = '''
+    INSERT INTO thought_rollups (day, thought_type, thoughts, first_at, last_at)
+    SELECT date(timestamp), coalesce(thought_type, ''), count(*), min(timestamp), max(timestamp)
+    FROM thoughts WHERE id IN ({ids})
+    GROUP BY 1, 2
+    ON CONFLICT (day, thought_type) DO UPDATE SET
+        thoughts = thoughts + excluded.thoughts,
+        first_at = min(first_at, excluded.first_at),
+        last_at = max(last_at, excluded.last_at)
+'''
+
+
+def load_policies():
+    raw = os.environ.get('PRISM_RETENTION_POLICIES')
+    return json.loads(raw) if raw else DEFAULT_POLICIES
+
+
+def pack(columns, rows):
+    """Compress rows into one archive payload"""
+    return zlib.compress(json.dumps([dict(zip(columns, row)) for row in rows], default=str).encode(), 6)
+
+
+def unpack(payload):
+    return json.loads(zlib.decompress(payload))
+
+
+def open_archive(path):
+    conn = connect(path)
+    with conn:
+        for statement in ARCHIVE_SCHEMA:
+            conn.execute(statement)
+    return conn
+
+
+def read_archived_memories(archive_conn, user_id, memory_type=None):
+    """Every archived memory of a user (optionally one type), oldest chunk first"""
+    sql = "SELECT payload FROM memory_chunks WHERE user_id IS ?"
+    params = [user_id]
+    if memory_type is not None:
+        sql += " AND memory_type = ?"
+        params.append(memory_type)
+    rows = []
+    for (payload,) in archive_conn.execute(sql + " ORDER BY last_at", params).fetchall():
+        rows.extend(unpack(payload))
+    return rows
+
+
+class Retention:
+    """Applies retention policies to a Database; ``start`` runs sweeps in the background"""
+
+    def __init__(self, database, archive_path, policies=None, batch_size=500, vacuum_pages=256,
+                 on_archive=None, clock=datetime.now):
+        self.database = database
+        self.archive_path = archive_path
+        self.policies = policies or load_policies()
+        self.batch_size = batch_size
+        self.vacuum_pages = vacuum_pages
+        # Called with a user_id after that user's memories were archived (cache invalidation)
+        self.on_archive = on_archive
+        self._clock = clock
+        self._archive = None
+        self._thread = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._stats = {
+            "sweeps": 0,
+            "archived_memories": 0,
+            "archived_thoughts": 0,
+            "vacuumed_pages": 0,
+            "last_sweep_seconds": 0.0,
+            "last_error": None,
+        }
+
+    def _archive_conn(self):
+        if self._archive is None:
+            self._archive = open_archive(self.archive_path)
+        return self._archive
+
+    def _cutoff(self, policy):
+        days = policy.get("max_age_days")
+        return self._clock() - timedelta(days=days) if days is not None else None
+
+    def _delete(self, table, ids, rollup=False):
+        placeholders = ','.join('?' * len(ids))
+
+        def delete(conn):
+            if rollup:
+                conn.execute(ROLLUP_SQL.format(ids=placeholders), ids)
+            conn.execute(f"DELETE FROM {table} WHERE id IN ({placeholders})", ids)
+
+        self.database.write(delete)
+
+    def _memory_policy(self, memory_type):
+        policies = self.policies.get("memories", {})
+        return policies.get(memory_type, policies.get("*"))
+
+    def _next_memory_batch(self, user_id, memory_type, policy):
+        # Overflow beyond max_rows first (the best-ranked rows are kept, see ranking.py),
+        # then anything too old. Content is archived as JSON text whatever the file's format.
+        columns = ', '.join('prism_content_text(content)' if column == 'content' else column
+                            for column in MEMORY_COLUMNS)
+        with self.database.read() as conn:
+            if policy.get("max_rows") is not None:
+                rows = conn.execute(f'''
+                    SELECT {columns} FROM memories
+                    WHERE user_id IS ? AND memory_type IS ?
+                    ORDER BY rank_key DESC LIMIT ? OFFSET ?
+                ''', (user_id, memory_type, self.batch_size, policy["max_rows"])).fetchall()
+                if rows:
+                    return rows
+            cutoff = self._cutoff(policy)
+            if cutoff is None:
+                return []
+            return conn.execute(f'''
+                SELECT {columns} FROM memories
+                WHERE user_id IS ? AND memory_type IS ? AND timestamp < ?
+                ORDER BY timestamp LIMIT ?
+            ''', (user_id, memory_type, cutoff, self.batch_size)).fetchall()
+
+    def archive_memories(self):
+        archived = 0
+        with self.database.read() as conn:
+            # One covering scan of idx_memories_user_type_time finds the groups over a limit
+            groups = conn.execute('''
+                SELECT user_id, memory_type, count(*), min(timestamp)
+                FROM memories GROUP BY user_id, memory_type
+            ''').fetchall()
+        for user_id, memory_type, count, oldest in groups:
+            policy = self._memory_policy(memory_type)
+            if not policy:
+                continue
+            cutoff = self._cutoff(policy)
+            over_cap = policy.get("max_rows") is not None and count > policy["max_rows"]
+            too_old = cutoff is not None and oldest is not None and oldest < str(cutoff)
+            if not (over_cap or too_old):
+                continue
+            moved = 0
+            while not self._stop.is_set():
+                rows = self._next_memory_batch(user_id, memory_type, policy)
+                if not rows:
+                    break
+                self._store_memory_chunk(user_id, memory_type, rows)
+                self._delete("memories", [row[0] for row in rows])
+                moved += len(rows)
+            if moved and self.on_archive is not None:
+                self.on_archive(user_id)
+            archived += moved
+        return archived
+
+    def _store_memory_chunk(self, user_id, memory_type, rows):
+        archive = self._archive_conn()
+        timestamps = [row[4] for row in rows if row[4] is not None]
+        with archive:
+            archive.execute('''
+                INSERT OR REPLACE INTO memory_chunks
+                    (first_id, last_id, user_id, memory_type, first_at, last_at, row_count, payload)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (min(row[0] for row in rows), max(row[0] for row in rows), user_id, memory_type,
+                  min(timestamps, default=None), max(timestamps, default=None), len(rows),
+                  pack(MEMORY_COLUMNS, rows)))
+
+    def archive_thoughts(self):
+        cutoff = self._cutoff(self.policies.get("thoughts", {}))
+        if cutoff is None:
+            return 0
+        archived = 0
+        columns = ', '.join(THOUGHT_COLUMNS)
+        while not self._stop.is_set():
+            with self.database.read() as conn:
+                rows = conn.execute(f'''
+                    SELECT {columns} FROM thoughts
+                    WHERE timestamp < ? ORDER BY timestamp LIMIT ?
+                ''', (cutoff, self.batch_size)).fetchall()
+            if not rows:
+                break
+            archive = self._archive_conn()
+            with archive:
+                archive.execute('''
+                    INSERT OR REPLACE INTO thought_chunks (first_id, last_id, first_at, last_at, row_count, payload)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                ''', (min(row[0] for row in rows), max(row[0] for row in rows), rows[0][5], rows[-1][5],
+                      len(rows), pack(THOUGHT_COLUMNS, rows)))
+            self._delete("thoughts", [row[0] for row in rows], rollup=True)
+            archived += len(rows)
+        return archived
+
+    def vacuum(self):
+        """Return free pages to the OS a few at a time; a no-op unless auto_vacuum is INCREMENTAL"""
+        freed = 0
+        with self.database.read() as conn:
+            if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+                return 0
+        while not self._stop.is_set():
+            with self.database.read() as conn:
+                free = conn.execute("PRAGMA freelist_count").fetchone()[0]
+            if free == 0:
+                break
+            pages = min(free, self.vacuum_pages)
+            # incremental_vacuum frees one page per VM step; execute() would only take the
+            # first step, executescript() runs the statement to completion
+            self.database.write(lambda conn: conn.executescript(f"PRAGMA incremental_vacuum({pages})"))
+            freed += pages
+        return freed
+
+    def sweep(self):
+        """Run every policy once and return what was done"""
+        started = time.perf_counter()
+        result = {
+            "archived_memories": self.archive_memories(),
+            "archived_thoughts": self.archive_thoughts(),
+            "vacuumed_pages": self.vacuum(),
+        }
+        with self._lock:
+            self._stats["sweeps"] += 1
+            for key, value in result.items():
+                self._stats[key] += value
+            self._stats["last_sweep_seconds"] = round(time.perf_counter() - started, 3)
+        return result
+
+    def _run(self, interval, initial_delay):
+        delay = initial_delay
+        while not self._stop.wait(delay):
+            delay = interval
+            try:
+                result = self.sweep()
+                logger.info("retention sweep", extra={"fields": result})
+            except Exception as e:
+                with self._lock:
+                    self._stats["last_error"] = str(e)
+                logger.exception("retention sweep failed")
+
+    def start(self, interval, initial_delay=60.0):
+        """Sweep every ``interval`` seconds on a daemon thread (idempotent)"""
+        with self._lock:
+            if self._thread is not None or interval <= 0:
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, args=(interval, min(initial_delay, interval)),
+                                            name="prism-retention", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stop the background thread after its current batch"""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        self._stop.set()
+        if thread is not None:
+            thread.join()
+        if self._archive is not None:
+            self._archive.close()
+            self._archive = None
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats)
+
+
+def enable_incremental_vacuum(path):
+    """Switch an existing database to auto_vacuum=INCREMENTAL (rewrites the file once)"""
+    conn = connect(path)
+    try:
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.execute("VACUUM")
+        return conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    from db import Database
+
+    parser = argparse.ArgumentParser(description="Run one retention sweep")
+    parser.add_argument('database', nargs='?', default="prism_data.db")
+    parser.add_argument('--archive', help="archive database (default: <database>_archive.db)")
+    parser.add_argument('--enable-incremental-vacuum', action='store_true',
+                        help="one-off VACUUM that converts an existing database; stop the servers first")
+    args = parser.parse_args()
+
+    if args.enable_incremental_vacuum:
+        print(f"incremental vacuum enabled: {enable_incremental_vacuum(args.database)}")
+    database = Database(args.database)
+    retention = Retention(database, args.archive or os.path.splitext(args.database)[0] + "_archive.db")
+    print(json.dumps(retention.sweep(), indent=2))
+    retention.stop()
+    database.close()
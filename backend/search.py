@@ -0,0 +1,134 @@
+import re
+
+# External-content FTS5 index over memories(content, topic). user_id is indexed too
+# so a MATCH only walks the caller's posting lists instead of every user's hits.
+# Triggers keep it in sync with every insert/update/delete, whichever code path
+# writes the row.
+FTS_SCHEMA = (
+    '''
+    CREATE VIRTUAL TABLE IF NOT EXISTS memories_fts USING fts5(
+        content,
+        topic,
+        user_id,
+        content='memories',
+        content_rowid='id'
+    )
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS memories_fts_insert AFTER INSERT ON memories BEGIN
+        INSERT INTO memories_fts (rowid, content, topic, user_id)
+        VALUES (new.id, new.content, new.topic, new.user_id);
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS memories_fts_delete AFTER DELETE ON memories BEGIN
+        INSERT INTO memories_fts (memories_fts, rowid, content, topic, user_id)
+        VALUES ('delete', old.id, old.content, old.topic, old.user_id);
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS memories_fts_update AFTER UPDATE OF content, topic, user_id ON memories BEGIN
+        INSERT INTO memories_fts (memories_fts, rowid, content, topic, user_id)
+        VALUES ('delete', old.id, old.content, old.topic, old.user_id);
+        INSERT INTO memories_fts (rowid, content, topic, user_id)
+        VALUES (new.id, new.content, new.topic, new.user_id);
+    END
+    ''',
+)
+
+# The same index for files storing compressed content (memory_content.py): it reads
+# the text through a view, and the triggers decompress it with prism_content_text
+COMPRESSED_FTS_SCHEMA = (
+    '''
+    CREATE VIEW IF NOT EXISTS memories_fts_source AS
+    SELECT id, prism_content_text(content) AS content, topic, user_id FROM memories
+    ''',
+    '''
+    CREATE VIRTUAL TABLE IF NOT EXISTS memories_fts USING fts5(
+        content,
+        topic,
+        user_id,
+        content='memories_fts_source',
+        content_rowid='id'
+    )
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS memories_fts_insert AFTER INSERT ON memories BEGIN
+        INSERT INTO memories_fts (rowid, content, topic, user_id)
+        VALUES (new.id, prism_content_text(new.content), new.topic, new.user_id);
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS memories_fts_delete AFTER DELETE ON memories BEGIN
+        INSERT INTO memories_fts (memories_fts, rowid, content, topic, user_id)
+        VALUES ('delete', old.id, prism_content_text(old.content), old.topic, old.user_id);
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS memories_fts_update AFTER UPDATE OF content, topic, user_id ON memories BEGIN
+        INSERT INTO memories_fts (memories_fts, rowid, content, topic, user_id)
+        VALUES ('delete', old.id, prism_content_text(old.content), old.topic, old.user_id);
+        INSERT INTO memories_fts (rowid, content, topic, user_id)
+        VALUES (new.id, prism_content_text(new.content), new.topic, new.user_id);
+    END
+    ''',
+)
+
+# The user_id column gets zero weight so it scopes results without skewing bm25
+SEARCH_SQL = '''
+    SELECT m.id, m.memory_type, m.content, m.timestamp, m.emotion, m.topic
+    FROM memories_fts
+    JOIN memories m ON m.id = memories_fts.rowid
+    WHERE memories_fts MATCH ? AND m.user_id = ?
+    ORDER BY bm25(memories_fts, 1.0, 1.0, 0.0)
+    LIMIT ?
+'''
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+
+def ensure_memory_fts(conn):
+    """Create the memories FTS index and backfill it from existing rows on first run"""
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'memories_fts'"
+    ).fetchone()
+    for statement in FTS_SCHEMA:
+        conn.execute(statement)
+    if not exists:
+        conn.execute("INSERT INTO memories_fts (memories_fts) VALUES ('rebuild')")
+
+
+def drop_memory_fts(conn):
+    """Drop the index, its triggers and (compressed layout) its source view"""
+    for trigger in ("memories_fts_insert", "memories_fts_delete", "memories_fts_update"):
+        conn.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    conn.execute("DROP TABLE IF EXISTS memories_fts")
+    conn.execute("DROP VIEW IF EXISTS memories_fts_source")
+
+
+def fts_query(text, user_id=None):
+    """Turn free text into an FTS5 MATCH expression, or None if it has no searchable terms
+
+    Each word becomes a quoted prefix term so user input can never inject FTS syntax,
+    and prefix matching keeps the old substring-style recall for partial words. The
+    user_id phrase only narrows the candidate set; callers still filter on the exact id.
+    """
+    terms = _TOKEN.findall(text or '')
+    if not terms:
+        return None
+    match = '{content topic} : (' + ' AND '.join(f'"{term}"*' for term in terms) + ')'
+    user_terms = _TOKEN.findall(user_id or '')
+    if user_terms:
+        match = 'user_id : "' + ' '.join(user_terms) + '" AND ' + match
+    return match
+
+
+def search_memories(conn, user_id, query, limit=10):
+    """bm25-ranked ``(id, memory_type, content, timestamp, emotion, topic)`` rows for one user
+
+    None when the query has no searchable terms.
+    """
+    match = fts_query(query, user_id)
+    if match is None:
+        return None
+    return conn.execute(SEARCH_SQL, (match, user_id, limit)).fetchall()
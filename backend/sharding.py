@@ -0,0 +1,161 @@
+"""Horizontal sharding of the per-user tables by user_id.
+
+With ``PRISM_SHARDS=N`` (N > 1), memories, emotional_context and goals live in N
+SQLite files next to the main database (``prism_data_shard0.db`` ...). Each user
+is placed on one of them by a consistent-hash ring. Every shard is a full
+Database with its own connection pool and writer thread, so writes for users on
+different shards no longer queue behind one SQLite write lock. Tables without a
+user_id (identity_traits, thoughts and their rollups) stay in the main file.
+
+The ring has ``VNODES`` points per shard. Going from N to M shards moves only
+about ``|M - N| / max(M, N)`` of the users. Shard i keeps its file name whatever
+the count. Changing the count means moving rows with the rebalance command
+below, while the servers are stopped. Going from 1 moves every user out of the
+main file. Going to 1 moves them back.
+
+Usage: python sharding.py rebalance --from N --to M [--database prism_data.db]
+"""
+import argparse
+import hashlib
+import json
+import os
+from bisect import bisect
+
+from db import Database, connect, enable_wal
+from memory_content import content_format, transcode
+from migrations import migrate
+
+USER_TABLES = ("memories", "emotional_context", "goals")
+VNODES = 64
+
+
+def shard_paths(database_path, shards):
+    """The files holding user rows for a shard count; just the main file when unsharded"""
+    if shards <= 1:
+        return [database_path]
+    base = os.path.splitext(database_path)[0]
+    return [f"{base}_shard{i}.db" for i in range(shards)]
+
+
+def _hash(key):
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), 'big')
+
+
+class HashRing:
+    """Consistent hash ring mapping a user_id to a shard index"""
+
+    def __init__(self, shards, vnodes=VNODES):
+        points = sorted((_hash(f"shard-{shard}#{vnode}"), shard)
+                        for shard in range(shards) for vnode in range(vnodes))
+        self._points = [point for point, _ in points]
+        self._shards = [shard for _, shard in points]
+
+    def shard(self, user_id):
+        index = bisect(self._points, _hash(user_id or '')) % len(self._points)
+        return self._shards[index]
+
+
+class ShardSet:
+    """One Database per shard file, routed by HashRing"""
+
+    def __init__(self, paths, pool_size=8):
+        self.ring = HashRing(len(paths))
+        self.databases = [Database(path, pool_size=pool_size) for path in paths]
+
+    def for_user(self, user_id):
+        return self.databases[self.ring.shard(user_id)]
+
+    def close(self):
+        for database in self.databases:
+            database.close()
+
+
+def _columns(conn, table):
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({table})") if row[1] != 'id']
+
+
+def _move_user(source, target, user_id):
+    """Copy one user's rows to ``target`` and commit, then delete them from ``source``
+
+    The copy first clears the user from the target, so re-running after an
+    interrupted move converges instead of duplicating rows. Memory ids are
+    reassigned by the target, and memory_vectors rows follow them.
+    """
+    moved = 0
+    with target:
+        for table in USER_TABLES:
+            target.execute(f"DELETE FROM {table} WHERE user_id IS ?", (user_id,))
+
+        columns = _columns(source, 'memories')
+        insert = (f"INSERT INTO memories ({', '.join(columns)}) "
+                  f"VALUES ({', '.join('?' * len(columns))})")
+        # The two files may store content differently (memory_content.py)
+        target_format = content_format(target)
+        content = columns.index('content')
+        new_ids = {}
+        for row in source.execute(f"SELECT id, {', '.join(columns)} FROM memories WHERE user_id IS ? ORDER BY id",
+                                  (user_id,)):
+            values = list(row[1:])
+            values[content] = transcode(values[content], target_format)
+            new_ids[row[0]] = target.execute(insert, values).lastrowid
+        target.executemany(
+            "INSERT INTO memory_vectors (memory_id, user_id, vector) VALUES (?, ?, ?)",
+            [(new_ids[memory_id], user_id, vector) for memory_id, vector in source.execute(
+                "SELECT memory_id, vector FROM memory_vectors WHERE user_id IS ?", (user_id,))
+             if memory_id in new_ids])
+        moved += len(new_ids)
+
+        for table in USER_TABLES[1:]:
+            columns = _columns(source, table)
+            rows = source.execute(f"SELECT {', '.join(columns)} FROM {table} WHERE user_id IS ? ORDER BY id",
+                                  (user_id,)).fetchall()
+            target.executemany(f"INSERT INTO {table} ({', '.join(columns)}) "
+                               f"VALUES ({', '.join('?' * len(columns))})", rows)
+            moved += len(rows)
+
+    # memory_vectors and the FTS index follow through the delete triggers
+    with source:
+        for table in USER_TABLES:
+            source.execute(f"DELETE FROM {table} WHERE user_id IS ?", (user_id,))
+    return moved
+
+
+def rebalance(database_path, old_shards, new_shards, log=print):
+    """Move every user whose shard changes between the two counts; servers must be stopped"""
+    sources = shard_paths(database_path, old_shards)
+    targets = shard_paths(database_path, new_shards)
+    ring = HashRing(len(targets))
+
+    conns = {}
+    for path in set(sources) | set(targets):
+        conn = conns[path] = connect(path)
+        enable_wal(conn)
+        migrate(conn)
+
+    moved_users = moved_rows = 0
+    try:
+        for source in sources:
+            users = set()
+            for table in USER_TABLES:
+                users.update(user for (user,) in conns[source].execute(f"SELECT DISTINCT user_id FROM {table}"))
+            for user_id in sorted(users, key=lambda user: user or ''):
+                target = targets[ring.shard(user_id)]
+                if target == source:
+                    continue
+                moved_rows += _move_user(conns[source], conns[target], user_id)
+                moved_users += 1
+            log(f"{source}: {len(users)} users checked, {moved_users} moved so far")
+    finally:
+        for conn in conns.values():
+            conn.close()
+    return {"moved_users": moved_users, "moved_rows": moved_rows}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Move users between shard files after changing PRISM_SHARDS")
+    parser.add_argument('command', choices=['rebalance'])
+    parser.add_argument('--database', default="prism_data.db", help="main database file")
+    parser.add_argument('--from', dest='old', type=int, required=True, help="current shard count (1 = unsharded)")
+    parser.add_argument('--to', dest='new', type=int, required=True, help="new shard count")
+    args = parser.parse_args()
+    print(json.dumps(rebalance(args.database, args.old, args.new), indent=2))
@@ -0,0 +1,36 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REPO_DIR = os.path.dirname(BACKEND_DIR)
+sys.path[:0] = [BACKEND_DIR, REPO_DIR]
+
+# prism_tools opens its database on import; never let a test run touch prism_data.db
+os.environ.setdefault('PRISM_DATABASE_PATH', os.path.join(tempfile.mkdtemp(prefix="prism_tests_"), "prism_data.db"))
+# Tests check the default settings, whatever the developer's shell has switched on
+os.environ.pop('PRISM_RETENTION_INTERVAL', None)
+
+
+@pytest.fixture
+def database_path(tmp_path):
+    return str(tmp_path / "prism_data.db")
+
+
+@pytest.fixture(scope="session")
+def client():
+    """Flask test client over the scratch PRISM_DATABASE_PATH, migrated"""
+    import prism_server
+
+    prism_server.init_database()
+    return prism_server.app.test_client()
+
+
+def tool_call(tool, parameters, user="+15550100"):
+    """A Vapi functionCall webhook body"""
+    return {
+        "call": {"customer": {"phoneNumber": user}},
+        "message": {"functionCall": {"name": tool, "parameters": parameters}},
+    }
@@ -0,0 +1,91 @@
+import pytest
+
+import analytics
+from conftest import tool_call
+from db import connect
+from migrations import migrate
+
+USER = "+15550161"
+
+
+@pytest.fixture
+def conn(database_path):
+    conn = connect(database_path)
+    migrate(conn)
+    yield conn
+    conn.close()
+
+
+def emotion(conn, user, feeling, topic, strategy, score):
+    with conn:
+        return conn.execute('''
+            INSERT INTO emotional_context (user_id, emotion, topic, response_strategy, effectiveness_score)
+            VALUES (?, ?, ?, ?, ?)
+        ''', (user, feeling, topic, strategy, score)).lastrowid
+
+
+def goal(conn, user, title, goal_type, progress, status='active'):
+    with conn:
+        return conn.execute('''
+            INSERT INTO goals (user_id, title, goal_type, progress, status) VALUES (?, ?, ?, ?, ?)
+        ''', (user, title, goal_type, progress, status)).lastrowid
+
+
+def test_triggers_keep_aggregates_equal_to_the_raw_rows(conn):
+    first = emotion(conn, USER, "joy", "work", "celebrate", 8)
+    emotion(conn, USER, "joy", "work", "celebrate", 6)
+    emotion(conn, USER, None, None, None, None)
+    emotion(conn, "other", "joy", "work", "celebrate", 1)
+    running = goal(conn, USER, "marathon", "personal_development", 40)
+    goal(conn, USER, "book", "learning", 10)
+    assert analytics.check(conn) == []
+    assert analytics.strategy_means(conn, USER, "joy") == [
+        {"strategy": "celebrate", "mean_effectiveness": 7.0, "rated": 2}]
+    assert analytics.emotion_profile(conn, USER, "work") == [{"emotion": "joy", "occurrences": 2}]
+
+    with conn:
+        conn.execute("UPDATE emotional_context SET emotion = 'calm', effectiveness_score = 9 WHERE id = ?", (first,))
+        conn.execute("UPDATE goals SET progress = 100, status = 'completed' WHERE id = ?", (running,))
+    assert analytics.check(conn) == []
+    assert analytics.goal_summary(conn, USER)["by_status"] == {
+        "active": {"goals": 1, "mean_progress": 10.0}, "completed": {"goals": 1, "mean_progress": 100.0}}
+
+    with conn:
+        conn.execute("DELETE FROM emotional_context WHERE user_id = ?", (USER,))
+        conn.execute("DELETE FROM goals WHERE id = ?", (running,))
+    assert analytics.check(conn) == []
+    # Emptied groups are removed, not left at zero
+    assert conn.execute("SELECT count(*) FROM emotion_topic_counts WHERE user_id = ?", (USER,)).fetchone()[0] == 0
+    assert conn.execute("SELECT count(*) FROM goal_rollups WHERE status = 'completed'").fetchone()[0] == 0
+
+
+def test_check_reports_drift_and_rebuild_repairs_it(conn):
+    emotion(conn, USER, "joy", "work", "celebrate", 8)
+    goal(conn, USER, "marathon", "personal_development", 40)
+    with conn:
+        conn.execute("UPDATE goal_rollups SET progress_sum = progress_sum + 5")
+        conn.execute("DELETE FROM emotion_topic_counts")
+        conn.execute("INSERT INTO strategy_effectiveness VALUES ('ghost', 'joy', 'celebrate', 1, 1)")
+    problems = analytics.check(conn)
+    assert len(problems) == 3
+    assert {problem.split()[0] for problem in problems} == set(analytics.ANALYTICS_TABLES)
+
+    with conn:
+        analytics.rebuild(conn)
+    assert analytics.check(conn) == []
+
+
+def test_suggest_next_step_focuses_on_the_goal_closest_to_done(client):
+    user = "+15550162"
+    assert client.post("/api/goal_tracker", json=tool_call("goal_tracker", {"action": "suggest_next_step"}, user)
+                       ).get_json()["result"]["focus_goal"] is None
+    for title, progress in (("book", 30), ("marathon", 70), ("garden", 0)):
+        client.post("/api/goal_tracker", json=tool_call("goal_tracker", {
+            "action": "set_goal", "goal_type": "project", "goal_data": {"title": title}}, user))
+        if progress:
+            client.post("/api/goal_tracker", json=tool_call("goal_tracker", {
+                "action": "update_progress", "progress_update": {"title": title, "progress": progress}}, user))
+    result = client.post("/api/goal_tracker", json=tool_call("goal_tracker", {"action": "suggest_next_step"}, user)
+                         ).get_json()["result"]
+    assert result["focus_goal"] == {"title": "marathon", "type": "project", "progress": 70}
+    assert result["summary"]["by_status"]["active"] == {"goals": 3, "mean_progress": 33.3}
@@ -0,0 +1,54 @@
+import pytest
+
+from conftest import tool_call
+
+USER = "+15550123"
+
+
+def batch_body(calls, user=USER):
+    return {"call": {"customer": {"phoneNumber": user}}, "message": {"functionCalls": calls}}
+
+
+def test_batch_runs_every_call(client):
+    response = client.post("/api/batch", json=batch_body([
+        {"name": "memory_manager", "parameters": {"action": "store", "memory_type": "learning",
+                                                  "content": {"note": "likes hiking"}}},
+        {"name": "memory_manager", "parameters": {"action": "retrieve", "memory_type": "learning"}},
+    ]))
+    assert response.status_code == 200
+    stored, retrieved = response.get_json()["results"]
+    assert stored["status"] == retrieved["status"] == 200
+    assert retrieved["result"]["memories"][0]["content"] == {"note": "likes hiking"}
+
+
+def test_failed_call_rolls_back_alone(client):
+    response = client.post("/api/batch", json=batch_body([
+        {"name": "goal_tracker", "parameters": {"action": "set_goal", "goal_type": "personal_development",
+                                                "goal_data": {"title": "run a marathon"}}},
+        {"name": "memory_manager"},
+        {"name": "no_such_tool", "parameters": {}},
+    ]))
+    assert [item["status"] for item in response.get_json()["results"]] == [200, 400, 404]
+    goals = client.post("/api/goal_tracker", json=tool_call("goal_tracker", {"action": "get_goals"}, USER))
+    assert [goal["title"] for goal in goals.get_json()["result"]["active_goals"]] == ["run a marathon"]
+
+
+@pytest.mark.parametrize("body", ["garbage", '"x"', "[1, 2]", "null"])
+def test_body_that_is_not_an_object_is_a_400(client, body):
+    response = client.post("/api/batch", data=body, content_type="application/json")
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize("body", [{"message": "x"}, {"message": {"functionCalls": {}}}, {"call": "x"}])
+def test_malformed_envelope_is_a_400(client, body):
+    assert client.post("/api/batch", json=body).status_code == 400
+
+
+def test_malformed_item_is_a_400_result_and_the_rest_still_run(client):
+    response = client.post("/api/batch", json=batch_body([
+        "x",
+        {"name": ["memory_manager"], "parameters": {}},
+        {"name": "identity_tracker", "parameters": {"action": "get_identity"}},
+    ]))
+    assert response.status_code == 200
+    assert [item["status"] for item in response.get_json()["results"]] == [400, 404, 200]
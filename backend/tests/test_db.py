@@ -0,0 +1,137 @@
+import sqlite3
+import threading
+from datetime import datetime
+
+import pytest
+
+from db import Database, connect, enable_wal
+
+SCHEMA = '''
+    CREATE TABLE thoughts (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        thought_type TEXT,
+        content TEXT,
+        timestamp DATETIME
+    )
+'''
+INSERT = 'INSERT INTO thoughts (thought_type, content, timestamp) VALUES (?, ?, ?)'
+
+
+def run_threads(count, target):
+    threads = [threading.Thread(target=target, args=(n,)) for n in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def test_enable_wal(database_path):
+    conn = connect(database_path)
+    assert enable_wal(conn)
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == 'wal'
+    conn.close()
+
+
+def test_concurrent_writes_and_reads_never_hit_a_lock(database_path):
+    database = Database(database_path, pool_size=8)
+    database.write(lambda conn: (enable_wal(conn), conn.execute(SCHEMA)))
+    errors, writers, writes = [], 16, 100
+    stop = threading.Event()
+
+    def write(n):
+        for i in range(writes):
+            try:
+                database.execute_write(INSERT, ('reasoning', f'thought {n}.{i}', datetime.now()))
+            except sqlite3.OperationalError as e:
+                errors.append(e)
+
+    def read(n):
+        while not stop.is_set():
+            try:
+                with database.read() as conn:
+                    conn.execute("SELECT count(*) FROM thoughts").fetchone()
+            except sqlite3.OperationalError as e:
+                errors.append(e)
+
+    readers = threading.Thread(target=run_threads, args=(4, read))
+    readers.start()
+    run_threads(writers, write)
+    stop.set()
+    readers.join()
+
+    with database.read() as conn:
+        assert conn.execute("SELECT count(*) FROM thoughts").fetchone()[0] == writers * writes
+    database.close()
+    assert errors == []
+
+
+def test_write_rolls_back_a_failed_job(database_path):
+    database = Database(database_path)
+    database.write(lambda conn: conn.execute(SCHEMA))
+
+    def fail(conn):
+        conn.execute(INSERT, ('reasoning', 'lost', datetime.now()))
+        raise ValueError("handler failed")
+
+    with pytest.raises(ValueError):
+        database.write(fail)
+    with database.read() as conn:
+        assert conn.execute("SELECT count(*) FROM thoughts").fetchone()[0] == 0
+    database.close()
+
+
+
+def test_buffered_writes_are_visible_after_flush(database_path):
+    database = Database(database_path)
+    database.write(lambda conn: conn.execute(SCHEMA))
+
+    run_threads(8, lambda n: [database.enqueue_write(INSERT, ('reasoning', f'{n}.{i}', datetime.now()))
+                              for i in range(50)])
+    database.flush_writes()
+    with database.read() as conn:
+        assert conn.execute("SELECT count(*) FROM thoughts").fetchone()[0] == 400
+    database.close()
+
+
+def test_bad_row_is_dropped_and_the_rest_of_its_batch_written(database_path):
+    database = Database(database_path)
+    database.write(lambda conn: conn.execute(SCHEMA))
+
+    database.enqueue_write(INSERT, ('reasoning', 'kept', datetime.now()))
+    database.enqueue_write('INSERT INTO missing_table VALUES (?)', (1,))
+    database.enqueue_write(INSERT, ('reasoning', 'kept too', datetime.now()))
+    database.flush_writes()
+    with database.read() as conn:
+        assert conn.execute("SELECT count(*) FROM thoughts").fetchone()[0] == 2
+    assert database.buffer.stats()["failed_rows"] == 1
+    database.close()
+
+
+class FailingWriter:
+    """A WriteQueue whose first ``failures`` jobs fail the way a full queue does"""
+
+    def __init__(self, writer, failures):
+        self.writer = writer
+        self.failures = failures
+
+    def run(self, fn):
+        if self.failures:
+            self.failures -= 1
+            raise TimeoutError("Database write queue is full")
+        return self.writer.run(fn)
+
+
+def test_flush_thread_survives_a_failing_writer(database_path):
+    database = Database(database_path)
+    database.write(lambda conn: conn.execute(SCHEMA))
+    database.buffer.writer = FailingWriter(database.writer, failures=1)
+
+    database.enqueue_write(INSERT, ('reasoning', 'lost', datetime.now()))
+    database.flush_writes()
+    database.enqueue_write(INSERT, ('reasoning', 'written', datetime.now()))
+    database.flush_writes()
+
+    with database.read() as conn:
+        assert conn.execute("SELECT content FROM thoughts").fetchall() == [('written',)]
+    assert database.buffer.stats()["failed_rows"] == 1
+    database.close()
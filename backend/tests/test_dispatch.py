@@ -0,0 +1,47 @@
+import pytest
+
+import prism_tools
+from conftest import tool_call
+
+
+@pytest.mark.parametrize("name", sorted(prism_tools.TOOLS))
+def test_schema_advertises_exactly_the_registered_actions(name):
+    tool = prism_tools.TOOLS[name].__wrapped__
+    if tool.action_key is None:
+        assert list(tool.actions) == [None]
+        return
+    assert set(tool.schema["properties"][tool.action_key]["enum"]) == set(tool.actions)
+
+
+def test_unknown_action_is_a_400(client):
+    response = client.post("/api/memory_manager", json=tool_call("memory_manager", {"action": "update"}))
+    assert response.status_code == 400
+    assert "must be one of" in response.get_json()["error"]
+
+
+def test_schema_violation_names_every_problem(client):
+    response = client.post("/api/memory_manager", json=tool_call("memory_manager", {
+        "action": "retrieve", "memory_type": "gossip", "limit": 1000}))
+    assert response.status_code == 400
+    error = response.get_json()["error"]
+    assert "memory_type" in error and "limit" in error
+
+
+RETRIEVE = {"functionCall": {"name": "memory_manager", "parameters": {"action": "retrieve"}}}
+
+
+@pytest.mark.parametrize("body", [
+    {"message": {"call": "x"}},
+    {"message": {"call": {"customer": None}}},
+    {"call": "x", "message": RETRIEVE},
+    {"call": {"customer": None}, "message": RETRIEVE},
+    {"call": {"customer": {"phoneNumber": ["+15550100"]}}, "message": RETRIEVE},
+    {"call": {"id": ["call-1"]}, "message": RETRIEVE},
+])
+@pytest.mark.parametrize("path", ["/api/memory_manager", "/api/batch"])
+def test_malformed_call_envelope_is_a_json_400(client, path, body):
+    if path == "/api/batch":
+        body = dict(body, message=dict(body["message"], functionCalls=[RETRIEVE["functionCall"]]))
+    response = client.post(path, json=body)
+    assert response.status_code == 400
+    assert "error" in response.get_json()
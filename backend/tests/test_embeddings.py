@@ -0,0 +1,64 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from db import connect  # noqa: E402
+from embeddings import HashingEmbedder, VectorIndex, semantic_search, set_embedder, store_vector, vector_index  # noqa: E402
+from migrations import migrate  # noqa: E402
+
+WORDS = ["hiking", "mountains", "trail", "coffee", "morning", "project", "deadline", "family", "dinner"]
+
+
+@pytest.fixture
+def conn(database_path):
+    conn = connect(database_path)
+    migrate(conn)
+    set_embedder(HashingEmbedder())
+    yield conn
+    vector_index.clear()
+    conn.close()
+
+
+def store(conn, user_id, text):
+    with conn:
+        memory_id = conn.execute('''
+            INSERT INTO memories (user_id, memory_type, content, timestamp, rank_key)
+            VALUES (?, 'learning', ?, CURRENT_TIMESTAMP, 0)
+        ''', (user_id, f'{{"note": "{text}"}}')).lastrowid
+        store_vector(conn, memory_id, user_id, HashingEmbedder().embed(text))
+    return memory_id
+
+
+def test_search_sees_memories_stored_after_it_loaded(conn):
+    first = store(conn, 'u1', 'hiking in the mountains')
+    assert [row[0] for row in semantic_search(conn, 'u1', 'hiking', limit=5)] == [first]
+    second = store(conn, 'u1', 'hiking trail')
+    assert {row[0] for row in semantic_search(conn, 'u1', 'hiking', limit=5)} == {first, second}
+    assert semantic_search(conn, 'u2', 'hiking', limit=5) == []
+
+
+def test_deleted_memories_are_pruned_and_the_result_refilled(conn):
+    ids = [store(conn, 'u1', f'{WORDS[n % len(WORDS)]} hiking {n}') for n in range(40)]
+    top = [row[0] for row in semantic_search(conn, 'u1', 'hiking', limit=10)]
+    assert len(top) == 10
+
+    with conn:
+        # Deleting a memory deletes its vector too (memory_vectors_delete trigger)
+        conn.executemany("DELETE FROM memories WHERE id = ?", [(memory_id,) for memory_id in top[:6]])
+    refilled = [row[0] for row in semantic_search(conn, 'u1', 'hiking', limit=10)]
+    assert len(refilled) == 10
+    assert not set(refilled) & set(top[:6])
+    assert set(refilled) <= set(ids)
+
+
+def test_prune_drops_only_ids_without_a_vector(conn):
+    index = VectorIndex()
+    store(conn, 'u1', 'coffee in the morning')
+    index.search(conn, 'u1', HashingEmbedder().embed('coffee'))
+    gone = store(conn, 'u1', 'family dinner')
+    index.search(conn, 'u1', HashingEmbedder().embed('coffee'))
+    with conn:
+        conn.execute("DELETE FROM memories WHERE id = ?", (gone,))
+    assert index.prune(conn, 'u1') == 1
+    assert index.prune(conn, 'u1') == 0
+    assert len(index.search(conn, 'u1', HashingEmbedder().embed('coffee'))) == 1
@@ -0,0 +1,49 @@
+import logging
+
+import pytest
+
+from conftest import tool_call
+from prism_logging import logger, set_debug
+
+
+class Capture(logging.Handler):
+    def __init__(self):
+        super().__init__(logging.DEBUG)
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+@pytest.fixture
+def captured():
+    handler = Capture()
+    logger.addHandler(handler)
+    yield handler.records
+    logger.removeHandler(handler)
+    set_debug(users=(), requests=(), sample_rate=0.0)
+
+
+def dumps(records, message):
+    return [record.fields for record in records if record.levelno == logging.DEBUG and record.getMessage() == message]
+
+
+def test_sampled_request_gets_headers_body_and_result_together(client, captured):
+    set_debug(sample_rate=0.5)
+    for n in range(40):
+        client.post("/api/memory_manager", headers={"X-Request-ID": f"req-{n}"},
+                    json=tool_call("memory_manager", {"action": "retrieve", "memory_type": "learning"}))
+    requests = dumps(captured, "memory_manager request")
+    results = dumps(captured, "memory_manager result")
+    # One sampling decision per call: every dumped request has its result dumped too
+    assert 0 < len(requests) < 40
+    assert len(requests) == len(results)
+    assert all(fields["headers"]["X-Request-Id"].startswith("req-") for fields in requests)
+
+
+def test_debug_user_is_always_dumped_and_others_never(client, captured):
+    set_debug(users=["+15550199"])
+    client.post("/api/memory_manager", json=tool_call("memory_manager", {"action": "retrieve"}, "+15550199"))
+    client.post("/api/memory_manager", json=tool_call("memory_manager", {"action": "retrieve"}, "+15550100"))
+    assert [fields["user_id"] for fields in dumps(captured, "memory_manager request")] == ["+15550199"]
+    assert [fields["user_id"] for fields in dumps(captured, "memory_manager result")] == ["+15550199"]
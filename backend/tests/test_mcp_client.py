@@ -0,0 +1,207 @@
+import asyncio
+import json
+import socket
+import time
+
+import pytest
+
+from benchmarks import mcp_stub_server
+from main import CircuitBreaker, CircuitOpenError, MCPClient, ToolCallError, ToolPolicy, VapiMCPIntegration
+
+READ = ("memory_manager", {"action": "retrieve", "query": "hiking"})
+
+
+class ScriptedHandler(mcp_stub_server.StubHandler):
+    """Answers the n-th /execute or /execute_batch call as ``script[n]`` says: "503", "garbage"
+    (a 200 that is not JSON), a delay in seconds, or normally"""
+
+    script = ()
+    calls = None
+    catalog_requests = None
+
+    def do_GET(self):
+        self.catalog_requests.append(self.headers.get("If-None-Match"))
+        super().do_GET()
+
+    def do_POST(self):
+        if self.path.startswith("/execute"):
+            step = self.script[len(self.calls)] if len(self.calls) < len(self.script) else None
+            self.calls.append(step)
+            if step == "503":
+                self._read_json()
+                self._send_json({"error": "injected failure"}, 503)
+                return
+            if step == "garbage":
+                self._read_json()
+                self.send_response(200)
+                self.send_header("Content-Length", "8")
+                self.end_headers()
+                self.wfile.write(b"not json")
+                return
+            if step is not None:
+                time.sleep(step)
+        super().do_POST()
+
+
+@pytest.fixture
+def stub():
+    servers = []
+
+    def start(script=(), catalog_delay=0.0):
+        server, base_url = mcp_stub_server.start(handler=ScriptedHandler, catalog_delay=catalog_delay,
+                                                 script=script, calls=[], catalog_requests=[])
+        servers.append(server)
+        return server.RequestHandlerClass, base_url
+
+    yield start
+    for server in servers:
+        server.shutdown()
+
+
+def call(base_url, policy, calls=1, breaker=None):
+    async def run():
+        client = MCPClient(base_url, tool_policies={"memory_manager.retrieve": policy}, breaker=breaker)
+        client.available_tools = dict(mcp_stub_server.TOOLS)
+        async with client:
+            results = [await client.execute_tool(*READ) for _ in range(calls)]
+            return results, client.stats()
+    return asyncio.run(run())
+
+
+def test_retried_read_survives_transient_5xx(stub):
+    handler, base_url = stub(script=("503", "503"))
+    results, stats = call(base_url, ToolPolicy(timeout=2.0, retries=3, backoff=0.01))
+    assert results[0]["result"] == READ[1]
+    assert stats["retries"] == 2
+    assert handler.calls == ["503", "503", None]
+
+
+def test_no_retries_means_the_first_5xx_fails(stub):
+    _, base_url = stub(script=("503",))
+    with pytest.raises(ToolCallError):
+        call(base_url, ToolPolicy(timeout=2.0))
+
+
+def test_hedged_read_answers_from_the_duplicate(stub):
+    handler, base_url = stub(script=(2.0,))
+    started = time.perf_counter()
+    results, stats = call(base_url, ToolPolicy(timeout=5.0, hedge_after=0.05))
+    assert time.perf_counter() - started < 1.0
+    assert results[0]["result"] == READ[1]
+    assert (stats["hedges"], stats["hedge_wins"]) == (1, 1)
+
+
+def test_open_breaker_short_circuits_without_network():
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        base_url = f"http://127.0.0.1:{probe.getsockname()[1]}"
+
+    async def run():
+        client = MCPClient(base_url, tool_policies={}, breaker=CircuitBreaker(failure_threshold=3, reset_timeout=30))
+        client.available_tools = dict(mcp_stub_server.TOOLS)
+        errors = []
+        async with client:
+            for _ in range(10):
+                try:
+                    await client.execute_tool(*READ)
+                except ToolCallError as e:
+                    errors.append(type(e))
+            return errors, client.stats()
+
+    errors, stats = asyncio.run(run())
+    assert errors == [ToolCallError] * 3 + [CircuitOpenError] * 7
+    assert stats["short_circuits"] == 7
+    assert stats["breaker"] == "open"
+
+
+def test_breaker_lets_one_probe_through_after_reset_timeout():
+    now = [0.0]
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10, clock=lambda: now[0])
+    breaker.record_failure()
+    breaker.record_failure()
+    assert not breaker.allow()
+    now[0] = 10.0
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    now[0] = 20.0
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed"
+
+
+def half_open_breaker():
+    now = [0.0]
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=lambda: now[0])
+    breaker.record_failure()
+    now[0] = 10.0
+    return breaker
+
+
+@pytest.mark.parametrize("batch", [False, True])
+def test_probe_that_fails_without_a_verdict_releases_the_breaker(stub, batch):
+    # A malformed body says nothing about the server: the next call probes again
+    _, base_url = stub(script=("garbage",))
+    breaker = half_open_breaker()
+
+    async def run():
+        client = MCPClient(base_url, tool_policies={}, breaker=breaker)
+        client.available_tools = dict(mcp_stub_server.TOOLS)
+        send = ((lambda: client.execute_batch([{"tool": READ[0], "params": READ[1]}])) if batch
+                else (lambda: client.execute_tool(*READ)))
+        async with client:
+            with pytest.raises(ToolCallError):
+                await send()
+            assert breaker.state == "half_open"
+            return await send()
+
+    assert asyncio.run(run())
+    assert breaker.state == "closed"
+
+
+@pytest.mark.parametrize("batch", [False, True])
+def test_cancelled_probe_releases_the_breaker(stub, batch):
+    # As execute_many's per-call timeout does
+    _, base_url = stub(script=(1.0,))
+    breaker = half_open_breaker()
+
+    async def run():
+        client = MCPClient(base_url, tool_policies={}, breaker=breaker)
+        client.available_tools = dict(mcp_stub_server.TOOLS)
+        send = ((lambda: client.execute_batch([{"tool": READ[0], "params": READ[1]}])) if batch
+                else (lambda: client.execute_tool(*READ)))
+        async with client:
+            with pytest.raises(asyncio.TimeoutError):
+                await asyncio.wait_for(send(), 0.1)
+            return await send()
+
+    assert asyncio.run(run())
+    assert breaker.state == "closed"
+
+
+def test_warm_catalog_is_served_from_disk_and_revalidated_with_304(stub, tmp_path):
+    handler, base_url = stub(catalog_delay=0.2)
+    cache_path = str(tmp_path / "tools.json")
+
+    async def start():
+        integration = VapiMCPIntegration({"server": {"url": base_url}, "client": {"catalog_cache_path": cache_path}})
+        await integration.initialize()
+        refresh = integration.client._refresh_task
+        waited = refresh is not None and not refresh.done()
+        if refresh is not None:
+            await refresh
+        tools = integration.get_tools_config()
+        await integration.close()
+        return tools, waited
+
+    cold_tools, _ = asyncio.run(start())
+    assert handler.catalog_requests == [None]
+    with open(cache_path) as cached:
+        assert json.load(cached)["version"] == mcp_stub_server.TOOLS_ETAG
+
+    warm_tools, waited = asyncio.run(start())
+    # The warm start returned before the slow /tools answered, then revalidated
+    assert waited
+    assert handler.catalog_requests == [None, mcp_stub_server.TOOLS_ETAG]
+    assert warm_tools == cold_tools
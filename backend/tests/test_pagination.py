@@ -0,0 +1,162 @@
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+import dispatch
+from benchmarks import bench_export, datagen
+from conftest import tool_call
+from db import Database
+from migrations import migrate
+from pagination import (GOALS_AFTER_SQL, GOALS_PAGE_SQL, MEMORIES_AFTER_SQL, MEMORIES_PAGE_SQL, encode_cursor,
+                        export_goals, export_memories, goal_key, memory_key, page)
+
+USER = "+15550142"
+TYPES = ("learning", "preference", "relationship")
+STARTED = datetime(2026, 1, 1)
+
+
+@pytest.fixture
+def db(database_path):
+    db = Database(database_path)
+    db.write(migrate)
+    yield db
+    db.close()
+
+
+def fill(db, memories=40, goals=25):
+    # Runs of rows share a timestamp, so only the id keeps the keyset order total
+    def insert(conn):
+        for n in range(memories):
+            conn.execute('''
+                INSERT INTO memories (user_id, memory_type, content, timestamp, importance, rank_key)
+                VALUES (?, ?, ?, ?, 1, 0)
+            ''', (USER, TYPES[n % len(TYPES)], json.dumps({"n": n}), STARTED + timedelta(minutes=n // 4)))
+            conn.execute("INSERT INTO memories (user_id, memory_type, content, timestamp) VALUES ('other', ?, '{}', ?)",
+                         (TYPES[0], STARTED))
+        for n in range(goals):
+            conn.execute('''
+                INSERT INTO goals (user_id, title, goal_type, status, created_at) VALUES (?, ?, 'project', ?, ?)
+            ''', (USER, f"goal {n}", ("active", "completed")[n % 2], STARTED + timedelta(minutes=n // 3)))
+    db.write(insert)
+
+
+def all_pages(db, first_sql, after_sql, params, key, limit):
+    seen, cursor = [], None
+    while True:
+        with db.read() as conn:
+            rows, cursor = page(conn, first_sql, after_sql, params, key, limit, cursor)
+        assert len(rows) <= limit
+        seen.extend(rows)
+        if cursor is None:
+            return seen
+
+
+@pytest.mark.parametrize("limit", [1, 3, 7, 100])
+def test_keyset_pages_have_no_gaps_or_duplicates(db, limit):
+    fill(db)
+    rows = all_pages(db, MEMORIES_PAGE_SQL, MEMORIES_AFTER_SQL, (USER, "learning"), memory_key, limit)
+    with db.read() as conn:
+        expected = conn.execute("SELECT id FROM memories WHERE user_id = ? AND memory_type = 'learning'",
+                                (USER,)).fetchall()
+    ids = [row[0] for row in rows]
+    assert len(ids) == len(set(ids))
+    assert set(ids) == {row[0] for row in expected}
+    assert [memory_key(row) for row in rows] == sorted((memory_key(row) for row in rows), reverse=True)
+
+
+def test_rows_written_while_paging_do_not_shift_later_pages(db):
+    fill(db)
+    before = all_pages(db, GOALS_PAGE_SQL, GOALS_AFTER_SQL, (USER, "active"), goal_key, 100)
+    with db.read() as conn:
+        first, cursor = page(conn, GOALS_PAGE_SQL, GOALS_AFTER_SQL, (USER, "active"), goal_key, 4)
+    db.write(lambda conn: conn.execute(
+        "INSERT INTO goals (user_id, title, goal_type, status, created_at) VALUES (?, 'new', 'project', 'active', ?)",
+        (USER, datetime(2027, 1, 1))))
+    rest = []
+    while cursor is not None:
+        with db.read() as conn:
+            rows, cursor = page(conn, GOALS_PAGE_SQL, GOALS_AFTER_SQL, (USER, "active"), goal_key, 4, cursor)
+        rest.extend(rows)
+    assert first + rest == before
+
+
+def test_export_is_newest_first_across_groups(db):
+    fill(db)
+    lines = [json.loads(line) for chunk in export_memories(db, USER, batch_size=4) for line in chunk.splitlines()]
+    assert len(lines) == 40
+    assert {line["type"] for line in lines} == set(TYPES)
+    keys = [(line["timestamp"], line["id"]) for line in lines]
+    assert keys == sorted(keys, reverse=True)
+
+    goals = [json.loads(line) for chunk in export_goals(db, USER, batch_size=4) for line in chunk.splitlines()]
+    assert {goal["status"] for goal in goals} == {"active", "completed"}
+    keys = [(goal["created"], goal["id"]) for goal in goals]
+    assert len(keys) == 25 and keys == sorted(keys, reverse=True)
+
+
+def test_export_includes_memories_without_a_type(db, client, monkeypatch):
+    fill(db)
+
+    def untyped(conn):
+        conn.execute("INSERT INTO memories (user_id, content, timestamp) VALUES (?, '{}', ?)", (USER, STARTED))
+        conn.execute("INSERT INTO memories (user_id, memory_type, content, timestamp) VALUES (?, '', '{}', ?)",
+                     (USER, STARTED))
+    db.write(untyped)
+    lines = [json.loads(line) for chunk in export_memories(db, USER, batch_size=4) for line in chunk.splitlines()]
+    assert len(lines) == 42
+    assert {line["type"] for line in lines} == {*TYPES, None, ""}
+    keys = [(line["timestamp"], line["id"]) for line in lines]
+    assert keys == sorted(keys, reverse=True)
+
+    # Stored through the tool without a memory_type, as the schema allows
+    monkeypatch.setattr(dispatch, "WEBHOOK_SECRET", "s3cret")
+    user = "+15550143"
+    for n in range(2):
+        client.post("/api/memory_manager", json=tool_call("memory_manager", {
+            "action": "store", "memory_type": "learning" if n else None, "content": {"n": n}}, user))
+    response = client.get("/api/export/memories", query_string={"user_id": user},
+                          headers={"X-Vapi-Secret": "s3cret"})
+    assert sorted(json.loads(line)["content"]["n"] for line in response.get_data(as_text=True).splitlines()) == [0, 1]
+
+
+def test_export_streams_one_batch_per_chunk(db):
+    fill(db)
+    chunks = list(export_memories(db, USER, batch_size=4))
+    assert [chunk.count("\n") for chunk in chunks] == [4] * 10
+
+
+def test_invalid_cursor_is_a_400(client):
+    for cursor in ("not a cursor", encode_cursor(["2026-01-01", "x"])):
+        response = client.post("/api/goal_tracker",
+                               json=tool_call("goal_tracker", {"action": "get_goals", "cursor": cursor}, USER))
+        assert response.status_code == 400
+        assert "cursor" in response.get_json()["error"]
+
+
+def test_export_needs_the_webhook_secret(client, monkeypatch):
+    query = {"user_id": USER}
+    monkeypatch.setattr(dispatch, "WEBHOOK_SECRET", "")
+    assert client.get("/api/export/memories", query_string=query,
+                      headers={"X-Vapi-Secret": ""}).status_code == 401
+
+    monkeypatch.setattr(dispatch, "WEBHOOK_SECRET", "s3cret")
+    assert client.get("/api/export/memories", query_string=query).status_code == 401
+    assert client.get("/api/export/memories", query_string=query,
+                      headers={"X-Vapi-Secret": "wrong"}).status_code == 401
+    response = client.get("/api/export/memories", query_string=query, headers={"X-Vapi-Secret": "s3cret"})
+    assert response.status_code == 200
+    assert response.mimetype == "application/x-ndjson"
+
+
+def test_streaming_export_memory_stays_flat(tmp_path):
+    # Peak RSS of an export in a fresh process, at 6k and 60k memories; holding the
+    # whole export would add ~100 MB at the larger size
+    growth = []
+    for rows in (10000, 100000):
+        path = str(tmp_path / f"export_{rows}.db")
+        datagen.generate(path, rows=rows, users=1)
+        result = bench_export.run_child(path, "stream")
+        assert result["rows"] == rows * 6 // 10
+        growth.append(result["growth_mb"])
+    assert growth[1] - growth[0] < bench_export.MAX_GROWTH_MB
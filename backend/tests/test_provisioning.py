@@ -0,0 +1,111 @@
+import copy
+import json
+
+import pytest
+
+import vapi_tool_creation as provisioning
+from benchmarks import vapi_stub_server
+from tool_schemas import TOOL_DEFINITIONS
+
+ASSISTANT = "assistant-under-test"
+
+
+@pytest.fixture
+def stub():
+    servers = []
+
+    def start(**settings):
+        server, base_url = vapi_stub_server.start(**settings)
+        servers.append(server)
+        return server, base_url
+
+    yield start
+    for server in servers:
+        server.shutdown()
+
+
+@pytest.fixture
+def manifest(tmp_path):
+    return str(tmp_path / "vapi_manifest.json")
+
+
+def deploy(base_url, manifest, definitions=TOOL_DEFINITIONS, **kwargs):
+    vapi = provisioning.VapiClient(base_url=base_url, api_key="test", backoff=0.01)
+    return provisioning.deploy(vapi, definitions, manifest_path=manifest, assistant_id=ASSISTANT,
+                               log=lambda message: None, **kwargs)
+
+
+def tool_names(server):
+    return sorted(tool["function"]["name"] for tool in server.tools.values())
+
+
+def attached(server):
+    return server.assistants[ASSISTANT]["toolIds"]
+
+
+def test_first_deploy_creates_every_tool_and_attaches_them(stub, manifest):
+    server, base_url = stub()
+    summary = deploy(base_url, manifest)
+    assert summary == {"create": len(TOOL_DEFINITIONS), "update": 0, "delete": 0, "assistant": True}
+    assert tool_names(server) == sorted(provisioning.tool_name(tool) for tool in TOOL_DEFINITIONS)
+    assert sorted(attached(server)) == sorted(server.tools)
+
+
+def test_redeploy_with_nothing_changed_sends_no_requests(stub, manifest):
+    server, base_url = stub()
+    deploy(base_url, manifest)
+    server.reset_counts()
+    summary = deploy(base_url, manifest)
+    assert summary == {"create": 0, "update": 0, "delete": 0, "assistant": False}
+    assert sum(server.requests.values()) == 0
+
+
+def test_changed_definition_is_patched_in_place(stub, manifest):
+    server, base_url = stub()
+    deploy(base_url, manifest)
+    ids = {tool["function"]["name"]: tool["id"] for tool in server.tools.values()}
+    changed = copy.deepcopy(TOOL_DEFINITIONS)
+    changed[2]["function"]["description"] += " (revised)"
+    server.reset_counts()
+
+    summary = deploy(base_url, manifest, changed)
+    assert summary == {"create": 0, "update": 1, "delete": 0, "assistant": False}
+    assert dict(server.requests) == {"PATCH": 1}
+    name = provisioning.tool_name(changed[2])
+    assert server.tools[ids[name]]["function"]["description"].endswith(" (revised)")
+
+
+def test_removed_tool_is_deleted_and_detached(stub, manifest):
+    server, base_url = stub()
+    deploy(base_url, manifest)
+    summary = deploy(base_url, manifest, TOOL_DEFINITIONS[:-1])
+    assert summary == {"create": 0, "update": 0, "delete": 1, "assistant": True}
+    assert provisioning.tool_name(TOOL_DEFINITIONS[-1]) not in tool_names(server)
+    assert sorted(attached(server)) == sorted(server.tools)
+
+
+def test_lost_manifest_adopts_existing_tools(stub, manifest):
+    server, base_url = stub()
+    deploy(base_url, manifest)
+    ids = set(server.tools)
+    with open(manifest) as f:
+        assert json.load(f)["tools"]
+
+    provisioning.save_manifest(manifest, {})
+    summary = deploy(base_url, manifest)
+    assert summary["create"] == 0 and summary["delete"] == 0
+    assert set(server.tools) == ids
+
+
+def test_deploy_converges_through_injected_failures(stub, manifest):
+    server, base_url = stub(error_rate=0.3, rate_limit_rate=0.1)
+    for _ in range(5):
+        try:
+            deploy(base_url, manifest)
+            break
+        except provisioning.ProvisioningError:
+            continue
+    else:
+        pytest.fail("deploy did not converge in 5 runs")
+    assert tool_names(server) == sorted(provisioning.tool_name(tool) for tool in TOOL_DEFINITIONS)
+    assert sorted(attached(server)) == sorted(server.tools)
@@ -0,0 +1,46 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from db import connect
+from migrations import MIGRATIONS, check_query_plans, migrate
+from prism_tools import HOT_QUERIES
+
+
+@pytest.fixture
+def conn(database_path):
+    conn = connect(database_path)
+    yield conn
+    conn.close()
+
+
+def test_migrate_reaches_latest_version(conn):
+    assert migrate(conn) == len(MIGRATIONS)
+    assert migrate(conn) == len(MIGRATIONS)
+
+
+def test_hot_queries_use_their_indexes(conn):
+    migrate(conn)
+    assert check_query_plans(conn, HOT_QUERIES) == []
+
+
+def test_hot_queries_use_their_indexes_after_analyze(conn):
+    # Planner statistics from a skewed table (one heavy user) must not flip a plan
+    # to a scan or a temp b-tree sort
+    migrate(conn)
+    started = datetime(2026, 1, 1)
+    with conn:
+        for n in range(2000):
+            user = 'heavy' if n % 10 else f'user{n}'
+            conn.execute('''
+                INSERT INTO memories (user_id, memory_type, content, timestamp, importance, rank_key)
+                VALUES (?, 'learning', '{}', ?, 1, ?)
+            ''', (user, started + timedelta(minutes=n), n / 1000))
+            conn.execute('''
+                INSERT INTO goals (user_id, title, goal_type, status, created_at)
+                VALUES (?, 'goal', 'personal', ?, ?)
+            ''', (user, 'active' if n % 3 else 'completed', started + timedelta(minutes=n)))
+            conn.execute("INSERT INTO thoughts (thought_type, content, timestamp) VALUES ('reasoning', '', ?)",
+                         (started + timedelta(minutes=n),))
+    conn.execute("ANALYZE")
+    assert check_query_plans(conn, HOT_QUERIES) == []
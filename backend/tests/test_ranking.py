@@ -0,0 +1,33 @@
+import prism_tools
+from conftest import tool_call
+
+USER = "+15550456"
+
+
+def retrieve(client, **parameters):
+    response = client.post("/api/memory_manager", json=tool_call(
+        "memory_manager", {"action": "retrieve", "memory_type": "learning", **parameters}, USER))
+    assert response.status_code == 200
+    return response.get_json()["result"]
+
+
+def test_retrieve_returns_the_best_ranked_five_and_counts_them_in_one_write(client):
+    for importance in range(1, 9):
+        client.post("/api/memory_manager", json=tool_call("memory_manager", {
+            "action": "store", "memory_type": "learning", "content": {"note": f"importance {importance}"},
+            "importance": importance}, USER))
+    database = prism_tools.user_database(USER)
+    enqueued = database.buffer.stats()["enqueued"]
+
+    memories = retrieve(client)["memories"]
+    assert [memory["content"]["note"] for memory in memories] == [f"importance {n}" for n in range(8, 3, -1)]
+    retrieve(client)  # served from the cache, still counted
+    assert database.buffer.stats()["enqueued"] == enqueued + 2
+
+    database.flush_writes()
+    with database.read() as conn:
+        counts = conn.execute('''
+            SELECT importance, access_count FROM memories WHERE user_id = ? ORDER BY importance
+        ''', (USER,)).fetchall()
+    assert counts == [(n, 2 if n > 3 else 0) for n in range(1, 9)]
+    assert len(retrieve(client, limit=8)["memories"]) == 8
@@ -0,0 +1,36 @@
+import sqlite3
+
+import prism_tools
+from db import Database
+from migrations import migrate
+from retention import Retention
+
+
+def test_servers_do_not_sweep_unless_switched_on():
+    assert prism_tools.RETENTION_INTERVAL == 0
+    prism_tools.start_retention()
+    try:
+        assert all(sweeper._thread is None for sweeper in prism_tools.retentions)
+    finally:
+        prism_tools.stop_retention()
+
+
+def test_sweep_archives_memories_over_the_cap_before_deleting(database_path, tmp_path):
+    database = Database(database_path)
+    database.write(migrate)
+    for n in range(5):
+        database.execute_write('''
+            INSERT INTO memories (user_id, memory_type, content, timestamp, rank_key)
+            VALUES ('u1', 'learning', ?, CURRENT_TIMESTAMP, ?)
+        ''', (f'{{"note": "{n}"}}', n))
+    archive_path = str(tmp_path / "archive.db")
+    retention = Retention(database, archive_path, policies={"memories": {"*": {"max_rows": 2}}})
+
+    assert retention.sweep()["archived_memories"] == 3
+    with database.read() as conn:
+        assert conn.execute("SELECT rank_key FROM memories ORDER BY rank_key").fetchall() == [(3,), (4,)]
+    retention.stop()
+    database.close()
+    archive = sqlite3.connect(archive_path)
+    assert archive.execute("SELECT sum(row_count) FROM memory_chunks").fetchone()[0] == 3
+    archive.close()
@@ -0,0 +1,74 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from db import connect
+from migrations import migrate
+from search import search_memories
+from sharding import USER_TABLES, HashRing, shard_paths
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+USERS = [f"+1555020{n:02d}" for n in range(30)]
+
+
+def fill(path):
+    conn = connect(path)
+    migrate(conn)
+    with conn:
+        for user in USERS:
+            memory_id = conn.execute('''
+                INSERT INTO memories (user_id, memory_type, content, timestamp, topic)
+                VALUES (?, 'learning', ?, '2026-01-01 00:00:00', 'hiking')
+            ''', (user, json.dumps({"note": f"trail notes for {user}"}))).lastrowid
+            conn.execute("INSERT INTO memory_vectors (memory_id, user_id, vector) VALUES (?, ?, ?)",
+                         (memory_id, user, user.encode()))
+            conn.execute("INSERT INTO emotional_context (user_id, emotion, topic) VALUES (?, 'joy', 'hiking')", (user,))
+            conn.execute("INSERT INTO goals (user_id, title, goal_type) VALUES (?, 'summit', 'personal_development')",
+                         (user,))
+    conn.close()
+
+
+def rebalance(database_path, old, new):
+    # The documented command line, not the function, so the usage line stays true
+    out = subprocess.run([sys.executable, "sharding.py", "rebalance", "--from", str(old), "--to", str(new),
+                          "--database", database_path], cwd=BACKEND_DIR, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout[out.stdout.index("{"):])
+
+
+def where(database_path, shards):
+    """user -> (path, rows per table, FTS hits, vectors pointing at the user's memory)"""
+    found = {}
+    for path in shard_paths(database_path, shards):
+        conn = connect(path)
+        for user in USERS:
+            counts = tuple(conn.execute(f"SELECT count(*) FROM {table} WHERE user_id = ?", (user,)).fetchone()[0]
+                           for table in USER_TABLES)
+            if not any(counts):
+                continue
+            assert user not in found, f"{user} is on two shards"
+            hits = search_memories(conn, user, "trail notes")
+            vectors = conn.execute('''
+                SELECT v.vector FROM memory_vectors v JOIN memories m ON m.id = v.memory_id WHERE m.user_id = ?
+            ''', (user,)).fetchall()
+            found[user] = (path, counts, len(hits), vectors)
+        conn.close()
+    return found
+
+
+@pytest.mark.parametrize("steps", [(1, 3, 2, 1), (1, 4, 5)])
+def test_rebalance_keeps_rows_search_hits_and_vectors(database_path, steps):
+    fill(database_path)
+    for old, new in zip(steps, steps[1:]):
+        result = rebalance(database_path, old, new)
+        found = where(database_path, new)
+        assert sorted(found) == USERS
+        ring = HashRing(new)
+        for user, (path, counts, hits, vectors) in found.items():
+            assert path == shard_paths(database_path, new)[ring.shard(user)]
+            assert counts == (1, 1, 1)
+            assert hits == 1
+            assert vectors == [(user.encode(),)]
+        assert result["moved_rows"] == 3 * result["moved_users"]
@@ -0,0 +1,269 @@
+"""JSON schemas of the five PRISM tools, as registered with Vapi.
+
+vapi_tool_creation.py provisions these definitions; prism_tools.py compiles
+their ``parameters`` schemas into request validators (dispatch.py), so the
+assistant and the server always agree on what a valid call looks like.
+"""
+
+# Tool 1: Memory Manager
+memory_manager_tool = {
+    "type": "function",
+    "server": {
+        "url": "https://a31d-2601-647-4d80-fc30-48ea-5d14-ce0c-f818.ngrok-free.app/api/memory_manager",
+        "secret": "my_webhook_secret"
+    },
+    "function": {
+        "name": "memory_manager",
+        "description": "Store and retrieve memories about users, conversations, and learnings",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "action": {
+                    "type": "string",
+                    "enum": ["store", "retrieve"],
+                    "description": "Action to perform on memory"
+                },
+                "memory_type": {
+                    "type": "string",
+                    "enum": ["user_preference", "conversation_context", "emotional_state", "goal_tracking", "learning"],
+                    "description": "Type of memory to manage"
+                },
+                "content": {
+                    "type": "object",
+                    "description": "Memory content with metadata"
+                },
+                "query": {
+                    "type": "string",
+                    "description": "Search query for retrieving memories"
+                },
+                "mode": {
+                    "type": "string",
+                    "enum": ["keyword", "semantic", "recent"],
+                    "description": "Retrieve by keyword match or by meaning (semantic recall); without a query, memories are ranked by importance, recency and use unless mode is recent"
+                },
+                "importance": {
+                    "type": "integer",
+                    "minimum": 1,
+                    "maximum": 10,
+                    "description": "How important a stored memory is, 1 (trivial) to 10 (essential)"
+                },
+                "max_tokens": {
+                    "type": "integer",
+                    "minimum": 1,
+                    "description": "Token budget for retrieved memories; lower-ranked ones are left out to fit"
+                },
+                "limit": {
+                    "type": "integer",
+                    "minimum": 1,
+                    "maximum": 100,
+                    "description": "Most memories to retrieve (default 5, or 10 for a query)"
+                },
+                "cursor": {
+                    "type": "string",
+                    "description": "next_cursor of the previous retrieve, to get the next older memories (recent mode without a query)"
+                }
+            },
+            "required": ["action"]
+        }
+    }
+}
+
+# Tool 2: Identity Tracker
+identity_tracker_tool = {
+    "type": "function",
+    "server": {
+        "url": "https://a31d-2601-647-4d80-fc30-48ea-5d14-ce0c-f818.ngrok-free.app/api/identity_tracker",
+        "secret": "my_webhook_secret"
+    },
+    "function": {
+        "name": "identity_tracker",
+        "description": "Track and evolve PRISM's personality traits",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "action": {
+                    "type": "string",
+                    "enum": ["get_identity", "update_trait", "reflect", "get_growth_insights", "get_thoughts"],
+                    "description": "Identity management action"
+                },
+                "trait": {
+                    "type": "string",
+                    "description": "Personality trait to update"
+                },
+                "adjustment": {
+                    "type": "object",
+                    "description": "How to adjust the trait"
+                },
+                "reflection": {
+                    "type": "string",
+                    "description": "Self-reflection notes"
+                },
+                "limit": {
+                    "type": "integer",
+                    "minimum": 1,
+                    "maximum": 100,
+                    "description": "Most logged thoughts to return, newest first (default 20)"
+                },
+                "cursor": {
+                    "type": "string",
+                    "description": "next_cursor of the previous get_thoughts, to get the next page"
+                }
+            },
+            "required": ["action"]
+        }
+    }
+}
+
+# Tool 3: Emotion Analyzer
+emotion_analyzer_tool = {
+    "type": "function",
+    "server": {
+        "url": "https://a31d-2601-647-4d80-fc30-48ea-5d14-ce0c-f818.ngrok-free.app/api/emotion_analyzer",
+        "secret": "my_webhook_secret"
+    },
+    "function": {
+        "name": "emotion_analyzer",
+        "description": "Analyze emotional context and store emotional memories",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "action": {
+                    "type": "string",
+                    "enum": ["analyze_current", "store_emotional_memory", "get_emotional_history"],
+                    "description": "Emotion analysis action"
+                },
+                "user_emotion": {
+                    "type": "string",
+                    "description": "Detected user emotion"
+                },
+                "topic": {
+                    "type": "string",
+                    "description": "Topic that triggered emotion"
+                },
+                "response_strategy": {
+                    "type": "string",
+                    "description": "Response strategy for this emotion"
+                },
+                "effectiveness_score": {
+                    "type": "integer",
+                    "minimum": 1,
+                    "maximum": 10,
+                    "description": "How well the response strategy worked (1-10)"
+                }
+            },
+            "required": ["action"]
+        }
+    }
+}
+
+# Tool 4: Goal Tracker
+goal_tracker_tool = {
+    "type": "function",
+    "server": {
+        "url": "https://a31d-2601-647-4d80-fc30-48ea-5d14-ce0c-f818.ngrok-free.app/api/goal_tracker",
+        "secret": "my_webhook_secret"
+    },
+    "function": {
+        "name": "goal_tracker",
+        "description": "Track user goals and progress over time",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "action": {
+                    "type": "string",
+                    "enum": ["set_goal", "update_progress", "get_goals", "suggest_next_step"],
+                    "description": "Goal management action"
+                },
+                "goal_type": {
+                    "type": "string",
+                    "enum": ["learning", "career", "personal_development", "project"],
+                    "description": "Type of goal"
+                },
+                "goal_data": {
+                    "type": "object",
+                    "description": "Goal information"
+                },
+                "progress_update": {
+                    "type": "object",
+                    "description": "Progress update information",
+                    "properties": {
+                        "title": {
+                            "type": "string",
+                            "description": "Title of the goal to update"
+                        },
+                        "progress": {
+                            "type": "integer",
+                            "minimum": 0,
+                            "maximum": 100,
+                            "description": "Percent complete"
+                        },
+                        "status": {
+                            "type": "string",
+                            "enum": ["active", "completed", "paused"],
+                            "description": "New status; defaults to completed at 100, otherwise active"
+                        }
+                    },
+                    "required": ["title", "progress"]
+                },
+                "limit": {
+                    "type": "integer",
+                    "minimum": 1,
+                    "maximum": 100,
+                    "description": "Most active goals to return, newest first (default 50)"
+                },
+                "cursor": {
+                    "type": "string",
+                    "description": "next_cursor of the previous get_goals, to get the next page"
+                }
+            },
+            "required": ["action"]
+        }
+    }
+}
+
+# Tool 5: Thought Logger
+thought_logger_tool = {
+    "type": "function",
+    "server": {
+        "url": "https://a31d-2601-647-4d80-fc30-48ea-5d14-ce0c-f818.ngrok-free.app/api/thought_logger",
+        "secret": "my_webhook_secret"
+    },
+    "function": {
+        "name": "thought_logger",
+        "description": "Log internal thought processes and decisions",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "thought_type": {
+                    "type": "string",
+                    "enum": ["reasoning", "memory_recall", "response_planning", "identity_check", "emotional_assessment"],
+                    "description": "Type of thought process"
+                },
+                "thought_content": {
+                    "type": "string",
+                    "description": "The actual thought or reasoning"
+                },
+                "context": {
+                    "type": "object",
+                    "description": "Context that triggered this thought"
+                },
+                "outcome": {
+                    "type": "string",
+                    "description": "Result or decision made"
+                }
+            },
+            "required": ["thought_type", "thought_content"]
+        }
+    }
+}
+
+TOOL_DEFINITIONS = [
+    memory_manager_tool,
+    identity_tracker_tool,
+    emotion_analyzer_tool,
+    goal_tracker_tool,
+    thought_logger_tool
+]
+
+# Tool name -> JSON schema of its functionCall parameters
+PARAMETER_SCHEMAS = {tool["function"]["name"]: tool["function"]["parameters"] for tool in TOOL_DEFINITIONS}
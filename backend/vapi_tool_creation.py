@@ -1,250 +1,320 @@
-import requests
+"""Provision the PRISM tools on Vapi and attach them to the assistant.
+
+Deploys are diff-based. Each local tool definition (tool_schemas.py) is hashed
+and compared with a manifest of what the last deploy created: the Vapi tool id
+and definition hash per tool, plus the tool ids the assistant was given. Only
+the difference is sent:
+
+* a tool missing from the manifest is created
+* a tool whose hash changed is updated in place (PATCH), keeping its id
+* a manifest tool no longer defined locally is deleted
+* the assistant is PATCHed only when its set of tool ids changes
+
+Unchanged definitions mean no requests at all. Before anything is created,
+tools already on Vapi under the same name are adopted instead of duplicated.
+
+Tool requests run concurrently and retry transient failures with jittered
+exponential backoff. Updates and deletes retry on 429, 5xx and network errors.
+Creates retry only on 429 and connect timeouts, because a create that failed any
+other way may still have happened. After such a failure the tool list is checked
+once: the tool is adopted if it is there, and created again if not. The manifest
+is saved after every run, including partial ones, so a re-run picks up where a
+failed deploy stopped.
+
+Usage: python vapi_tool_creation.py [--dry-run] [--manifest path] [--concurrency N]
+"""
+import argparse
+import hashlib
 import json
-import sqlite3
 import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
 from dotenv import load_dotenv
+
+from tool_schemas import TOOL_DEFINITIONS
+
 load_dotenv()
 
 VAPI_API_KEY = os.getenv("VAPI_API_KEY")
-VAPI_BASE_URL = "https://api.vapi.ai"
-
-headers = {
-    "Authorization": f"Bearer {VAPI_API_KEY}",
-    "Content-Type": "application/json"
-}
-
-# Tool 1: Memory Manager
-memory_manager_tool = {
-    "type": "function",
-    "server": {
-        "url": "https://a31d-2601-647-4d80-fc30-48ea-5d14-ce0c-f818.ngrok-free.app/api/memory_manager",
-        "secret": "my_webhook_secret"
-    },
-    "function": {
-        "name": "memory_manager",
-        "description": "Store and retrieve memories about users, conversations, and learnings",
-        "parameters": {
-            "type": "object",
-            "properties": {
-                "action": {
-                    "type": "string",
-                    "enum": ["store", "retrieve", "update"],
-                    "description": "Action to perform on memory"
-                },
-                "memory_type": {
-                    "type": "string",
-                    "enum": ["user_preference", "conversation_context", "emotional_state", "goal_tracking", "learning"],
-                    "description": "Type of memory to manage"
-                },
-                "content": {
-                    "type": "object",
-                    "description": "Memory content with metadata"
-                },
-                "query": {
-                    "type": "string",
-                    "description": "Search query for retrieving memories"
-                }
-            },
-            "required": ["action"]
-        }
-    }
-}
-
-# Tool 2: Identity Tracker
-identity_tracker_tool = {
-    "type": "function",
-    "server": {
-        "url": "https://a31d-2601-647-4d80-fc30-48ea-5d14-ce0c-f818.ngrok-free.app/api/identity_tracker",
-        "secret": "my_webhook_secret"
-    },
-    "function": {
-        "name": "identity_tracker",
-        "description": "Track and evolve PRISM's personality traits",
-        "parameters": {
-            "type": "object",
-            "properties": {
-                "action": {
-                    "type": "string",
-                    "enum": ["get_identity", "update_trait", "reflect", "get_growth_insights"],
-                    "description": "Identity management action"
-                },
-                "trait": {
-                    "type": "string",
-                    "description": "Personality trait to update"
-                },
-                "adjustment": {
-                    "type": "object",
-                    "description": "How to adjust the trait"
-                },
-                "reflection": {
-                    "type": "string",
-                    "description": "Self-reflection notes"
-                }
-            },
-            "required": ["action"]
-        }
-    }
-}
-
-# Tool 3: Emotion Analyzer
-emotion_analyzer_tool = {
-    "type": "function",
-    "server": {
-        "url": "https://a31d-2601-647-4d80-fc30-48ea-5d14-ce0c-f818.ngrok-free.app/api/emotion_analyzer",
-        "secret": "my_webhook_secret"
-    },
-    "function": {
-        "name": "emotion_analyzer",
-        "description": "Analyze emotional context and store emotional memories",
-        "parameters": {
-            "type": "object",
-            "properties": {
-                "action": {
-                    "type": "string",
-                    "enum": ["analyze_current", "store_emotional_memory", "get_emotional_history"],
-                    "description": "Emotion analysis action"
-                },
-                "user_emotion": {
-                    "type": "string",
-                    "description": "Detected user emotion"
-                },
-                "topic": {
-                    "type": "string",
-                    "description": "Topic that triggered emotion"
-                },
-                "response_strategy": {
-                    "type": "string",
-                    "description": "Response strategy for this emotion"
-                }
-            },
-            "required": ["action"]
-        }
-    }
-}
-
-# Tool 4: Goal Tracker
-goal_tracker_tool = {
-    "type": "function",
-    "server": {
-        "url": "https://a31d-2601-647-4d80-fc30-48ea-5d14-ce0c-f818.ngrok-free.app/api/goal_tracker",
-        "secret": "my_webhook_secret"
-    },
-    "function": {
-        "name": "goal_tracker",
-        "description": "Track user goals and progress over time",
-        "parameters": {
-            "type": "object",
-            "properties": {
-                "action": {
-                    "type": "string",
-                    "enum": ["set_goal", "update_progress", "get_goals", "suggest_next_step"],
-                    "description": "Goal management action"
-                },
-                "goal_type": {
-                    "type": "string",
-                    "enum": ["learning", "career", "personal_development", "project"],
-                    "description": "Type of goal"
-                },
-                "goal_data": {
-                    "type": "object",
-                    "description": "Goal information"
-                },
-                "progress_update": {
-                    "type": "object",
-                    "description": "Progress update information"
-                }
-            },
-            "required": ["action"]
-        }
-    }
-}
-
-# Tool 5: Thought Logger
-thought_logger_tool = {
-    "type": "function",
-    "server": {
-        "url": "https://a31d-2601-647-4d80-fc30-48ea-5d14-ce0c-f818.ngrok-free.app/api/thought_logger",
-        "secret": "my_webhook_secret"
-    },
-    "function": {
-        "name": "thought_logger",
-        "description": "Log internal thought processes and decisions",
-        "parameters": {
-            "type": "object",
-            "properties": {
-                "thought_type": {
-                    "type": "string",
-                    "enum": ["reasoning", "memory_recall", "response_planning", "identity_check", "emotional_assessment"],
-                    "description": "Type of thought process"
-                },
-                "thought_content": {
-                    "type": "string",
-                    "description": "The actual thought or reasoning"
-                },
-                "context": {
-                    "type": "object",
-                    "description": "Context that triggered this thought"
-                },
-                "outcome": {
-                    "type": "string",
-                    "description": "Result or decision made"
-                }
-            },
-            "required": ["thought_type", "thought_content"]
+VAPI_BASE_URL = os.getenv("VAPI_BASE_URL", "https://api.vapi.ai")
+ASSISTANT_ID = os.getenv("VAPI_ASSISTANT_ID", "0b8f2c33-f659-4741-8574-50e2bd92a932")
+MANIFEST_PATH = os.getenv("VAPI_MANIFEST_PATH",
+                          os.path.join(os.path.dirname(os.path.abspath(__file__)), "vapi_manifest.json"))
+
+RETRIES = 4
+BACKOFF = 0.25
+MAX_BACKOFF = 8.0
+TIMEOUT = 10.0
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+class ProvisioningError(Exception):
+    """A Vapi request failed for good (after its retries)"""
+
+
+def definition_hash(tool):
+    """Stable hash of a tool definition: key order and whitespace do not matter"""
+    canonical = json.dumps(tool, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def tool_name(tool):
+    return tool["function"]["name"]
+
+
+def load_manifest(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {"tools": {}, "assistant": {}}
+
+
+def save_manifest(path, manifest):
+    # Write then rename, so an interrupted deploy never leaves half a manifest
+    directory = os.path.dirname(os.path.abspath(path))
+    with tempfile.NamedTemporaryFile("w", dir=directory, suffix=".tmp", delete=False) as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(f.name, path)
+
+
+def plan(definitions, manifest):
+    """``(operation, name, tool)`` steps turning the manifest's tools into ``definitions``"""
+    deployed = manifest.get("tools", {})
+    steps = []
+    for tool in definitions:
+        name = tool_name(tool)
+        if name not in deployed:
+            steps.append(("create", name, tool))
+        elif deployed[name]["hash"] != definition_hash(tool):
+            steps.append(("update", name, tool))
+    local = {tool_name(tool) for tool in definitions}
+    steps.extend(("delete", name, None) for name in sorted(deployed) if name not in local)
+    return steps
+
+
+class VapiClient:
+    """Minimal Vapi REST client with retry; one requests.Session per thread"""
+
+    def __init__(self, base_url=VAPI_BASE_URL, api_key=VAPI_API_KEY, retries=RETRIES,
+                 backoff=BACKOFF, max_backoff=MAX_BACKOFF, timeout=TIMEOUT):
+        self.base_url = base_url.rstrip("/")
+        self.headers = {
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json"
         }
-    }
-}
-
-def create_tool(tool_data):
-    """Create a tool in Vapi"""
-    response = requests.post(
-        f"{VAPI_BASE_URL}/tool",
-        headers=headers,
-        json=tool_data
-    )
-    
-    if response.status_code == 201:
-        tool = response.json()
-        tool_name = tool_data['function']['name']
-        print(f"✅ Created tool: {tool_name} (ID: {tool['id']})")
-        return tool['id']
-    else:
-        tool_name = tool_data['function']['name']
-        print(f"❌ Failed to create tool: {tool_name}")
-        print(f"Error: {response.text}")
-        return None
-
-# Create all tools
-tools = [
-    memory_manager_tool,
-    identity_tracker_tool,
-    emotion_analyzer_tool,
-    goal_tracker_tool,
-    thought_logger_tool
-]
-
-tool_ids = []
-for tool in tools:
-    tool_id = create_tool(tool)
-    if tool_id:
-        tool_ids.append(tool_id)
-
-print(f"\n🎉 Created {len(tool_ids)} tools successfully!")
-print(f"Tool IDs: {tool_ids}")
-
-# Update PRISM assistant to use these tools
-if tool_ids:
-    assistant_update = {
-        "toolIds": tool_ids
-    }
-    
-    response = requests.patch(
-        f"{VAPI_BASE_URL}/assistants/0b8f2c33-f659-4741-8574-50e2bd92a932",
-        headers=headers,
-        json=assistant_update
-    )
-    
-    if response.status_code == 200:
-        print("✅ Updated PRISM assistant with new tools!")
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.counters = {"requests": 0, "retries": 0}
+
+    def _session(self):
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self._local.session = requests.Session()
+            session.headers.update(self.headers)
+        return session
+
+    def _delay(self, attempt, response=None):
+        retry_after = response is not None and response.headers.get("Retry-After")
+        if retry_after:
+            try:
+                return min(self.max_backoff, float(retry_after))
+            except ValueError:
+                pass
+        # Exponential backoff with full jitter so concurrent workers don't retry in step
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    def request(self, method, path, idempotent=True, **kwargs):
+        """Send a request and return the response once it is final (not retried)
+
+        A non-idempotent request (POST create) is retried only when it certainly
+        did not take effect: a connect timeout or a 429.
+        """
+        for attempt in range(self.retries + 1):
+            with self._lock:
+                self.counters["requests"] += 1
+            response = None
+            try:
+                response = self._session().request(method, f"{self.base_url}{path}",
+                                                   timeout=self.timeout, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                # Only a connect timeout certainly never reached the server
+                if not idempotent and not isinstance(e, requests.ConnectTimeout):
+                    raise ProvisioningError(f"{method} {path}: {e}") from e
+                error = e
+            else:
+                retryable = response.status_code == 429 or (idempotent and response.status_code in RETRYABLE_STATUS)
+                if not retryable:
+                    return response
+                error = f"HTTP {response.status_code}"
+            if attempt == self.retries:
+                raise ProvisioningError(f"{method} {path}: {error} after {attempt + 1} attempts")
+            with self._lock:
+                self.counters["retries"] += 1
+            time.sleep(self._delay(attempt, response))
+
+    def list_tools(self):
+        response = self.request("GET", "/tool")
+        if response.status_code != 200:
+            raise ProvisioningError(f"list tools: HTTP {response.status_code} {response.text}")
+        return response.json()
+
+    def create_tool(self, tool):
+        response = self.request("POST", "/tool", idempotent=False, json=tool)
+        if response.status_code not in (200, 201):
+            raise ProvisioningError(f"create {tool_name(tool)}: HTTP {response.status_code} {response.text}")
+        return response.json()["id"]
+
+    def update_tool(self, tool_id, tool):
+        # A tool's type cannot change; Vapi rejects it in updates
+        body = {key: value for key, value in tool.items() if key != "type"}
+        response = self.request("PATCH", f"/tool/{tool_id}", json=body)
+        if response.status_code == 404:
+            return False
+        if response.status_code != 200:
+            raise ProvisioningError(f"update {tool_name(tool)}: HTTP {response.status_code} {response.text}")
+        return True
+
+    def delete_tool(self, tool_id):
+        response = self.request("DELETE", f"/tool/{tool_id}")
+        # Already gone counts as deleted
+        if response.status_code not in (200, 204, 404):
+            raise ProvisioningError(f"delete {tool_id}: HTTP {response.status_code} {response.text}")
+
+    def set_assistant_tools(self, assistant_id, tool_ids):
+        response = self.request("PATCH", f"/assistants/{assistant_id}", json={"toolIds": tool_ids})
+        if response.status_code != 200:
+            raise ProvisioningError(f"update assistant: HTTP {response.status_code} {response.text}")
+
+
+def adopt_remote_tools(client, definitions, manifest):
+    """Record remote tools that match a local name but are missing from the manifest
+
+    Covers a first deploy against an account provisioned by hand or by the old
+    create-everything script, and a create that succeeded but whose response was
+    lost. Adopted tools get no hash, so the next plan updates them to the local
+    definition instead of creating duplicates.
+    """
+    missing = {tool_name(tool) for tool in definitions} - set(manifest["tools"])
+    if not missing:
+        return []
+    adopted = []
+    for remote in client.list_tools():
+        name = remote.get("function", {}).get("name")
+        if name in missing:
+            manifest["tools"][name] = {"id": remote["id"], "hash": None}
+            missing.discard(name)
+            adopted.append(name)
+    return adopted
+
+
+def _create(client, tool):
+    try:
+        return client.create_tool(tool)
+    except ProvisioningError:
+        # The create may have happened anyway; adopt it if so, otherwise try once more
+        for remote in client.list_tools():
+            if remote.get("function", {}).get("name") == tool_name(tool):
+                return remote["id"]
+        return client.create_tool(tool)
+
+
+def _apply(client, manifest, step):
+    operation, name, tool = step
+    deployed = manifest["tools"]
+    if operation == "update" and not client.update_tool(deployed[name]["id"], tool):
+        # Deleted on the Vapi side since the last deploy: create it again
+        operation = "create"
+    if operation == "create":
+        return name, {"id": _create(client, tool), "hash": definition_hash(tool)}
+    if operation == "update":
+        return name, {"id": deployed[name]["id"], "hash": definition_hash(tool)}
+    client.delete_tool(deployed[name]["id"])
+    return name, None
+
+
+def deploy(client, definitions=TOOL_DEFINITIONS, manifest_path=MANIFEST_PATH, assistant_id=ASSISTANT_ID,
+           concurrency=5, dry_run=False, log=print):
+    """Bring Vapi in line with ``definitions``; returns a summary of what was done
+
+    Raises ProvisioningError when any step failed, after saving the manifest with
+    the steps that did succeed.
+    """
+    manifest = load_manifest(manifest_path)
+    manifest.setdefault("tools", {})
+    manifest.setdefault("assistant", {})
+    summary = {"create": 0, "update": 0, "delete": 0, "assistant": False}
+    for name in adopt_remote_tools(client, definitions, manifest):
+        log(f"adopt {name} (already on Vapi)")
+    steps = plan(definitions, manifest)
+
+    for operation, name, _ in steps:
+        log(f"{operation} {name}")
+    if dry_run:
+        for operation, _, _ in steps:
+            summary[operation] += 1
+        return summary
+
+    failures = []
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+        futures = [(step, executor.submit(_apply, client, manifest, step)) for step in steps]
+        for (operation, name, _), future in futures:
+            try:
+                name, entry = future.result()
+            except ProvisioningError as e:
+                log(f"❌ {operation} {name} failed: {e}")
+                failures.append(str(e))
+                continue
+            summary[operation] += 1
+            if entry is None:
+                manifest["tools"].pop(name, None)
+            else:
+                manifest["tools"][name] = entry
+
+    tool_ids = [manifest["tools"][tool_name(tool)]["id"] for tool in definitions if tool_name(tool) in manifest["tools"]]
+    attached = manifest["assistant"]
+    if not failures and (attached.get("id") != assistant_id or attached.get("tool_ids") != tool_ids):
+        try:
+            client.set_assistant_tools(assistant_id, tool_ids)
+            manifest["assistant"] = {"id": assistant_id, "tool_ids": tool_ids}
+            summary["assistant"] = True
+        except ProvisioningError as e:
+            log(f"❌ assistant update failed: {e}")
+            failures.append(str(e))
+
+    save_manifest(manifest_path, manifest)
+    if failures:
+        raise ProvisioningError(f"{len(failures)} step(s) failed; re-run to retry them")
+    return summary
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Create, update or delete the PRISM tools on Vapi as needed")
+    parser.add_argument('--dry-run', action='store_true', help="print the plan without sending anything")
+    parser.add_argument('--manifest', default=MANIFEST_PATH, help="deployed tool ids and hashes")
+    parser.add_argument('--concurrency', type=int, default=5)
+    args = parser.parse_args()
+
+    try:
+        result = deploy(VapiClient(), manifest_path=args.manifest, concurrency=args.concurrency,
+                        dry_run=args.dry_run)
+    except ProvisioningError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    if args.dry_run:
+        print(f"Dry run, no changes sent: {json.dumps(result)}")
+    elif not any((result["create"], result["update"], result["delete"], result["assistant"])):
+        print("✅ Vapi tools already up to date")
     else:
-        print(f"❌ Failed to update assistant: {response.text}")
+        print(f"✅ {json.dumps(result)}")
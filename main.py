@@ -1,57 +1,407 @@
-import requests
+import aiohttp
+import hashlib
 import json
+import os
+import random
+import tempfile
+import time
 from typing import Dict, List, Optional
 import asyncio
 
+DEFAULT_CATALOG_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "prism")
+
+
+class ToolCallError(Exception):
+    """A tool call failed after its retries, or could not be attempted"""
+
+
+class CircuitOpenError(ToolCallError):
+    """The server's circuit breaker is open; the call was not sent"""
+
+
+class _RetryableError(Exception):
+    # Transient server-side failure (5xx); worth another attempt
+    pass
+
+
+class ToolPolicy:
+    """How one tool (or one ``tool.action``) is called.
+
+    ``timeout`` bounds each attempt and ``budget`` the whole call, retries and
+    backoff included. Only idempotent calls are retried, and only read-only ones
+    should be hedged: after ``hedge_after`` seconds without a reply a duplicate
+    request is sent and whichever answers first wins.
+    """
+
+    def __init__(
+        self,
+        timeout: float = 5.0,
+        budget: Optional[float] = None,
+        retries: int = 0,
+        backoff: float = 0.05,
+        max_backoff: float = 1.0,
+        hedge_after: Optional[float] = None,
+    ):
+        self.timeout = timeout
+        self.budget = budget if budget is not None else timeout * (retries + 1)
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.hedge_after = hedge_after
+
+    def backoff_delay(self, attempt: int) -> float:
+        # Exponential backoff with full jitter so retrying clients don't stampede
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+
+READ_ONLY_POLICY = ToolPolicy(timeout=2.0, budget=4.0, retries=2, hedge_after=0.25)
+
+# Keys are "tool.action" or a bare tool name; anything else gets the client's
+# default policy, which never retries (a repeated store would duplicate data)
+DEFAULT_TOOL_POLICIES: Dict[str, ToolPolicy] = {
+    "memory_manager.retrieve": READ_ONLY_POLICY,
+    "identity_tracker.get_identity": READ_ONLY_POLICY,
+    "emotion_analyzer.get_emotional_history": READ_ONLY_POLICY,
+    "goal_tracker.get_goals": READ_ONLY_POLICY,
+}
+
+
+class CircuitBreaker:
+    """Fails fast once a server has failed ``failure_threshold`` calls in a row.
+
+    After ``reset_timeout`` seconds one probe call is let through (half-open); its
+    outcome closes the circuit again or re-opens it for another ``reset_timeout``.
+    A probe that ends any other way (an error that says nothing about the server,
+    or cancellation) is ``release``d, so the next call probes instead.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 10.0, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if self._clock() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self._probing:
+            self._probing = True
+            return True
+        return False
+
+    def release(self) -> None:
+        """End a probe that recorded neither a success nor a failure"""
+        self._probing = False
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self._probing or self.failures >= self.failure_threshold:
+            self.opened_at = self._clock()
+        self._probing = False
+
 class MCPClient:
-    def __init__(self, server_url: str):
+    def __init__(
+        self,
+        server_url: str,
+        timeout: float = 10.0,
+        connect_timeout: float = 3.0,
+        max_connections: int = 32,
+        max_concurrency: int = 16,
+        catalog_cache_path: Optional[str] = None,
+        tool_policies: Optional[Dict[str, ToolPolicy]] = None,
+        default_policy: Optional[ToolPolicy] = None,
+        breaker: Optional[CircuitBreaker] = None,
+    ):
         self.server_url = server_url.rstrip('/')
         self.available_tools: Dict = {}
+        # Version of available_tools: the server's ETag, or a hash of the catalog
+        self.catalog_version: Optional[str] = None
+        self.catalog_cache_path = catalog_cache_path or os.path.join(
+            DEFAULT_CATALOG_CACHE_DIR,
+            f"tools-{hashlib.sha256(self.server_url.encode()).hexdigest()[:16]}.json",
+        )
+        self._refresh_task: Optional[asyncio.Task] = None
+        self.timeout = aiohttp.ClientTimeout(total=timeout, connect=connect_timeout)
+        self.max_connections = max_connections
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._session: Optional[aiohttp.ClientSession] = None
+        self.tool_policies = DEFAULT_TOOL_POLICIES if tool_policies is None else tool_policies
+        self.default_policy = default_policy or ToolPolicy(timeout=timeout)
+        self.breaker = breaker or CircuitBreaker()
+        self.counters = {"calls": 0, "retries": 0, "hedges": 0, "hedge_wins": 0, "short_circuits": 0, "failures": 0}
+
+    async def __aenter__(self) -> "MCPClient":
+        await self.open()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    async def open(self) -> None:
+        """Create the pooled keep-alive session (idempotent)"""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.max_connections, keepalive_timeout=30)
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=self.timeout,
+                headers={"Content-Type": "application/json"},
+            )
+
+    async def close(self) -> None:
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            try:
+                await self._refresh_task
+            except asyncio.CancelledError:
+                pass
+            self._refresh_task = None
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
 
     async def connect(self) -> bool:
+        """Load the tool catalog, from the on-disk cache when possible.
+
+        With a cached catalog this returns immediately and revalidates it in the
+        background; only a cold start waits on the network.
+        """
+        await self.open()
+        if self._load_cached_catalog():
+            self._refresh_task = asyncio.create_task(self._background_refresh())
+            return True
         try:
-            response = requests.get(f"{self.server_url}/tools")
-            if response.status_code == 200:
-                self.available_tools = response.json()
-                return True
-            return False
+            return await self.refresh_catalog()
         except Exception as e:
             print(f"Failed to connect to MCP server: {e}")
             return False
 
+    async def refresh_catalog(self) -> bool:
+        """Revalidate the catalog with a conditional GET; returns False if the server refused"""
+        headers = {"If-None-Match": self.catalog_version} if self.catalog_version else {}
+        async with self._session.get(f"{self.server_url}/tools", headers=headers) as response:
+            if response.status == 304:
+                return True
+            if response.status != 200:
+                return False
+            tools = await response.json()
+            self._set_catalog(tools, response.headers.get("ETag") or _catalog_hash(tools))
+            self._save_cached_catalog()
+            return True
+
+    async def _background_refresh(self) -> None:
+        try:
+            await self.refresh_catalog()
+        except Exception as e:
+            print(f"Tool catalog refresh failed, using cached copy: {e}")
+
+    def _set_catalog(self, tools: Dict, version: str) -> None:
+        self.available_tools = tools
+        self.catalog_version = version
+
+    def _load_cached_catalog(self) -> bool:
+        try:
+            with open(self.catalog_cache_path) as f:
+                cached = json.load(f)
+            self._set_catalog(cached["tools"], cached["version"])
+            return True
+        except (OSError, ValueError, KeyError):
+            return False
+
+    def _save_cached_catalog(self) -> None:
+        directory = os.path.dirname(self.catalog_cache_path)
+        try:
+            os.makedirs(directory, exist_ok=True)
+            # Write-then-rename so a crash never leaves a truncated cache behind
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+            with os.fdopen(fd, "w") as f:
+                json.dump({"version": self.catalog_version, "tools": self.available_tools}, f)
+            os.replace(tmp_path, self.catalog_cache_path)
+        except OSError as e:
+            print(f"Failed to cache tool catalog: {e}")
+
+    def policy_for(self, tool_name: str, params: Dict) -> ToolPolicy:
+        action = params.get("action")
+        if action is not None and f"{tool_name}.{action}" in self.tool_policies:
+            return self.tool_policies[f"{tool_name}.{action}"]
+        return self.tool_policies.get(tool_name, self.default_policy)
+
+    async def _post_tool(self, tool_name: str, params: Dict) -> Dict:
+        async with self._semaphore:
+            async with self._session.post(
+                f"{self.server_url}/execute/{tool_name}",
+                json=params,
+            ) as response:
+                if response.status >= 500:
+                    raise _RetryableError(f"server returned {response.status}")
+                return await response.json(content_type=None)
+
+    async def _attempt(self, tool_name: str, params: Dict, policy: ToolPolicy, timeout: float) -> Dict:
+        if policy.hedge_after is None or policy.hedge_after >= timeout:
+            return await asyncio.wait_for(self._post_tool(tool_name, params), timeout)
+
+        primary = asyncio.ensure_future(self._post_tool(tool_name, params))
+        pending = {primary}
+        try:
+            done, pending = await asyncio.wait(pending, timeout=policy.hedge_after)
+            if not done:
+                self.counters["hedges"] += 1
+                pending.add(asyncio.ensure_future(self._post_tool(tool_name, params)))
+            deadline = asyncio.get_running_loop().time() + timeout - policy.hedge_after
+            error: Optional[BaseException] = None
+            while True:
+                for task in done:
+                    if task.exception() is None:
+                        if task is not primary:
+                            self.counters["hedge_wins"] += 1
+                        return task.result()
+                    error = task.exception()
+                remaining = deadline - asyncio.get_running_loop().time()
+                if not pending or remaining <= 0:
+                    raise error or asyncio.TimeoutError()
+                done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in pending:
+                task.cancel()
+
     async def execute_tool(self, tool_name: str, params: Dict) -> Dict:
+        """Call a tool under its ToolPolicy and the server's circuit breaker.
+
+        Raises CircuitOpenError without touching the network while the breaker is
+        open, and ToolCallError once the policy's attempts or budget run out.
+        """
         if tool_name not in self.available_tools:
             raise ValueError(f"Tool {tool_name} not available")
 
+        await self.open()
+        policy = self.policy_for(tool_name, params)
+        self.counters["calls"] += 1
+        deadline = time.monotonic() + policy.budget
+        attempt = 0
+        while True:
+            probe = self.breaker.state == "half_open"
+            if not self.breaker.allow():
+                self.counters["short_circuits"] += 1
+                raise CircuitOpenError(f"Failed to execute tool {tool_name}: circuit open for {self.server_url}")
+            remaining = deadline - time.monotonic()
+            try:
+                result = await self._attempt(tool_name, params, policy, min(policy.timeout, remaining))
+            except (asyncio.TimeoutError, aiohttp.ClientError, _RetryableError) as e:
+                self.breaker.record_failure()
+                error = str(e) or "timeout"
+            except Exception as e:
+                # Malformed response and the like: the server is up, so don't trip the breaker
+                self.counters["failures"] += 1
+                raise ToolCallError(f"Failed to execute tool {tool_name}: {e}")
+            else:
+                self.breaker.record_success()
+                return result
+            finally:
+                if probe:
+                    # Also reached on ToolCallError and cancellation, which record nothing
+                    self.breaker.release()
+
+            backoff = policy.backoff_delay(attempt)
+            if attempt >= policy.retries or time.monotonic() + backoff >= deadline:
+                self.counters["failures"] += 1
+                raise ToolCallError(f"Failed to execute tool {tool_name} after {attempt + 1} attempt(s): {error}")
+            attempt += 1
+            self.counters["retries"] += 1
+            await asyncio.sleep(backoff)
+
+    async def execute_batch(self, calls: List[Dict]) -> List[Dict]:
+        """Send several tool calls in one round trip to the server's /execute_batch endpoint"""
+        for call in calls:
+            if call["tool"] not in self.available_tools:
+                raise ValueError(f"Tool {call['tool']} not available")
+
+        await self.open()
+        probe = self.breaker.state == "half_open"
+        if not self.breaker.allow():
+            self.counters["short_circuits"] += 1
+            raise CircuitOpenError(f"Failed to execute batch: circuit open for {self.server_url}")
+        # A batch may contain writes, so it is never retried or hedged
         try:
-            response = requests.post(
-                f"{self.server_url}/execute/{tool_name}",
-                json=params,
-                headers={"Content-Type": "application/json"}
-            )
-            return response.json()
+            async with self._semaphore:
+                async with self._session.post(
+                    f"{self.server_url}/execute_batch",
+                    json={"calls": [{"tool": c["tool"], "params": c.get("params", {})} for c in calls]},
+                ) as response:
+                    if response.status >= 500:
+                        raise _RetryableError(f"server returned {response.status}")
+                    response.raise_for_status()
+                    results = (await response.json(content_type=None))["results"]
+        except aiohttp.ClientResponseError as e:
+            raise ToolCallError(f"Failed to execute batch: {e}")
+        except (asyncio.TimeoutError, aiohttp.ClientError, _RetryableError) as e:
+            self.breaker.record_failure()
+            raise ToolCallError(f"Failed to execute batch: {e}")
         except Exception as e:
-            raise Exception(f"Failed to execute tool {tool_name}: {e}")
+            raise ToolCallError(f"Failed to execute batch: {e}")
+        else:
+            self.breaker.record_success()
+            return results
+        finally:
+            if probe:
+                self.breaker.release()
 
     def get_available_tools(self) -> Dict:
         return self.available_tools
 
+    def stats(self) -> Dict:
+        return dict(self.counters, breaker=self.breaker.state)
+
+
+def _catalog_hash(tools: Dict) -> str:
+    canonical = json.dumps(tools, sort_keys=True, separators=(",", ":"))
+    return '"' + hashlib.sha256(canonical.encode()).hexdigest() + '"'
+
 class VapiMCPIntegration:
     def __init__(self, mcp_config: Dict):
-        """Initialize Vapi MCP integration with configuration."""
+        """Initialize Vapi MCP integration with configuration.
+
+        Optional ``mcp_config["client"]`` holds MCPClient settings (timeout,
+        connect_timeout, max_connections, max_concurrency, catalog_cache_path,
+        tool_policies, default_policy, breaker).
+        """
         self.server_url = mcp_config.get("server", {}).get("url")
         if not self.server_url:
             raise ValueError("mcp server url fail")
-        self.client = MCPClient(self.server_url)
+        self.client = MCPClient(self.server_url, **mcp_config.get("client", {}))
         self.tools_config: List[Dict] = []
+        self._tools_config_version: Optional[str] = None
+
+    async def __aenter__(self) -> "VapiMCPIntegration":
+        await self.initialize()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        await self.client.close()
 
     async def initialize(self):
         connected = await self.client.connect()
         if not connected:
             raise ConnectionError("mcp server fail")
         
-        available_tools = self.client.get_available_tools()
-        self.tools_config = self._transform_tools(available_tools)
+        self.get_tools_config()
 
     def _transform_tools(self, tools: Dict) -> List[Dict]:
         transformed = []
@@ -68,7 +418,50 @@ class VapiMCPIntegration:
     async def execute_tool(self, tool_name: str, params: Dict) -> Dict:
         return await self.client.execute_tool(tool_name, params)
 
+    async def execute_many(
+        self,
+        calls: List[Dict],
+        timeout: Optional[float] = None,
+        max_concurrency: int = 8,
+        batch: bool = False,
+    ) -> List[Dict]:
+        """Run independent tool calls concurrently and return one outcome per call, in order.
+
+        Each call is ``{"tool": name, "params": {...}, "timeout": seconds}`` (timeout
+        optional, defaulting to ``timeout``). Outcomes are ``{"tool", "ok": True, "result"}``
+        or ``{"tool", "ok": False, "error"}``: one failing or slow tool never discards
+        the others. With ``batch=True`` all calls go to the server's /execute_batch
+        endpoint in a single HTTP round trip.
+        """
+        if batch:
+            try:
+                results = await asyncio.wait_for(self.client.execute_batch(calls), timeout)
+                return [{"tool": c["tool"], "ok": True, "result": r} for c, r in zip(calls, results)]
+            except Exception as e:
+                return [{"tool": c["tool"], "ok": False, "error": str(e) or type(e).__name__} for c in calls]
+
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def run(call: Dict) -> Dict:
+            async with semaphore:
+                try:
+                    result = await asyncio.wait_for(
+                        self.client.execute_tool(call["tool"], call.get("params", {})),
+                        call.get("timeout", timeout),
+                    )
+                    return {"tool": call["tool"], "ok": True, "result": result}
+                except asyncio.TimeoutError:
+                    return {"tool": call["tool"], "ok": False, "error": "timeout"}
+                except Exception as e:
+                    return {"tool": call["tool"], "ok": False, "error": str(e)}
+
+        return await asyncio.gather(*(run(call) for call in calls))
+
     def get_tools_config(self) -> List[Dict]:
+        # Rebuilt only when the catalog version changes (e.g. after a background refresh)
+        if self._tools_config_version != self.client.catalog_version:
+            self.tools_config = self._transform_tools(self.client.get_available_tools())
+            self._tools_config_version = self.client.catalog_version
         return self.tools_config
 
 # Example usage
@@ -80,23 +473,19 @@ async def main():
         }
     }
     
-    # Create integration instance
-    integration = VapiMCPIntegration(mcp_config)
-    
     try:
-        # Initialize connection and fetch tools
-        await integration.initialize()
-        
-        # Get available tools
-        tools = integration.get_tools_config()
-        print("Available tools:", tools)
-        
-        # Example tool execution
-        result = await integration.execute_tool(
-            "example_tool",  # Replace with actual tool name
-            {"param1": "value1"}  # Replace with actual parameters
-        )
-        print("Tool execution result:", result)
+        # Create integration instance; connects, fetches tools and closes the session on exit
+        async with VapiMCPIntegration(mcp_config) as integration:
+            # Get available tools
+            tools = integration.get_tools_config()
+            print("Available tools:", tools)
+            
+            # Example tool execution
+            result = await integration.execute_tool(
+                "example_tool",  # Replace with actual tool name
+                {"param1": "value1"}  # Replace with actual parameters
+            )
+            print("Tool execution result:", result)
         
     except Exception as e:
         print(f"Error: {e}")